@@ -1,9 +1,15 @@
+import argparse
+import time
 import tkinter
 import tkinter as tk
 from tkinter.messagebox import showinfo
 from src.visualize import Visualizer
 from src.scheme import Scheme
 from src.input_module import InputParser
+from src.renderer import RenderWorker
+from src.simulation import SimulationWorker
+from src.scheduler import RefreshScheduler
+from src.command_log import CommandLog
 
 
 class SchemeGUI:
@@ -14,7 +20,7 @@ class SchemeGUI:
     #  3. add updating clock
     #  4. write file to test GUI
 
-    def __init__(self, master: tkinter.Tk):
+    def __init__(self, master: tkinter.Tk, log_lines: int = 1000, log_path: str = None):
         self._master = master
 
         # configure main window
@@ -25,11 +31,29 @@ class SchemeGUI:
         self.scheme = Scheme()
         self._visualizer = Visualizer(self.scheme)
         self._user_input_parser = InputParser(self.scheme)
+        # renders frames in background thread, see poll_frames
+        self._render_worker = RenderWorker(self._visualizer, on_render=self._record_render)
+        # advances the scheme in background thread, see update_scheme
+        self._simulation = SimulationWorker(self.scheme)
+        # chooses update_interval from the measured cost of frames
+        self._scheduler = RefreshScheduler()
+        # keeps last log_lines lines, new messages are shown once per frame, see _flush_log
+        self._log = CommandLog(log_lines, log_path)
 
         # control variables
         self._scheme_run = False
         self.interrupt_work = False
-        self.update_interval = 100
+        self.update_interval = self._scheduler.min_interval
+        self.frame_poll_interval = 15
+        self._update_job = None
+        self._poll_job = None
+        self._log_job = None
+        # time (ms) spent on one batch of commands loaded from file
+        self.commands_batch_time = 30
+        # last snapshot sent to render worker, it is rendered again when viewport changes
+        self._last_snapshot = None
+        self._pan_start = None
+        self.zoom_step = 1.25
 
         # size variables
         self.scheme_max_width = 800
@@ -44,6 +68,8 @@ class SchemeGUI:
                                    relief='sunken')
 
         self.scheme_img_label = tk.Label(self.scheme_frame)
+        # persistent image of the scheme, new frames are pasted into it
+        self.scheme_photo = None
         self.status_lbl = tk.Label(self.scheme_frame, text='Idle..')
 
         self.help_btn = tk.Button(self.tool_frame, text='Help',
@@ -94,8 +120,16 @@ class SchemeGUI:
         self._master.bind('<Control-KeyPress-h>', lambda e: self.open_help())
         self._master.bind('<Return>', lambda e: self.execute_scheme_command())
         self._master.bind('<Control-KeyPress-e>', lambda e: self.close_app())
+        self._master.bind('<Control-KeyPress-f>', lambda e: self.set_viewport(None))
+        self.scheme_img_label.bind('<ButtonPress-1>', self.start_pan)
+        self.scheme_img_label.bind('<B1-Motion>', self.pan)
+        self.scheme_img_label.bind('<MouseWheel>',
+                                   lambda e: self.zoom(e, e.delta > 0))
+        self.scheme_img_label.bind('<Button-4>', lambda e: self.zoom(e, True))
+        self.scheme_img_label.bind('<Button-5>', lambda e: self.zoom(e, False))
 
         # last tunings
+        self._render_worker.start()
 
     @staticmethod
     def open_help():
@@ -105,7 +139,9 @@ class SchemeGUI:
                           '- "Ctr + t" to stop scheme\n'
                           '- "Ctr + r" to once redraw scheme\n'
                           '- "Ctr + h" to open help\n'
-                          '- "Ctrl + e" to exit'))
+                          '- "Ctr + f" to fit scheme into window\n'
+                          '- "Ctrl + e" to exit\n'
+                          'Drag scheme with mouse to move it, use mouse wheel to zoom'))
 
     def start_scheme(self):
         """Start infinite scheme update"""
@@ -113,7 +149,9 @@ class SchemeGUI:
             self.status_lbl.configure(text='Working')
             self._scheme_run = True
             self.interrupt_work = False
-            self._master.after(self.update_interval, self.update_scheme)
+            self._scheduler.reset()
+            self._simulation.start()
+            self._schedule_update(self._scheduler.min_interval)
         else:
             self.write_to_log(f"-------------------------\n"
                               f"Stop scheme firstly\n")
@@ -124,36 +162,128 @@ class SchemeGUI:
             self.status_lbl.configure(text='Idle..')
             self._scheme_run = False
             self.interrupt_work = True
+            self._simulation.stop()
+            if self._update_job is not None:
+                self._master.after_cancel(self._update_job)
+                self._update_job = None
         else:
             self.write_to_log(f"-------------------------\n"
                               f"Start scheme firstly\n")
 
+    def _schedule_update(self, interval: int):
+        """(Re)schedule update_scheme to be called in interval ms"""
+        if self._update_job is not None:
+            self._master.after_cancel(self._update_job)
+        self.update_interval = interval
+        self._update_job = self._master.after(interval, self.update_scheme)
+
+    def _schedule_poll(self):
+        if self._poll_job is None:
+            self._poll_job = self._master.after(self.frame_poll_interval, self.poll_frames)
+
     def update_scheme(self):
-        """Update scheme every specified update interval"""
+        """Show the newest state of the scheme advanced by simulation worker.
+        Update interval is adapted by scheduler to the cost of frames
+        and grows while the scheme doesn't change"""
+        self._update_job = None
         if self.interrupt_work:
             return
-        self.redraw_scheme(iterate_circuit=True)
-        self._master.after(self.update_interval, self.update_scheme)
+        if self._simulation.error is not None:
+            self.write_to_log(f"Simulation stopped\n"
+                              f"Error message: {self._simulation.error}\n"
+                              f"-------------------------\n")
+            self.stop_scheme()
+            return
+
+        snapshot = self._simulation.take_snapshot()
+        changed = self._scheduler.should_render(snapshot)
+        if changed:
+            self._submit_snapshot(snapshot)
+        frame_cost = self._simulation.last_snapshot_time + self._render_worker.last_render_time
+        interval = self._scheduler.update(frame_cost, changed)
+
+        self.status_lbl.configure(
+            text=f'Working: {self._simulation.ticks_per_second:.0f} ticks/s '
+                 f'(tick {self._simulation.last_tick_time * 1000:.1f} ms), '
+                 f'render {self._render_worker.last_render_time * 1000:.1f} ms, '
+                 f'{self._render_worker.fps:.1f} fps, every {interval} ms')
+        self._schedule_update(interval)
 
     def redraw_scheme(self, iterate_circuit: bool = False):
-        """Redraw scheme once
+        """Redraw scheme once. Scheme snapshot is only submitted to
+        render worker here, the frame is shown by poll_frames
 
         Arguments
         ----------
             iterate_circuit: specifies if to calculate values
             for output on image and iterate circuit
         """
-        scheme_image = self._visualizer.get_tkinter_image(iterate_circuit)
-
-        self.scheme_img_label.configure(image=scheme_image)
-        self.scheme_img_label.image = scheme_image
-
-    def execute_scheme_command(self, command: str = None):
+        with self._simulation.lock:
+            scheme_outs = self.scheme.run() if iterate_circuit else None
+            snapshot = self.scheme.snapshot(scheme_outs)
+        self._submit_snapshot(snapshot)
+
+    def _record_render(self, seconds):
+        """Record render time in the profiler (called from the render thread)"""
+        profiler = self.scheme.profiler
+        if profiler is not None:
+            profiler.record_render(seconds)
+
+    def _submit_snapshot(self, snapshot):
+        self._last_snapshot = snapshot
+        self._render_worker.submit(snapshot)
+        self._schedule_poll()
+
+    def set_viewport(self, viewport):
+        """Show another part of the scheme (whole scheme if viewport is None)"""
+        self._visualizer.viewport = viewport
+        if self._last_snapshot is not None:
+            self._submit_snapshot(self._last_snapshot)
+
+    def _current_viewport(self):
+        return self._visualizer.viewport or self._visualizer.last_viewport
+
+    def start_pan(self, event):
+        self._pan_start = (event.x, event.y)
+
+    def pan(self, event):
+        """Move visible part of the scheme with the mouse"""
+        viewport = self._current_viewport()
+        if viewport is None or self._pan_start is None:
+            return
+        delta_x, delta_y = event.x - self._pan_start[0], event.y - self._pan_start[1]
+        self._pan_start = (event.x, event.y)
+        self.set_viewport(viewport.panned(delta_x, delta_y))
+
+    def zoom(self, event, zoom_in: bool):
+        """Zoom scheme in or out keeping the point under the mouse in place"""
+        viewport = self._current_viewport()
+        if viewport is None:
+            return
+        factor = self.zoom_step if zoom_in else 1 / self.zoom_step
+        self.set_viewport(viewport.zoomed(factor, self._visualizer.pixel_to_scheme(event.x, event.y)))
+
+    def poll_frames(self):
+        """Show the newest frame rendered by render worker (if there is one).
+        Polling stops when render worker has nothing to render"""
+        self._poll_job = None
+        frame = self._render_worker.take_frame()
+        if frame is not None:
+            scheme_photo = self._visualizer.paste_to_photo(frame, self.scheme_photo)
+            if scheme_photo is not self.scheme_photo:
+                self.scheme_photo = scheme_photo
+                self.scheme_img_label.configure(image=scheme_photo)
+        if self._render_worker.busy:
+            self._schedule_poll()
+
+    def execute_scheme_command(self, command: str = None, redraw: bool = True):
         if not command:
             command = self.user_entry_var.get()
         # self._user_input_parser.parse_raw_input(command)
         try:
-            to_print = self._user_input_parser.parse_raw_input(command)
+            # scheme may be run by simulation worker at the same time
+            with self._simulation.lock:
+                to_print = self._user_input_parser.parse_raw_input(command)
         except Exception as ex:
             self.write_to_log(f"Command: {command}\n"
                               f"Status: Error\n"
@@ -163,24 +293,52 @@ class SchemeGUI:
                               f"Status: Completed\n")
             if to_print:
                 self.write_to_log(to_print)
-            self.redraw_scheme()
+            if self._scheme_run:
+                # wake up idle simulation and show its result as soon as possible
+                self._simulation.notify_changed()
+                self._scheduler.reset()
+                self._schedule_update(self._scheduler.min_interval)
+            elif redraw:
+                self.redraw_scheme()
         finally:
             self.write_to_log(f"-------------------------\n")
 
-    def execute_many_commands(self, commands: list):
-        cmd = commands[0]
-        self.execute_scheme_command(cmd)
+    def execute_many_commands(self, commands: list, start: int = 0):
+        # commands are executed in batches of commands_batch_time ms,
+        # so the window stays responsive while large files are loaded
+        deadline = time.perf_counter() + self.commands_batch_time / 1000
+        index = start
+        while index < len(commands):
+            self.execute_scheme_command(commands[index], redraw=False)
+            index += 1
+            if time.perf_counter() > deadline:
+                break
 
-        if len(commands) > 1:
-            self._master.after(10, lambda: self.execute_many_commands(commands[1:]))
+        if not self._scheme_run:
+            self.redraw_scheme()
+        if index < len(commands):
+            self._master.after(10, lambda: self.execute_many_commands(commands, index))
         else:
             self.write_to_log(f"-------------------------\n"
                               f"Scheme added\n")
 
     def write_to_log(self, info: str):
+        self._log.write(info)
+        if self._log_job is None:
+            self._log_job = self._master.after(self.frame_poll_interval, self._flush_log)
+
+    def _flush_log(self):
+        """Show messages written since the last flush with one insert"""
+        self._log_job = None
+        pending = self._log.take_pending()
+        if not pending:
+            return
         self.commands_log_entry.configure(state='normal')
-        self.commands_log_entry.insert('1.0', info)
+        self.commands_log_entry.insert('1.0', pending)
+        # the newest messages are at the top, old lines are cut from the bottom
+        self.commands_log_entry.delete(f'{self._log.max_lines + 1}.0', 'end')
         self.commands_log_entry.configure(state='disabled')
+        self._log.flush()
 
     def load_from_file(self):
         path = self.user_entry_var.get()
@@ -204,10 +362,20 @@ class SchemeGUI:
 
     def close_app(self):
         showinfo(':)', 'Thanks for using L4Logic today')
+        self._simulation.stop()
+        self._render_worker.stop()
+        self._log.close()
         self._master.destroy()
 
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='L4Logic')
+    arg_parser.add_argument('--log-lines', type=int, default=1000,
+                            help='number of last lines kept in the command log')
+    arg_parser.add_argument('--log-file', default=None,
+                            help='append full command log to this file')
+    args = arg_parser.parse_args()
+
     root = tk.Tk()
-    SchemeGUI(root)
+    SchemeGUI(root, args.log_lines, args.log_file)
     root.mainloop()
@@ -0,0 +1,148 @@
+"""
+batch.py
+
+Headless runner for command files (like examples/alu_tests.txt).
+Every file is executed against a fresh Scheme, `assert` results and timings
+are collected and reported as JSON. Independent files are executed in
+parallel across a process pool.
+
+Usage:
+    python -m src.batch run [-j JOBS] [-p PRELUDE] [-o REPORT] FILE [FILE ...]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.scheme import Scheme
+from src.input_module import InputParser
+
+
+def read_commands(path: str) -> List[Tuple[int, str]]:
+    '''
+    Read command file and return list of (line number, command) pairs
+    for all non-empty lines
+    '''
+    with open(path, 'r', encoding='utf-8-sig') as file:
+        lines = file.readlines()
+    return [(num, line.strip()) for num, line in enumerate(lines, start=1) if line.strip()]
+
+
+def _execute_commands(parser: InputParser, path: str, report: dict):
+    '''
+    Execute all commands from the file at *path* with *parser*
+    and record results in *report*
+    '''
+    for line_num, command in read_commands(path):
+        report['commands'] += 1
+        try:
+            output = parser.parse_raw_input(command)
+        except Exception as ex:
+            report['errors'].append({'file': path, 'line': line_num,
+                                     'command': command, 'error': str(ex)})
+            continue
+
+        if command.split()[0] == 'assert':
+            if output.strip() == 'True':
+                report['passed'] += 1
+            else:
+                report['failed'] += 1
+                report['failures'].append({'file': path, 'line': line_num,
+                                           'command': command})
+
+
+def run_file(path: str, prelude: Sequence[str] = ()) -> Dict:
+    '''
+    Execute command file at *path* against a fresh scheme and return report.
+    Files from *prelude* are executed before *path* on the same scheme
+    (e.g. the file that builds the circuit for a file with tests)
+    '''
+    report = {'file': path, 'status': 'passed', 'commands': 0,
+              'passed': 0, 'failed': 0, 'failures': [], 'errors': [],
+              'elapsed': 0.0}
+    parser = InputParser(Scheme())
+
+    start = time.perf_counter()
+    try:
+        for prelude_path in prelude:
+            _execute_commands(parser, prelude_path, report)
+        _execute_commands(parser, path, report)
+    except OSError as ex:
+        report['errors'].append({'file': path, 'line': None,
+                                 'command': None, 'error': str(ex)})
+    report['elapsed'] = time.perf_counter() - start
+
+    if report['errors']:
+        report['status'] = 'error'
+    elif report['failed']:
+        report['status'] = 'failed'
+    return report
+
+
+def run_files(paths: Sequence[str], jobs: Optional[int] = None,
+              prelude: Sequence[str] = ()) -> Dict:
+    '''
+    Execute every command file from *paths* and return summary report.
+    Files are distributed across *jobs* worker processes
+    (number of CPUs if None, no pool if 1). Reports keep order of *paths*
+    '''
+    start = time.perf_counter()
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(paths)))
+
+    if jobs == 1:
+        reports = [run_file(path, prelude) for path in paths]
+    else:
+        # process pools pull in multiprocessing, so they are imported only when used
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            reports = list(executor.map(run_file, paths, [prelude] * len(paths)))
+
+    return {'files': reports,
+            'total': {'files': len(reports),
+                      'passed': sum(report['passed'] for report in reports),
+                      'failed': sum(report['failed'] for report in reports),
+                      'errors': sum(len(report['errors']) for report in reports),
+                      'elapsed': time.perf_counter() - start}}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    '''
+    Command line entry point. Return process exit code:
+    0 if all asserts passed and no command failed, 1 otherwise
+    '''
+    arg_parser = argparse.ArgumentParser(prog='python -m src.batch',
+                                         description='Run L4Logic command files without GUI')
+    subparsers = arg_parser.add_subparsers(dest='action', required=True)
+
+    run_parser = subparsers.add_parser('run', help='execute command files and report asserts')
+    run_parser.add_argument('files', nargs='+', help='command files to execute')
+    run_parser.add_argument('-j', '--jobs', type=int, default=None,
+                            help='number of worker processes (default: number of CPUs)')
+    run_parser.add_argument('-p', '--prelude', action='append', default=[],
+                            help='file executed before every file (can be repeated)')
+    run_parser.add_argument('-o', '--output', default=None,
+                            help='write JSON report to file instead of stdout')
+
+    args = arg_parser.parse_args(argv)
+
+    report = run_files(args.files, jobs=args.jobs, prelude=args.prelude)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    total = report['total']
+    return 0 if not total['failed'] and not total['errors'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
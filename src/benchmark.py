@@ -0,0 +1,218 @@
+"""
+benchmark.py
+
+Benchmarks of building, running and rendering scalable circuits
+(see src/generators.py). Results are written as JSON and can be compared
+against a stored baseline to catch performance regressions.
+
+Usage:
+    python -m src.benchmark [--preset {quick,full}] [-c CIRCUIT] [--repeat REPEAT]
+                            [--render] [-o OUTPUT] [--baseline BASELINE]
+                            [--tolerance TOLERANCE]
+
+Every result has a name (circuit-size/benchmark), a value and a unit.
+Time is the best of *repeat* measurements, memory is the peak of memory
+allocated while the circuit is built (tracemalloc).
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.generators import GENERATORS
+from src.input_module import InputParser
+from src.scheme import Scheme
+from src.truth_tables import TruthTable
+
+# circuit sizes (bits, stages, gates) for every preset
+PRESETS = {
+    'quick': {'adder': [8, 32], 'register': [8, 32], 'ring': [15, 63],
+              'decoder': [4, 6], 'dag': [100, 300]},
+    'full': {'adder': [8, 32, 128], 'register': [8, 32, 128], 'ring': [15, 63, 255],
+             'decoder': [4, 6, 8], 'dag': [100, 300, 1000]},
+}
+
+TRUTH_TABLES = {
+    'multiplexer': TruthTable.get_multiplexer_truth_table,
+    'decoder': TruthTable.get_decoder_truth_table,
+    'encoder': TruthTable.get_encoder_truth_table,
+}
+
+
+def best_time(function: Callable[[], object], repeat: int = 5) -> float:
+    '''
+    Return the best time (seconds) of *repeat* calls of function.
+    Garbage collector is disabled while function is measured (as in timeit)
+    '''
+    best = float('inf')
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def build_scheme(commands: Sequence[str]) -> Scheme:
+    '''Execute commands against a fresh scheme and return it'''
+    scheme = Scheme()
+    parser = InputParser(scheme)
+    for command in commands:
+        parser.parse_raw_input(command)
+    return scheme
+
+
+def _result(name: str, value: float, unit: str, **extra) -> Dict:
+    return {'name': name, 'value': value, 'unit': unit, **extra}
+
+
+def benchmark_truth_tables(sizes: Sequence[int] = (2, 3), repeat: int = 5) -> List[Dict]:
+    '''Time construction of truth tables of parametric elements'''
+    results = []
+    for name, factory in TRUTH_TABLES.items():
+        for size in sizes:
+            results.append(_result(f'truth_table-{name}-{size}/build',
+                                   best_time(lambda: factory(size), repeat), 's'))
+    return results
+
+
+def benchmark_circuit(circuit: str, size: int, repeat: int = 5,
+                      render: bool = False) -> List[Dict]:
+    '''Measure build (command parsing), memory, run and optionally render of the circuit'''
+    commands = GENERATORS[circuit](size)
+    prefix = f'{circuit}-{size}'
+
+    build = best_time(lambda: build_scheme(commands), repeat)
+    # elements and connections reference each other, so garbage of previous
+    # builds is collected before memory is measured
+    gc.collect()
+    tracemalloc.start()
+    scheme = build_scheme(commands)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    num_elements = scheme.stats()['num_elements']
+    info = {'elements': num_elements, 'commands': len(commands)}
+    results = [_result(f'{prefix}/build', build, 's', **info),
+               _result(f'{prefix}/memory', peak, 'B', **info),
+               _result(f'{prefix}/run', best_time(scheme.run, repeat), 's', **info)]
+
+    if render:
+        results.extend(_benchmark_render(scheme, prefix, info, repeat))
+    return results
+
+
+def _benchmark_render(scheme: Scheme, prefix: str, info: Dict, repeat: int) -> List[Dict]:
+    # matplotlib must not need a display
+    import matplotlib
+    matplotlib.use('Agg')
+    from src.visualize import Visualizer
+
+    snapshot = scheme.snapshot(scheme.run())
+
+    def first_frame():
+        # new visualizer has no cached layout, templates or routes
+        Visualizer(scheme).render_snapshot(snapshot)
+
+    visualizer = Visualizer(scheme)
+    visualizer.render_snapshot(snapshot)
+    return [_result(f'{prefix}/render_layout', best_time(first_frame, repeat), 's', **info),
+            _result(f'{prefix}/render_frame',
+                    best_time(lambda: visualizer.render_snapshot(snapshot), repeat), 's', **info)]
+
+
+def run_benchmarks(circuits: Optional[Dict[str, Sequence[int]]] = None, repeat: int = 5,
+                   render: bool = False) -> Dict:
+    '''Run benchmarks for {circuit: sizes} (quick preset by default) and return report'''
+    if circuits is None:
+        circuits = PRESETS['quick']
+    start = time.perf_counter()
+    results = benchmark_truth_tables(repeat=repeat)
+    for circuit, sizes in circuits.items():
+        for size in sizes:
+            results.extend(benchmark_circuit(circuit, size, repeat, render))
+    return {'meta': {'python': platform.python_version(),
+                     'platform': platform.platform(),
+                     'processor': platform.processor(),
+                     'repeat': repeat,
+                     'elapsed': time.perf_counter() - start},
+            'results': results}
+
+
+def compare(results: Sequence[Dict], baseline: Sequence[Dict], tolerance: float = 0.25,
+            min_delta: float = 0.001) -> List[Dict]:
+    '''
+    Compare results with baseline results of the same names. Result is a
+    regression if its value is more than (1 + tolerance) times the baseline value
+    (and, for times, more than *min_delta* seconds slower, so that noise
+    of very short measurements is ignored)
+    '''
+    baseline_values = {result['name']: result['value'] for result in baseline}
+    comparison = []
+    for result in results:
+        base = baseline_values.get(result['name'])
+        if not base:
+            continue
+        ratio = result['value'] / base
+        regression = ratio > 1 + tolerance and \
+            (result['unit'] != 's' or result['value'] - base > min_delta)
+        comparison.append({'name': result['name'], 'value': result['value'], 'baseline': base,
+                           'ratio': ratio, 'regression': regression})
+    return comparison
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    '''
+    Command line entry point. Return process exit code:
+    1 if any result is a regression against the baseline, 0 otherwise
+    '''
+    arg_parser = argparse.ArgumentParser(prog='python -m src.benchmark',
+                                         description='Benchmark L4Logic on generated circuits')
+    arg_parser.add_argument('--preset', choices=sorted(PRESETS), default='quick',
+                            help='circuit sizes (default: quick)')
+    arg_parser.add_argument('-c', '--circuit', action='append', choices=sorted(GENERATORS),
+                            help='benchmark only this circuit (can be repeated)')
+    arg_parser.add_argument('--repeat', type=int, default=5,
+                            help='number of measurements, the best is reported')
+    arg_parser.add_argument('--render', action='store_true', help='benchmark rendering too')
+    arg_parser.add_argument('-o', '--output', default=None,
+                            help='write JSON results to file instead of stdout')
+    arg_parser.add_argument('--baseline', default=None,
+                            help='JSON results to compare with (e.g. benchmarks/baseline.json)')
+    arg_parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='allowed slowdown against baseline (default: 0.25)')
+
+    args = arg_parser.parse_args(argv)
+
+    circuits = PRESETS[args.preset]
+    if args.circuit:
+        circuits = {circuit: circuits[circuit] for circuit in args.circuit}
+    report = run_benchmarks(circuits, args.repeat, args.render)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        report['comparison'] = compare(report['results'], baseline['results'], args.tolerance)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    return 1 if any(item['regression'] for item in report.get('comparison', [])) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
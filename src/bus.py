@@ -0,0 +1,139 @@
+'''
+bus.py
+
+Implements Word: value of a multi-bit bus, an integer with a mask of unknown
+bits, and word-level operations used by bus elements (see src/elements.py).
+Bit 0 is the least significant one.
+'''
+
+from typing import Iterable, List, Optional
+
+
+class Word:
+    '''
+    Immutable value of a bus of *width* bits. Bits set in *unknown* are
+    unknown (None), their bits in *value* are always 0, so equal words have
+    equal attributes. A fully known word is equal to its integer value:
+    Word(8, 42) == 42
+
+    Methods
+    -------
+    unknown_word(width)
+        Return word with all bits unknown
+    from_bits(bits)
+        Return word of bits (True, False or None), the first one is bit 0
+    bit(i)
+        Return bit i as True, False or None
+    to_bits()
+        Return list of bits
+    merge(other)
+        Return word whose bits are unknown where the words differ
+    '''
+    __slots__ = ('width', 'value', 'unknown')
+
+    def __init__(self, width: int, value: int = 0, unknown: int = 0):
+        if width < 1:
+            raise ValueError("Width of a bus must be >= 1")
+        mask = (1 << width) - 1
+        unknown &= mask
+        object.__setattr__(self, 'width', width)
+        object.__setattr__(self, 'value', value & mask & ~unknown)
+        object.__setattr__(self, 'unknown', unknown)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Word is immutable")
+
+    @classmethod
+    def unknown_word(cls, width: int) -> 'Word':
+        return cls(width, 0, (1 << width) - 1)
+
+    @classmethod
+    def from_bits(cls, bits: Iterable[Optional[bool]]) -> 'Word':
+        value = unknown = width = 0
+        for i, bit in enumerate(bits):
+            width = i + 1
+            if bit is None:
+                unknown |= 1 << i
+            elif bit:
+                value |= 1 << i
+        return cls(width, value, unknown)
+
+    @property
+    def mask(self) -> int:
+        return (1 << self.width) - 1
+
+    @property
+    def known(self) -> bool:
+        '''True if all bits are known'''
+        return not self.unknown
+
+    def bit(self, i: int) -> Optional[bool]:
+        if (self.unknown >> i) & 1:
+            return None
+        return bool((self.value >> i) & 1)
+
+    def to_bits(self) -> List[Optional[bool]]:
+        return [self.bit(i) for i in range(self.width)]
+
+    def merge(self, other: 'Word') -> 'Word':
+        differ = (self.value ^ other.value) | self.unknown | other.unknown
+        return Word(self.width, self.value, differ)
+
+    def __and__(self, other: 'Word') -> 'Word':
+        # known 0 in any operand gives known 0
+        zeros = (~self.value & ~self.unknown) | (~other.value & ~other.unknown)
+        return Word(self.width, self.value & other.value,
+                    (self.unknown | other.unknown) & ~zeros)
+
+    def __or__(self, other: 'Word') -> 'Word':
+        # known 1 in any operand gives known 1
+        ones = self.value | other.value
+        return Word(self.width, ones, (self.unknown | other.unknown) & ~ones)
+
+    def __xor__(self, other: 'Word') -> 'Word':
+        return Word(self.width, self.value ^ other.value, self.unknown | other.unknown)
+
+    def __invert__(self) -> 'Word':
+        return Word(self.width, ~self.value, self.unknown)
+
+    def __eq__(self, other):
+        if isinstance(other, Word):
+            return (self.width == other.width and self.value == other.value
+                    and self.unknown == other.unknown)
+        if isinstance(other, int):
+            return not self.unknown and self.value == other
+        return NotImplemented
+
+    def __hash__(self):
+        if not self.unknown:
+            return hash(self.value)
+        return hash((self.width, self.value, self.unknown))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f'Word({self.width}, {self.value:#x}, {self.unknown:#x})'
+
+    def __str__(self):
+        '''Hexadecimal digits, U for digits with unknown bits'''
+        digits = []
+        for shift in range(0, self.width, 4):
+            if (self.unknown >> shift) & 0xF:
+                digits.append('U')
+            else:
+                digits.append(f'{(self.value >> shift) & 0xF:x}')
+        return '0x' + ''.join(reversed(digits))
+
+
+def merge_values(first, second):
+    '''
+    Merge output values seen in different sweeps of an oscillating scheme:
+    words of the same width keep their common bits, other values become None
+    '''
+    if isinstance(first, Word) and isinstance(second, Word) and first.width == second.width:
+        return first.merge(second)
+    return None
@@ -0,0 +1,82 @@
+'''
+command_log.py
+
+Implements CommandLog: bounded log of executed commands
+'''
+
+from collections import deque
+from itertools import islice
+from typing import Optional, TextIO
+
+
+class CommandLog:
+    '''
+    Log of commands and their results, newest message first.
+
+    Only the last messages that fit into *max_lines* lines are kept in memory,
+    so the log doesn't grow during long sessions. Messages that were written
+    after the last take_pending call are returned by it at once, so the log
+    widget is updated with one insert per frame. If *path* is given, full
+    history is appended to that file.
+
+    Methods
+    -------
+    write(message)
+        Add message to the log
+    take_pending()
+        Return text of messages added since the last call (newest first)
+    text()
+        Return text of all kept messages (newest first)
+    flush()
+        Write buffered history to the file
+    close()
+        Close history file
+    '''
+
+    def __init__(self, max_lines: int = 1000, path: Optional[str] = None):
+        if max_lines < 1:
+            raise ValueError("Log should keep at least one line")
+        self.max_lines = max_lines
+        self.path = path
+        self._messages = deque()
+        self._num_lines = 0
+        self._pending = 0
+        self._file: Optional[TextIO] = None
+        if path is not None:
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def __len__(self):
+        '''Number of kept lines'''
+        return self._num_lines
+
+    @staticmethod
+    def _count_lines(message: str) -> int:
+        return message.count('\n') + (not message.endswith('\n'))
+
+    def write(self, message: str):
+        if self._file is not None:
+            self._file.write(message)
+        self._messages.append(message)
+        self._num_lines += self._count_lines(message)
+        self._pending += 1
+        # the newest message is kept even if it is longer than max_lines
+        while self._num_lines > self.max_lines and len(self._messages) > 1:
+            self._num_lines -= self._count_lines(self._messages.popleft())
+        self._pending = min(self._pending, len(self._messages))
+
+    def take_pending(self) -> str:
+        pending = ''.join(islice(reversed(self._messages), self._pending))
+        self._pending = 0
+        return pending
+
+    def text(self) -> str:
+        return ''.join(reversed(self._messages))
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,214 @@
+'''
+cycles.py
+
+Implements CycleSimulator: cycle-based simulation of synchronous schemes
+(see Scheme.run_cycles). Every clock cycle is a rising and a falling edge of
+all Clock elements. On the rising edge all edge-triggered elements (see
+EdgeTriggered) compute their next states from the settled inputs and then
+latch them simultaneously. After every edge combinational logic is evaluated
+once in topological order, and only elements whose inputs have changed are
+evaluated. Combinational loops (e.g. latches of NOR gates) are evaluated as
+groups until their values are stable. RAM writes are committed once the
+logic is settled.
+'''
+
+import heapq
+from typing import Dict, Hashable, List
+
+from src import elements
+
+
+class ClockDomainError(Exception):
+    '''
+    This exception is raised when clk input of an edge-triggered element is not
+    connected directly to a Clock, so its edges can't be simulated cycle by cycle
+    '''
+    def __init__(self, element_id):
+        self.message = f'Input clk of <{element_id}> must be connected to a clock'
+        super().__init__(self.message)
+
+
+def strongly_connected_components(nodes: List[Hashable],
+                                   successors: Dict[Hashable, List[Hashable]]) -> List[list]:
+    '''
+    Return strongly connected components of the graph in topological order
+    (Tarjan's algorithm without recursion)
+    '''
+    index, low, on_stack = {}, {}, set()
+    stack, components = [], []
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(successors[root]))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member is node:
+                            break
+                    components.append(component[::-1])
+    # Tarjan's algorithm finds components in reverse topological order
+    return components[::-1]
+
+
+class CycleSimulator:
+    '''
+    Simulation plan of a scheme for cycle-based simulation. The plan depends
+    only on the structure of the scheme, so it is built once and reused until
+    the scheme is edited (see Scheme.run_cycles).
+
+    Methods
+    -------
+    settle()
+        Evaluate all combinational elements once in topological order
+    step()
+        Simulate one clock cycle
+    run(cycles)
+        Simulate *cycles* clock cycles and return output values of elements
+    '''
+
+    def __init__(self, scheme):
+        self._elements = list(scheme)
+        self.clocks = [element for element in self._elements
+                       if isinstance(element, elements.Clock)]
+        self.registers = [element for element in self._elements
+                          if isinstance(element, elements.EdgeTriggered)]
+        for register in self.registers:
+            connection = register.ins['clk']
+            if connection is not None and not isinstance(connection.source, elements.Clock):
+                raise ClockDomainError(register.id)
+        # RAM writes are committed after combinational logic is settled
+        self._memories = [element for element in self._elements
+                          if isinstance(element, elements.Ram)]
+        # elements without clock never change their state
+        self._clocked = [register for register in self.registers
+                         if register.ins['clk'] is not None]
+
+        # combinational elements: their values are functions of inputs
+        # (and of their own state for level-sensitive latches and RAM)
+        sequential = {id(element) for element in self.clocks + self.registers}
+        combinational = [element for element in self._elements
+                         if id(element) not in sequential and element.ins]
+        successors = {element: [] for element in combinational}
+        for element in combinational:
+            for connection in element.ins.values():
+                if connection is not None and connection.source in successors:
+                    successors[connection.source].append(element)
+        # groups are evaluated in topological order, a group is a loop or a single element
+        self._groups = strongly_connected_components(combinational, successors)
+        group_of = {element: number for number, group in enumerate(self._groups)
+                    for element in group}
+        # numbers of other groups that read outputs of every element
+        self._fanout = {}
+        self._loops = [len(group) > 1 for group in self._groups]
+        for element in self._elements:
+            destinations = {group_of[connection.destination]
+                            for connections in element.outs.values()
+                            for connection in connections
+                            if connection.destination in group_of}
+            if element in group_of:
+                own = group_of[element]
+                if own in destinations:
+                    # element drives itself
+                    self._loops[own] = True
+                    destinations.discard(own)
+            self._fanout[element] = sorted(destinations)
+        self._dirty = []
+        self._is_dirty = [False] * len(self._groups)
+
+    def _mark(self, element):
+        for number in self._fanout[element]:
+            if not self._is_dirty[number]:
+                self._is_dirty[number] = True
+                heapq.heappush(self._dirty, number)
+
+    def _evaluate_group(self, number):
+        group = self._groups[number]
+        if not self._loops[number]:
+            element = group[0]
+            old_value = element.value
+            if element.calc_value() != old_value:
+                self._mark(element)
+            return
+        old_values = [element.value for element in group]
+        for _ in range(2 * len(group) + 2):
+            changed = False
+            for element in group:
+                value = element.value
+                if element.calc_value() != value:
+                    changed = True
+            if not changed:
+                break
+        else:
+            # the loop oscillates, its outputs are unknown
+            for element in group:
+                element.value = {label: None for label in element.value}
+        for element, old_value in zip(group, old_values):
+            if element.value != old_value:
+                self._mark(element)
+
+    def _propagate(self):
+        dirty, is_dirty = self._dirty, self._is_dirty
+        while dirty:
+            number = heapq.heappop(dirty)
+            is_dirty[number] = False
+            self._evaluate_group(number)
+        for memory in self._memories:
+            memory.commit()
+
+    def settle(self):
+        self._set_clocks(False)
+        for register in self.registers:
+            register.latch(register.state, False)
+        for element in self._elements:
+            if not element.ins:
+                element.calc_value()
+        self._dirty = list(range(len(self._groups)))
+        self._is_dirty = [True] * len(self._groups)
+        self._propagate()
+
+    def _set_clocks(self, level: bool):
+        for clock in self.clocks:
+            clock.switch(level)
+            self._mark(clock)
+
+    def step(self):
+        self._set_clocks(True)
+        next_states = [register.next_state() for register in self._clocked]
+        for register, state in zip(self._clocked, next_states):
+            changed = state != register.state
+            register.latch(state)
+            if changed:
+                self._mark(register)
+        self._propagate()
+        self._set_clocks(False)
+        self._propagate()
+
+    def run(self, cycles: int) -> Dict[Hashable, dict]:
+        self.settle()
+        for _ in range(cycles):
+            self.step()
+        # clocks are low after the last cycle
+        for register in self._clocked:
+            register.latch(register.state, False)
+        return {element.id: dict(element.value) for element in self._elements}
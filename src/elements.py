@@ -18,14 +18,34 @@ You can use the following classes from this module:
 - AdderSubtractor
 - RightShifter
 - SRFlipFlop
+- Clock
+- DFlipFlop
+- Ram
+- Rom
+- BusVariable
+- Splitter
+- Merger
+- BusAndGate
+- BusOrGate
+- BusXorGate
+- BusNotGate
+- BusAdderSubtractor
+- BusMultiplexer
+- Multiplier
+- Comparator
+- EqualityComparator
+- Incrementer
+- Counter
+- Register
+- LeftShifter
+- ArithmeticShifter
 """
 
 import functools
 import random
 from typing import Dict, Optional
 
-import pandas as pd
-
+from src.bus import Word
 from src.truth_tables import TruthTable
 
 
@@ -82,7 +102,11 @@ class BasicElement:
         Clear all the output connections
     calc_value(update)
         Calculate the output of the logic element
+    pin_width(label)
+        Return the number of bits carried by the input or output
     """
+    # widths of bus pins, single-bit pins are not stored (see BusElement)
+    _widths: Dict[str, int] = {}
 
     def __init__(self, id_, position):
         self._ins = {}
@@ -111,6 +135,9 @@ class BasicElement:
     def _init_value(self):
         self.value = {out_: None for out_ in self._outs}
 
+    def pin_width(self, label: str) -> int:
+        return self._widths.get(label, 1)
+
     def calc_value(self, update=True) -> dict:
         raise NotImplementedError
 
@@ -678,6 +705,863 @@ class GatedDFlipFlop(BasicElement):
         return value
 
 
+class EdgeTriggered:
+    """A mixin for elements that change their state only on a rising edge of the
+    clk input (clk was known 0 and becomes 1): DFlipFlop, Register and Counter.
+    In Scheme.run the edge is detected by calc_value, which remembers the previous
+    value of clk. The cycle-based simulation (see src/cycles.py) calls next_state
+    of all edge-triggered elements first and then latch, so all of them change
+    their state simultaneously and independently of the evaluation order.
+    Methods
+    -------
+    next_state()
+        Return the state after a rising edge of clk with current inputs
+    latch(state, clock=True)
+        Set the state and the level of clk it was set at
+    """
+    _state = None
+    _clock = None
+
+    @property
+    def state(self):
+        return self._state
+
+    def next_state(self):
+        raise NotImplementedError
+
+    def _state_value(self) -> dict:
+        raise NotImplementedError
+
+    def latch(self, state, clock: bool = True):
+        self._state = state
+        self._clock = clock
+        self.value = self._state_value()
+
+    def calc_value(self, update=True):
+        clock = self._read_input_value('clk')
+        if clock and self._clock is not None and not self._clock:
+            self._state = self.next_state()
+        self._clock = clock
+        value = self._state_value()
+        if update:
+            self.value = value
+        return value
+
+
+class Clock(BasicElement):
+    """A class for clock source of signal.
+    In Scheme.run the clock is a variable that is toggled by switch, while
+    Scheme.run_cycles generates its edges.
+    The interface of the element is the following:
+    - input:
+    - output:
+        out
+    """
+
+    def __init__(self, id_, position=None):
+        super().__init__(id_, position)
+        self._level = False
+        self._outs['out'] = []
+        self._element_type = "CLOCK"
+        self.value = {'out': self._level}
+
+    def switch(self, value: Optional[bool] = None):
+        self._level = not self._level if value is None else bool(value)
+        self.calc_value()
+
+    def calc_value(self, update=True):
+        value = {'out': self._level}
+        if update:
+            self.value = value
+        return value
+
+
+class DFlipFlop(EdgeTriggered, BasicElement):
+    """A class for edge-triggered D flip-flop element.
+    Q takes the value of D on every rising edge of clk and keeps it otherwise,
+    the initial state is 0.
+    The interface of the element is the following:
+    - input:
+        D
+        clk
+    - output:
+        Q
+    """
+
+    def __init__(self, id_, position=None):
+        super().__init__(id_, position)
+        self._ins['D'] = None
+        self._ins['clk'] = None
+        self._outs['Q'] = []
+        self._element_type = "DFF"
+        self._state = False
+        self._init_value()
+
+    def next_state(self):
+        return self._read_input_value('D')
+
+    def _state_value(self):
+        return {'Q': self._state}
+
+
+class _MemoryElement(BasicElement):
+    """An abstract class for memory elements (RAM and ROM).
+    Words are stored in a NumPy array of unsigned integers with 2**address_bits
+    elements (or in a read-only memory-mapped file), so memory of any size is one
+    element and every access costs O(address_bits + data_bits).
+    Address and data bits are numbered from the least significant one.
+    The interface of a memory element is the following:
+    - input:
+        A0
+        ...
+        A{address_bits-1}
+    - output:
+        Q0
+        ...
+        Q{data_bits-1}
+    If any address bit is unknown (None), all outputs are unknown.
+    """
+    MAX_ADDRESS_BITS = 24
+    MAX_DATA_BITS = 64
+
+    def __init__(self, id_, position=None, num_address_bits: int = 8, num_data_bits: int = 8):
+        if not 1 <= num_address_bits <= self.MAX_ADDRESS_BITS:
+            raise ValueError(f"Number of address bits must be in [1, {self.MAX_ADDRESS_BITS}]")
+        if not 1 <= num_data_bits <= self.MAX_DATA_BITS:
+            raise ValueError(f"Number of data bits must be in [1, {self.MAX_DATA_BITS}]")
+        super().__init__(id_, position)
+        self._address_bits = num_address_bits
+        self._data_bits = num_data_bits
+        for i in range(num_address_bits):
+            self._ins[f'A{i}'] = None
+        for i in range(num_data_bits):
+            self._outs[f'Q{i}'] = []
+        self._memory = None
+
+    @property
+    def number_address_bits(self):
+        return self._address_bits
+
+    @property
+    def number_data_bits(self):
+        return self._data_bits
+
+    @property
+    def size(self) -> int:
+        """Number of words"""
+        return 2 ** self._address_bits
+
+    @property
+    def dtype(self) -> str:
+        """NumPy type of words: the smallest little-endian unsigned integer for data_bits"""
+        for num_bytes in (1, 2, 4, 8):
+            if self._data_bits <= num_bytes * 8:
+                return f'<u{num_bytes}'
+
+    @property
+    def contents(self):
+        """NumPy array of words"""
+        return self._memory
+
+    @staticmethod
+    def _is_hex_file(path: str) -> bool:
+        return path.lower().endswith(('.hex', '.txt'))
+
+    def _read_hex_file(self, path: str):
+        # numpy is heavy to import, so it is imported only by memory elements
+        import numpy as np
+
+        with open(path, 'r', encoding='utf-8') as file:
+            words = [int(word, 16) for line in file
+                     for word in line.split('#')[0].split()]
+        return np.array(words, dtype=self.dtype)
+
+    def _check_size(self, memory):
+        if len(memory) > self.size:
+            raise ValueError(f"File has {len(memory)} words, but memory has only {self.size}")
+        return memory
+
+    def read(self, address: int) -> int:
+        """Return word at address (words after the end of a loaded file are 0)"""
+        if address >= len(self._memory):
+            return 0
+        return int(self._memory[address])
+
+    def _read_number(self, base: str, num_bits: int) -> Optional[int]:
+        number = 0
+        for i in range(num_bits):
+            bit = self._read_input_value(f'{base}{i}')
+            if bit is None:
+                return None
+            number |= int(bit) << i
+        return number
+
+    def _word_to_value(self, word: Optional[int]) -> dict:
+        if word is None:
+            return {f'Q{i}': None for i in range(self._data_bits)}
+        return {f'Q{i}': bool((word >> i) & 1) for i in range(self._data_bits)}
+
+    def calc_value(self, update=True):
+        address = self._read_number('A', self._address_bits)
+        value = self._word_to_value(None if address is None else self.read(address))
+        if update:
+            self.value = value
+        return value
+
+
+class Ram(_MemoryElement):
+    """A class for RAM (random access memory) element.
+    The interface of a RAM element is the following:
+    - input:
+        A0 ... A{address_bits-1}    address
+        D0 ... D{data_bits-1}       data to write
+        WE                          write enable
+    - output:
+        Q0 ... Q{data_bits-1}       word at the address
+    While WE is 1, the data word is passed to the outputs and is written at
+    the address when the scheme is stable: calc_value only remembers the write,
+    commit performs it (Scheme.run commits after the values are settled), so
+    transient addresses and data are not written. Unknown data is not written,
+    outputs are unknown then.
+    Initial contents are zeros or words from a file (see Rom).
+    """
+
+    def __init__(self, id_, position=None, num_address_bits: int = 8, num_data_bits: int = 8,
+                 path: Optional[str] = None):
+        super().__init__(id_, position, num_address_bits, num_data_bits)
+        for i in range(num_data_bits):
+            self._ins[f'D{i}'] = None
+        self._ins['WE'] = None
+        self._element_type = "RAM"
+        self._memory = self._load(path)
+        # (address, word) of the last evaluation with WE = 1, see commit
+        self._pending_write = None
+        self._init_value()
+
+    def _load(self, path: Optional[str]):
+        import numpy as np
+
+        memory = np.zeros(self.size, dtype=self.dtype)
+        if path is not None:
+            words = self._check_size(self._read_hex_file(path) if self._is_hex_file(path)
+                                     else np.fromfile(path, dtype=self.dtype))
+            memory[:len(words)] = words
+        return memory
+
+    def write(self, address: int, word: int):
+        """Write word at address (only data_bits lower bits are kept)"""
+        self._memory[address] = word & ((1 << self._data_bits) - 1)
+
+    def commit(self):
+        """Write the word of the last evaluation if WE was 1 then"""
+        if self._pending_write is not None:
+            self.write(*self._pending_write)
+            self._pending_write = None
+
+    def calc_value(self, update=True):
+        self._pending_write = None
+        if self._read_input_value('WE'):
+            address = self._read_number('A', self._address_bits)
+            word = self._read_number('D', self._data_bits)
+            if address is not None and word is not None:
+                self._pending_write = (address, word)
+            value = self._word_to_value(None if address is None else word)
+            if update:
+                self.value = value
+            return value
+        return super().calc_value(update)
+
+
+# elements whose outputs depend on their previous inputs (flip-flops, clocks, memory)
+STATEFUL_TYPES = (EdgeTriggered, GatedSRFlipFlop, GatedDFlipFlop, Ram, Clock)
+
+
+class Rom(_MemoryElement):
+    """A class for ROM (read-only memory) element.
+    The interface of a ROM element is the following:
+    - input:
+        A0 ... A{address_bits-1}    address
+    - output:
+        Q0 ... Q{data_bits-1}       word at the address
+    Contents are loaded from a file:
+    - binary file: words of data_bits rounded up to 1, 2, 4 or 8 bytes,
+      little-endian. The file is memory-mapped (numpy.memmap), so it is not
+      read into memory and only accessed pages are loaded
+    - hex file (*.hex, *.txt): hexadecimal words separated by whitespace,
+      text after '#' is ignored
+    Without file all words are zeros. Words after the end of the file are zeros.
+    """
+
+    def __init__(self, id_, position=None, num_address_bits: int = 8, num_data_bits: int = 8,
+                 path: Optional[str] = None):
+        super().__init__(id_, position, num_address_bits, num_data_bits)
+        self._element_type = "ROM"
+        self._memory = self._load(path)
+        self._init_value()
+
+    def _load(self, path: Optional[str]):
+        import numpy as np
+
+        if path is None:
+            return np.zeros(self.size, dtype=self.dtype)
+        if self._is_hex_file(path):
+            return self._check_size(self._read_hex_file(path))
+        return self._check_size(np.memmap(path, dtype=self.dtype, mode='r'))
+
+
+class BusElement(BasicElement):
+    """An abstract class for elements with bus pins.
+    A bus pin carries a whole word (see src/bus.py) through a single connection,
+    so a word-level element is evaluated with a few integer operations instead of
+    a truth table lookup per bit. Bus pins can be connected only to bus pins of
+    the same width. Unconnected bus inputs are read as words of unknown bits.
+    """
+
+    def __init__(self, id_, position, width: int):
+        if width < 1:
+            raise ValueError("Width of a bus must be >= 1")
+        super().__init__(id_, position)
+        self._width = width
+        self._widths = {}
+
+    @property
+    def bus_width(self):
+        return self._width
+
+    def _add_bus_input(self, label: str, width: Optional[int] = None):
+        self._ins[label] = None
+        self._widths[label] = self._width if width is None else width
+
+    def _add_bus_output(self, label: str, width: Optional[int] = None):
+        self._outs[label] = []
+        self._widths[label] = self._width if width is None else width
+
+    def _read_word(self, label: str) -> Word:
+        word = self._read_input_value(label)
+        if word is None:
+            return Word.unknown_word(self._widths[label])
+        return word
+
+    def _init_value(self):
+        self.value = {out_: Word.unknown_word(self._widths[out_]) if out_ in self._widths else None
+                      for out_ in self._outs}
+
+    def _evaluate(self) -> dict:
+        raise NotImplementedError
+
+    def calc_value(self, update=True):
+        value = self._evaluate()
+        if update:
+            self.value = value
+        return value
+
+
+class BusVariable(BusElement):
+    """A class for variable source of a word.
+    The interface of the element is the following:
+    - input:
+    - output:
+        out (bus)
+    """
+
+    def __init__(self, id_, position=None, width: int = 8, init_value: int = 0):
+        super().__init__(id_, position, width)
+        self._add_bus_output('out')
+        self._element_type = "BUS_VARIABLE"
+        self._word = Word(width, init_value)
+        self.value = {'out': self._word}
+
+    def switch(self, value: Optional[int] = None):
+        """Set the word (invert all bits by default)"""
+        self._word = ~self._word if value is None else Word(self._width, value)
+        self.calc_value()
+
+    def _evaluate(self):
+        return {'out': self._word}
+
+
+class Splitter(BusElement):
+    """A class for splitter element: it splits a bus into single bits.
+    The interface of a splitter element is the following:
+    - input:
+        in (bus)
+    - output:
+        out0
+        ...
+        out{width-1}
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._add_bus_input('in')
+        for i in range(width):
+            self._outs[f'out{i}'] = []
+        self._element_type = "SPLITTER"
+        self._init_value()
+
+    def _evaluate(self):
+        return {f'out{i}': bit for i, bit in enumerate(self._read_word('in').to_bits())}
+
+
+class Merger(BusElement):
+    """A class for merger element: it merges single bits into a bus.
+    The interface of a merger element is the following:
+    - input:
+        in0
+        ...
+        in{width-1}
+    - output:
+        out (bus)
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        for i in range(width):
+            self._ins[f'in{i}'] = None
+        self._add_bus_output('out')
+        self._element_type = "MERGER"
+        self._init_value()
+
+    def _evaluate(self):
+        return {'out': Word.from_bits(self._read_input_value(label) for label in self._ins)}
+
+
+class BusGate(BusElement):
+    """An abstract class for bitwise gates over buses (BusAndGate, BusOrGate, BusXorGate).
+    Bits of the output are unknown only if they can't be deduced from known bits of
+    the inputs (e.g. 0 AND unknown is 0).
+    The interface of a bus gate is the following:
+    - input:
+        in1 (bus)
+        ...
+        in{num_inputs} (bus)
+    - output:
+        out (bus)
+    """
+
+    def __init__(self, id_, position, num_inputs: int, width: int):
+        if num_inputs < 2:
+            raise ValueError("Number of inputs should be >= 2")
+        super().__init__(id_, position, width)
+        self._num_inputs = num_inputs
+        for i in range(1, num_inputs + 1):
+            self._add_bus_input(f'in{i}')
+        self._add_bus_output('out')
+        self._init_value()
+
+    @property
+    def number_inputs(self):
+        return self._num_inputs
+
+    @staticmethod
+    def _logic_of_element(first: Word, second: Word) -> Word:
+        raise NotImplementedError
+
+    def _evaluate(self):
+        return {'out': functools.reduce(self._logic_of_element,
+                                        [self._read_word(label) for label in self._ins])}
+
+
+class BusAndGate(BusGate):
+    def __init__(self, id_, position=None, num_inputs=2, width: int = 8):
+        super().__init__(id_, position, num_inputs, width)
+        self._element_type = "BUS_AND"
+
+    @staticmethod
+    def _logic_of_element(first, second):
+        return first & second
+
+
+class BusOrGate(BusGate):
+    def __init__(self, id_, position=None, num_inputs=2, width: int = 8):
+        super().__init__(id_, position, num_inputs, width)
+        self._element_type = "BUS_OR"
+
+    @staticmethod
+    def _logic_of_element(first, second):
+        return first | second
+
+
+class BusXorGate(BusGate):
+    def __init__(self, id_, position=None, num_inputs=2, width: int = 8):
+        super().__init__(id_, position, num_inputs, width)
+        self._element_type = "BUS_XOR"
+
+    @staticmethod
+    def _logic_of_element(first, second):
+        return first ^ second
+
+
+class BusNotGate(BusElement):
+    """A class for bitwise NOT of a bus.
+    The interface of the element is the following:
+    - input:
+        in (bus)
+    - output:
+        out (bus)
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._add_bus_input('in')
+        self._add_bus_output('out')
+        self._element_type = "BUS_NOT"
+        self._init_value()
+
+    def _evaluate(self):
+        return {'out': ~self._read_word('in')}
+
+
+class BusAdderSubtractor(BusElement):
+    """A class for word-level adder-subtractor element.
+    It calculates A + B or A - B (if sub is 1) modulo 2**width, Cout is the carry
+    as in AdderSubtractor (A + ~B + 1 for subtraction). If any input bit is
+    unknown, all outputs are unknown.
+    The interface of the element is the following:
+    - input:
+        A (bus)
+        B (bus)
+        sub
+    - output:
+        S (bus)
+        Cout
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._add_bus_input('A')
+        self._add_bus_input('B')
+        self._ins['sub'] = None
+        self._add_bus_output('S')
+        self._outs['Cout'] = []
+        self._element_type = "BUS_ADDERSUBTRACTOR"
+        self._init_value()
+
+    def _evaluate(self):
+        number_a, number_b = self._read_word('A'), self._read_word('B')
+        sub = self._read_input_value('sub')
+        if sub is None or number_a.unknown or number_b.unknown:
+            return {'S': Word.unknown_word(self._width), 'Cout': None}
+        mask = (1 << self._width) - 1
+        if sub:
+            total = number_a.value + (~number_b.value & mask) + 1
+        else:
+            total = number_a.value + number_b.value
+        return {'S': Word(self._width, total), 'Cout': bool(total >> self._width)}
+
+
+class BusMultiplexer(BusElement):
+    """A class for word-level multiplexer element.
+    The output is the input selected by the number on sel. If some select bits are
+    unknown, the output keeps the bits that are equal in all inputs it can select.
+    The interface of the element is the following:
+    - input:
+        sel (bus of num_select_lines bits)
+        in0 (bus)
+        ...
+        in{2**num_select_lines-1} (bus)
+    - output:
+        out (bus)
+    """
+
+    def __init__(self, id_, position=None, num_select_lines: int = 1, width: int = 8):
+        if num_select_lines < 1:
+            raise ValueError("Number of select lines must be >= 1")
+        super().__init__(id_, position, width)
+        self._num_select_lines = num_select_lines
+        self._add_bus_input('sel', num_select_lines)
+        for i in range(2 ** num_select_lines):
+            self._add_bus_input(f'in{i}')
+        self._add_bus_output('out')
+        self._element_type = "BUS_MULTIPLEXER"
+        self._init_value()
+
+    @property
+    def number_select_lines(self):
+        return self._num_select_lines
+
+    def _evaluate(self):
+        select = self._read_word('sel')
+        if not select.unknown:
+            return {'out': self._read_word(f'in{select.value}')}
+        candidates = [self._read_word(f'in{i}') for i in range(2 ** self._num_select_lines)
+                      if i & ~select.unknown == select.value]
+        return {'out': functools.reduce(Word.merge, candidates)}
+
+
+def _compare_words(first: Word, second: Word):
+    """Return (A < B, A == B, A > B) of unsigned words, every result is None
+    if it depends on unknown bits"""
+    if (first.value ^ second.value) & ~(first.unknown | second.unknown):
+        equal = False
+    elif first.unknown or second.unknown:
+        equal = None
+    else:
+        equal = True
+    # unknown bits give the range [value, value | unknown]
+    first_max, second_max = first.value | first.unknown, second.value | second.unknown
+    if first_max < second.value:
+        less = True
+    elif first.value >= second_max:
+        less = False
+    else:
+        less = None
+    if first.value > second_max:
+        greater = True
+    elif first_max <= second.value:
+        greater = False
+    else:
+        greater = None
+    return less, equal, greater
+
+
+class Multiplier(BusElement):
+    """A class for multiplier element.
+    It calculates the full product of two unsigned words. If any input bit is
+    unknown, the product is unknown (unless the other word is known zero).
+    The interface of the element is the following:
+    - input:
+        A (bus)
+        B (bus)
+    - output:
+        P (bus of 2*width bits)
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._add_bus_input('A')
+        self._add_bus_input('B')
+        self._add_bus_output('P', 2 * width)
+        self._element_type = "MULTIPLIER"
+        self._init_value()
+
+    def _evaluate(self):
+        first, second = self._read_word('A'), self._read_word('B')
+        if first == 0 or second == 0:
+            return {'P': Word(2 * self._width, 0)}
+        if first.unknown or second.unknown:
+            return {'P': Word.unknown_word(2 * self._width)}
+        return {'P': Word(2 * self._width, first.value * second.value)}
+
+
+class Comparator(BusElement):
+    """A class for magnitude comparator of unsigned words.
+    Outputs are known whenever known bits are enough to compare the words.
+    The interface of the element is the following:
+    - input:
+        A (bus)
+        B (bus)
+    - output:
+        lt (A < B)
+        eq (A == B)
+        gt (A > B)
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._add_bus_input('A')
+        self._add_bus_input('B')
+        self._outs['lt'] = []
+        self._outs['eq'] = []
+        self._outs['gt'] = []
+        self._element_type = "COMPARATOR"
+        self._init_value()
+
+    def _evaluate(self):
+        less, equal, greater = _compare_words(self._read_word('A'), self._read_word('B'))
+        return {'lt': less, 'eq': equal, 'gt': greater}
+
+
+class EqualityComparator(BusElement):
+    """A class for equality comparator of words.
+    The output is 0 if any pair of known bits differ, even if other bits are unknown.
+    The interface of the element is the following:
+    - input:
+        A (bus)
+        B (bus)
+    - output:
+        eq
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._add_bus_input('A')
+        self._add_bus_input('B')
+        self._outs['eq'] = []
+        self._element_type = "EQUALITY_COMPARATOR"
+        self._init_value()
+
+    def _evaluate(self):
+        return {'eq': _compare_words(self._read_word('A'), self._read_word('B'))[1]}
+
+
+class Incrementer(BusElement):
+    """A class for incrementer element: out = in + 1 modulo 2**width, Cout is
+    the carry (in was all ones). If any input bit is unknown, outputs are unknown.
+    The interface of the element is the following:
+    - input:
+        in (bus)
+    - output:
+        out (bus)
+        Cout
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._add_bus_input('in')
+        self._add_bus_output('out')
+        self._outs['Cout'] = []
+        self._element_type = "INCREMENTER"
+        self._init_value()
+
+    def _evaluate(self):
+        word = self._read_word('in')
+        if word.unknown:
+            return {'out': Word.unknown_word(self._width), 'Cout': None}
+        total = word.value + 1
+        return {'out': Word(self._width, total), 'Cout': bool(total >> self._width)}
+
+
+class Counter(EdgeTriggered, BusElement):
+    """A class for counter element.
+    The counter is incremented (modulo 2**width) on every rising edge of clk
+    and is set to zero while reset is 1 (in Scheme.run_cycles reset is sampled
+    on clock edges like other inputs). While a connected reset is unknown, the
+    count is kept. Like flip-flops, the counter keeps its state between runs of
+    the scheme.
+    The interface of the element is the following:
+    - input:
+        clk
+        reset
+    - output:
+        out (bus)
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._ins['clk'] = None
+        self._ins['reset'] = None
+        self._add_bus_output('out')
+        self._element_type = "COUNTER"
+        self._state = Word(width, 0)
+        self._init_value()
+
+    def next_state(self):
+        reset = self._read_input_value('reset')
+        if reset:
+            return Word(self._width, 0)
+        # unconnected reset is 0, unknown reset blocks counting
+        if reset is None and self._ins['reset'] is not None:
+            return self._state
+        return Word(self._width, self._state.value + 1)
+
+    def _state_value(self):
+        return {'out': self._state}
+
+    def calc_value(self, update=True):
+        if self._read_input_value('reset'):
+            self._state = Word(self._width, 0)
+        return super().calc_value(update)
+
+
+class Register(EdgeTriggered, BusElement):
+    """A class for register element: a word of edge-triggered D flip-flops.
+    Q takes the value of D on every rising edge of clk while E is 1 (or not
+    connected), the initial state is 0. If E is unknown, the bits that differ
+    in D and Q become unknown.
+    The interface of the element is the following:
+    - input:
+        D (bus)
+        clk
+        E
+    - output:
+        Q (bus)
+    """
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._add_bus_input('D')
+        self._ins['clk'] = None
+        self._ins['E'] = None
+        self._add_bus_output('Q')
+        self._element_type = "REGISTER"
+        self._state = Word(width, 0)
+        self._init_value()
+
+    def next_state(self):
+        enable = self._read_input_value('E')
+        if enable is None and self._ins['E'] is not None:
+            return self._state.merge(self._read_word('D'))
+        if enable is None or enable:
+            return self._read_word('D')
+        return self._state
+
+    def _state_value(self):
+        return {'Q': self._state}
+
+
+class BusShifter(BusElement):
+    """An abstract class for word shifters (LeftShifter, ArithmeticShifter).
+    The word is shifted by the number on amount. If some bits of amount are
+    unknown, the output keeps the bits that are equal for all possible amounts.
+    The interface of a shifter is the following:
+    - input:
+        in (bus)
+        amount (bus of bits enough for width-1)
+    - output:
+        out (bus)
+    """
+
+    def __init__(self, id_, position, width: int):
+        super().__init__(id_, position, width)
+        self._add_bus_input('in')
+        self._add_bus_input('amount', max(1, (width - 1).bit_length()))
+        self._add_bus_output('out')
+
+    def _shift(self, word: Word, amount: int) -> Word:
+        raise NotImplementedError
+
+    def _evaluate(self):
+        word, amount = self._read_word('in'), self._read_word('amount')
+        if not amount.unknown:
+            return {'out': self._shift(word, amount.value)}
+        amounts = [number for number in range(2 ** amount.width)
+                   if number & ~amount.unknown == amount.value]
+        return {'out': functools.reduce(Word.merge, (self._shift(word, number)
+                                                     for number in amounts))}
+
+
+class LeftShifter(BusShifter):
+    """Shifter of words to the most significant bit, zeros are shifted in"""
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._element_type = "LEFT_SHIFTER"
+        self._init_value()
+
+    def _shift(self, word, amount):
+        return Word(self._width, word.value << amount, word.unknown << amount)
+
+
+class ArithmeticShifter(BusShifter):
+    """Shifter of words to the least significant bit, the sign (most significant)
+    bit is shifted in, so signed words are divided by 2**amount rounding down"""
+
+    def __init__(self, id_, position=None, width: int = 8):
+        super().__init__(id_, position, width)
+        self._element_type = "ARITHMETIC_SHIFTER"
+        self._init_value()
+
+    def _shift(self, word, amount):
+        amount = min(amount, self._width - 1)
+        sign = word.width - 1
+        # bits shifted in copy the sign bit, including its unknown state
+        fill = ((1 << amount) - 1) << (self._width - amount)
+        value = word.value >> amount | (fill if (word.value >> sign) & 1 else 0)
+        unknown = word.unknown >> amount | (fill if (word.unknown >> sign) & 1 else 0)
+        return Word(self._width, value, unknown)
+
+
 if __name__ == "__main__":
     or_gate = OrGate("or", num_inputs=2)
 
@@ -0,0 +1,168 @@
+"""
+export.py
+
+Headless export of schemes to PNG or SVG images. Every command file is
+executed against a fresh Scheme (optionally after prelude files), the
+scheme is run and rendered with the non-interactive Agg backend.
+Independent files are exported in parallel across a process pool.
+
+Usage:
+    python -m src.export [-j JOBS] [-o OUTPUT_DIR] [-f {png,svg}]
+                         [--width WIDTH] [--height HEIGHT] [--no-run]
+                         [-p PRELUDE] PATH [PATH ...]
+
+PATH is a command file or a directory with command files (*.txt)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from src.batch import read_commands
+from src.input_module import InputParser
+from src.scheme import Scheme
+
+FORMATS = ('png', 'svg')
+
+
+def _use_agg_backend():
+    '''Make sure matplotlib (imported by schemdraw) doesn't need a display'''
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def export_scheme(scheme: Scheme, path: str, width: int = 800, height: int = 800,
+                  iterate_circuit: bool = True, image_format: Optional[str] = None):
+    '''
+    Save image of *scheme* to *path*. Output values are drawn if
+    *iterate_circuit* is True (the scheme is run before rendering).
+    Format is taken from the extension of *path* if it is not given
+    '''
+    from src.visualize import Visualizer
+
+    visualizer = Visualizer(scheme, max_width=width, max_height=height)
+    outs = scheme.run() if iterate_circuit else None
+    visualizer.export_snapshot(scheme.snapshot(outs), path, image_format)
+
+
+def collect_command_files(paths: Sequence[str]) -> List[str]:
+    '''
+    Return command files from *paths*: files are taken as they are,
+    directories are replaced with *.txt files inside them (sorted)
+    '''
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.endswith('.txt')))
+        else:
+            files.append(path)
+    return files
+
+
+def export_file(path: str, output_dir: str, image_format: str = 'png',
+                width: int = 800, height: int = 800, iterate_circuit: bool = True,
+                prelude: Sequence[str] = ()) -> Dict:
+    '''
+    Execute command file at *path* against a fresh scheme (after files
+    from *prelude*) and save its image to *output_dir*. Return report
+    '''
+    name = os.path.splitext(os.path.basename(path))[0]
+    image_path = os.path.join(output_dir, f'{name}.{image_format}')
+    report = {'file': path, 'image': image_path, 'status': 'exported',
+              'errors': [], 'elapsed': 0.0}
+    scheme = Scheme()
+    parser = InputParser(scheme)
+
+    start = time.perf_counter()
+    try:
+        for command_path in (*prelude, path):
+            for line_num, command in read_commands(command_path):
+                try:
+                    parser.parse_raw_input(command)
+                except Exception as ex:
+                    report['errors'].append({'file': command_path, 'line': line_num,
+                                             'command': command, 'error': str(ex)})
+        export_scheme(scheme, image_path, width, height, iterate_circuit, image_format)
+    except Exception as ex:
+        report['status'] = 'error'
+        report['image'] = None
+        report['errors'].append({'file': path, 'line': None,
+                                 'command': None, 'error': str(ex)})
+    report['elapsed'] = time.perf_counter() - start
+    return report
+
+
+def export_files(paths: Sequence[str], output_dir: str, image_format: str = 'png',
+                 width: int = 800, height: int = 800, iterate_circuit: bool = True,
+                 prelude: Sequence[str] = (), jobs: Optional[int] = None) -> Dict:
+    '''
+    Export every command file from *paths* (see collect_command_files)
+    to *output_dir* and return summary report. Files are distributed across
+    *jobs* worker processes (number of CPUs if None, no pool if 1)
+    '''
+    if image_format not in FORMATS:
+        raise ValueError(f"Image format <{image_format}> is not supported")
+    start = time.perf_counter()
+    files = collect_command_files(paths)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(files)))
+
+    args = (output_dir, image_format, width, height, iterate_circuit, prelude)
+    if jobs == 1:
+        _use_agg_backend()
+        reports = [export_file(path, *args) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_use_agg_backend) as executor:
+            reports = list(executor.map(export_file, files,
+                                        *[[arg] * len(files) for arg in args]))
+
+    return {'files': reports,
+            'total': {'files': len(reports),
+                      'exported': sum(report['status'] == 'exported' for report in reports),
+                      'errors': sum(len(report['errors']) for report in reports),
+                      'elapsed': time.perf_counter() - start}}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    '''
+    Command line entry point. Return process exit code:
+    0 if all files were exported without errors, 1 otherwise
+    '''
+    arg_parser = argparse.ArgumentParser(prog='python -m src.export',
+                                         description='Export L4Logic command files to images')
+    arg_parser.add_argument('paths', nargs='+',
+                            help='command files or directories with command files (*.txt)')
+    arg_parser.add_argument('-o', '--output-dir', default='.',
+                            help='directory for images (default: current directory)')
+    arg_parser.add_argument('-f', '--format', choices=FORMATS, default='png',
+                            help='image format (default: png)')
+    arg_parser.add_argument('--width', type=int, default=800, help='image width in pixels')
+    arg_parser.add_argument('--height', type=int, default=800, help='image height in pixels')
+    arg_parser.add_argument('--no-run', action='store_true',
+                            help="don't run the scheme, so output values are not drawn")
+    arg_parser.add_argument('-p', '--prelude', action='append', default=[],
+                            help='file executed before every file (can be repeated)')
+    arg_parser.add_argument('-j', '--jobs', type=int, default=None,
+                            help='number of worker processes (default: number of CPUs)')
+
+    args = arg_parser.parse_args(argv)
+
+    report = export_files(args.paths, args.output_dir, args.format, args.width, args.height,
+                          not args.no_run, args.prelude, args.jobs)
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+    return 0 if report['total']['exported'] == report['total']['files'] \
+        and not report['total']['errors'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
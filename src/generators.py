@@ -0,0 +1,131 @@
+'''
+generators.py
+
+Generators of scalable circuits for benchmarks and tests. Every generator
+returns list of commands (as in command files, see InputParser), so the
+same circuit can be parsed, run, rendered or written to a file.
+'''
+
+import random
+from typing import Callable, Dict, List
+
+
+def ripple_carry_adder(bits: int) -> List[str]:
+    '''N-bit ripple-carry adder built from FULLADDER elements'''
+    commands = ['add constant cin -2 0 -v 0']
+    for bit in range(bits):
+        y = -4 * bit
+        commands += [f'add variable a{bit} 0 {y + 1}',
+                     f'add variable b{bit} 0 {y}',
+                     f'add fulladder fa{bit} 5 {y}',
+                     f'a{bit} out > fa{bit} A',
+                     f'b{bit} out > fa{bit} B']
+        carry = 'cin out' if bit == 0 else f'fa{bit - 1} Cout'
+        commands.append(f'{carry} > fa{bit} Cin')
+    return commands
+
+
+def register_file(bits: int) -> List[str]:
+    '''
+    N-bit register of gated NOR latches (examples/4bit_register.txt
+    scaled to N bits): every bit is stored while clock is 0
+    '''
+    commands = []
+    for bit in range(1, bits + 1):
+        y = -5 * bit
+        commands += [f'add nor nor{bit}1 1 {y + 1}',
+                     f'add nor nor{bit}2 0 {y}',
+                     f'nor{bit}1 out > nor{bit}2 in1',
+                     f'nor{bit}2 out > nor{bit}1 in2',
+                     f'add and and{bit}1 -2 {y + 2}',
+                     f'and{bit}1 out > nor{bit}1 in1',
+                     f'add and and{bit}2 -2 {y - 1}',
+                     f'and{bit}2 out > nor{bit}2 in2',
+                     f'add not not{bit} -4 {y + 1}',
+                     f'not{bit} out > and{bit}1 in1',
+                     f'add variable v{bit} -6 {y}',
+                     f'v{bit} out > not{bit} in',
+                     f'v{bit} out > and{bit}2 in2']
+    commands.append(f'add variable clock -10 {-5 * bits // 2}')
+    for bit in range(1, bits + 1):
+        commands += [f'clock out > and{bit}1 in2',
+                     f'clock out > and{bit}2 in1']
+    commands += ['switch clock'] + [f'switch v{bit}' for bit in range(1, bits + 1)]
+    return commands
+
+
+def ring_oscillator(stages: int) -> List[str]:
+    '''
+    Ring of NAND gate and NOT gates (odd number of inverting stages),
+    enabled by variable en. The ring is initialized with en = 0 and then
+    enabled, so it oscillates on the next runs
+    '''
+    stages += 1 - stages % 2
+    commands = ['add variable en -3 0', 'add nand g0 0 0', 'en out > g0 in1']
+    for stage in range(1, stages):
+        commands += [f'add not g{stage} {3 * stage} 0',
+                     f'g{stage - 1} out > g{stage} in']
+    commands += [f'g{stages - 1} out > g0 in2',
+                 'switch en 0', 'assert g0 out 1', 'switch en 1']
+    return commands
+
+
+def decoder_tree(bits: int) -> List[str]:
+    '''
+    Decoder of *bits* (even) address lines: 2-to-4 DECODER elements
+    for pairs of address lines, their outputs are combined with AND gates
+    level by level, so there are 2 ** bits outputs
+    '''
+    bits += bits % 2
+    commands = []
+    groups = []
+    for pair in range(bits // 2):
+        commands += [f'add variable x{2 * pair} 0 {-8 * pair}',
+                     f'add variable x{2 * pair + 1} 0 {-8 * pair - 2}',
+                     f'add decoder d{pair} 4 {-8 * pair - 1} -i 2',
+                     f'x{2 * pair} out > d{pair} in0',
+                     f'x{2 * pair + 1} out > d{pair} in1']
+        groups.append([f'd{pair} out{line}' for line in range(4)])
+
+    level = 0
+    while len(groups) > 1:
+        level += 1
+        new_groups = []
+        for first, second in zip(groups[::2], groups[1::2]):
+            group = []
+            for left in first:
+                for right in second:
+                    id_ = f'l{level}_{len(commands)}'
+                    commands += [f'add and {id_} {8 * level} {-2 * len(group)}',
+                                 f'{left} > {id_} in1', f'{right} > {id_} in2']
+                    group.append(f'{id_} out')
+            new_groups.append(group)
+        if len(groups) % 2:
+            new_groups.append(groups[-1])
+        groups = new_groups
+    return commands
+
+
+def random_dag(gates: int, inputs: int = 16, window: int = 50, seed: int = 0) -> List[str]:
+    '''
+    Random acyclic circuit of two-input gates: every gate is driven by two of
+    the previous *window* elements (inputs are variables)
+    '''
+    rng = random.Random(seed)
+    commands = [f'add variable e{num} 0 {-2 * num}' for num in range(inputs)]
+    for num in range(inputs, inputs + gates):
+        gate = rng.choice(('and', 'or', 'xor', 'nand', 'nor'))
+        commands.append(f'add {gate} e{num} {4 * (num // 32)} {-2 * (num % 32)}')
+        for label in ('in1', 'in2'):
+            source = rng.randrange(max(0, num - window), num)
+            commands.append(f'e{source} out > e{num} {label}')
+    return commands
+
+
+GENERATORS: Dict[str, Callable[[int], List[str]]] = {
+    'adder': ripple_carry_adder,
+    'register': register_file,
+    'ring': ring_oscillator,
+    'decoder': decoder_tree,
+    'dag': random_dag,
+}
@@ -1,5 +1,8 @@
 """input module"""
 from src.scheme import Scheme
+from src.profiling import format_stats
+from src.memory import format_memory_report
+from src.optimize import format_plan_report
 
 
 class InputParser:
@@ -9,13 +12,28 @@ class InputParser:
                               's': 'num_select_lines',
                               'o': 'num_output_lines',
                               'i': 'num_input_lines',
-                              'b': 'num_bits'}
+                              'b': 'num_bits',
+                              'a': 'num_address_bits',
+                              'd': 'num_data_bits',
+                              'f': 'path',
+                              'w': 'width'}
+        # options whose values are not numbers
+        self._string_kwargs = {'path'}
+        # ids of elements added without coordinates that have no connections yet,
+        # they are placed again when they get their first connection
+        self._auto_placed = set()
         self._match_scheme_commands = {'add': self._scheme.add_element,
                                        'del': self._scheme.delete_element,
                                        'switch': None,
                                        '>': self._scheme.add_connection,
                                        '!>': self._scheme.delete_connection,
                                        'clear': self._scheme.clear,
+                                       'layout': self._scheme.auto_layout,
+                                       'stats': self._scheme.stats,
+                                       'memory': self._scheme.memory_report,
+                                       'cycles': self._scheme.run_cycles,
+                                       'module': self._scheme.register_module,
+                                       'optimize': self._scheme.enable_optimization,
                                        'assert': None}
         self._match_num_main_params = {'add': 5,
                                        'del': 2,
@@ -23,8 +41,45 @@ class InputParser:
                                        '>': 5,
                                        '!>': 5,
                                        'clear': 1,
+                                       'layout': 1,
+                                       'stats': 1,
+                                       'memory': 1,
+                                       'cycles': 2,
+                                       'module': 4,
+                                       'optimize': 3,
                                        'assert': 3}
 
+    def _register_module(self, name: str, path: str, outputs: str):
+        '''
+        Build a scheme from the command file at *path* and register it as a module
+        with output ports *outputs* ("port=id.label" or "id.label" separated by commas)
+        '''
+        module_scheme = Scheme()
+        module_parser = InputParser(module_scheme)
+        with open(path, 'r', encoding='utf-8-sig') as file:
+            for line in file:
+                if line.strip():
+                    module_parser.parse_raw_input(line)
+        ports = {}
+        for output in outputs.split(','):
+            port, _, source = output.rpartition('=')
+            element_id, label = source.rsplit('.', 1)
+            ports[port or element_id] = (element_id, label)
+        self._scheme.register_module(name, module_scheme, ports)
+
+    def _place_connected(self, *element_ids):
+        '''
+        Place again elements added without coordinates when they get their
+        first connection, so they are put next to their connected neighbours
+        '''
+        unplaced = [element_id for element_id in element_ids if element_id in self._auto_placed]
+        if not unplaced:
+            return
+        for element_id in unplaced:
+            self._auto_placed.discard(element_id)
+            self._scheme.move(element_id, None)
+        self._scheme.auto_layout(incremental=True)
+
     def parse_raw_input(self, input_str):
         """
         The user have to use specific set of commands to be able
@@ -40,6 +95,10 @@ class InputParser:
             add or 1 3 4
             add constant const_1 -10 15 -v 0
             add addersubtractor addsub_down 5 7 -b 2
+        If coordinates are omitted, the element is placed automatically
+        next to the elements it is connected to (when its first connection is added):
+            add and 2
+            add decoder dec -i 3
         Next elements have optional parameters:
             constant
             -v: its value (0 or 1)
@@ -53,6 +112,22 @@ class InputParser:
             -b: number of bits
             shifter
             -b: number of bits
+            ram
+            -a: number of address bits
+            -d: number of data bits
+            -f: file with initial contents
+            rom
+            -a: number of address bits
+            -d: number of data bits
+            -f: file with contents (binary or *.hex)
+            busvariable, splitter, merger, busand, busor, busxor, busnot,
+            busaddersubtractor, busmultiplexer, multiplier, comparator, equality,
+            incrementer, counter, register, leftshifter, arithmeticshifter
+            -w: width of buses (number of bits)
+            busmultiplexer
+            -s: number of select bits
+        Bus pins carry whole words, a bus variable is set by a number:
+            switch *id(name)* *value*
         For deleting existing element user should use command as follows:
             del *id(name)*
         Examples:
@@ -70,39 +145,105 @@ class InputParser:
             switch *id_of_variable_element*
         For deleting all the existing elements and connections:
             clear
+        For placing all the elements automatically (signal goes from left to right):
+            layout
+        For profiling of the simulation (evaluations and time per element and
+        element type, sweeps, render time):
+            stats on
+            stats off
+            stats reset
+            stats
+        For memory used by elements of every type, truth tables, connections and values:
+            memory
+        For cycle-based simulation of *n* clock cycles (clocks, flip-flops, registers, counters):
+            cycles *n*
+        For defining new element type from a command file, whose variables are inputs:
+            module *name* *file* *port*=*id*.*output_label*,...
+        Example:
+            module halfadder half_adder.txt S=xor.out,C=and.out
+            add halfadder ha1 10 10
+        For simulation by lookup tables of at most *k* inputs (6 by default)
+        that replace combinational logic, with constants folded and without
+        logic that doesn't drive the observed elements (if they are listed),
+        the reduction is printed:
+            optimize
+            optimize *k*
+            optimize *k* *id1*,*id2*,...
+            optimize off
         """
 
         parts = input_str.strip().split()
 
-        if parts[0] in self._match_scheme_commands:
-            command = parts[0]
-        elif parts[2] in self._match_scheme_commands:
+        # connections are recognized first, so any element id (even 'layout'
+        # or 'memory') can be the source of a connection
+        if len(parts) > 2 and parts[2] in ('>', '!>'):
             command = parts[2]
+        elif parts[0] in self._match_scheme_commands:
+            command = parts[0]
         else:
             raise Exception('This command doesn\'t exist')
 
         num_main_params = self._match_num_main_params[command]
+        auto_position = command == 'add' and (len(parts) < 5 or parts[3].lstrip('-').isalpha())
+        if auto_position:
+            # coordinates are not given, options follow the id
+            num_main_params = 3
         kwargs = {}
         if len(parts) > num_main_params:
             args_values = parts[num_main_params:]
             for i in range(int(len(args_values) / 2)):
                 arg = args_values[2 * i].strip('-')
                 value = args_values[2 * i + 1]
-                kwargs[self._match_kwargs[arg]] = int(value)
+                name = self._match_kwargs[arg]
+                kwargs[name] = value if name in self._string_kwargs else int(value)
 
-        if command == 'add':
+        if command == 'add' and auto_position:
+            self._scheme.add_element(parts[1], parts[2], None, **kwargs)
+            # temporary place, so that the element can be shown until it is connected
+            self._scheme.auto_layout(incremental=True)
+            self._auto_placed.add(parts[2])
+        elif command == 'add':
             self._scheme.add_element(parts[1], parts[2],
                                      (int(parts[3]), int(parts[4])), **kwargs)
         elif command == 'del':
             self._scheme.delete_element(parts[1])
+            self._auto_placed.discard(parts[1])
         elif command == 'switch':
             self._scheme[parts[1]].switch(int(parts[2]) if len(parts) > 2 else None)
         elif command == '>':
             self._scheme.add_connection(parts[0], parts[1], parts[3], parts[4])
+            self._place_connected(parts[0], parts[3])
         elif command == '!>':
             self._scheme.delete_connection(parts[0], parts[1], parts[3], parts[4])
         elif command == 'clear':
             self._scheme.clear()
+            self._auto_placed.clear()
+        elif command == 'layout':
+            self._scheme.auto_layout()
+            self._auto_placed.clear()
+        elif command == 'stats':
+            if len(parts) > 1 and parts[1] in ('on', 'off'):
+                self._scheme.enable_profiling(parts[1] == 'on')
+            elif len(parts) > 1 and parts[1] == 'reset':
+                if self._scheme.profiler is not None:
+                    self._scheme.profiler.reset()
+            elif len(parts) > 1:
+                raise Exception(f'Unknown stats option <{parts[1]}>')
+            else:
+                return format_stats(self._scheme.stats())
+        elif command == 'memory':
+            return format_memory_report(self._scheme.memory_report())
+        elif command == 'module':
+            self._register_module(parts[1], parts[2], parts[3])
+        elif command == 'cycles':
+            self._scheme.run_cycles(int(parts[1]) if len(parts) > 1 else 1)
+        elif command == 'optimize':
+            if len(parts) > 1 and parts[1] == 'off':
+                self._scheme.enable_optimization(None)
+            else:
+                observed = parts[2].split(',') if len(parts) > 2 else None
+                self._scheme.enable_optimization(int(parts[1]) if len(parts) > 1 else 6, observed)
+                return format_plan_report(self._scheme.simulation_plan().report())
         elif command == 'assert':
             if parts[3] == "U":
                 parts[3] = None
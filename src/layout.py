@@ -0,0 +1,200 @@
+'''
+layout.py
+
+Automatic placement of scheme elements: layered (Sugiyama-style) layout
+with signal flowing from left to right.
+
+1. Feedback connections (e.g. in latches) are found with depth-first search
+   and ignored, so the remaining graph is acyclic.
+2. Every element is put into a layer (column) one further than the furthest
+   element that drives it (longest path from the inputs).
+3. Elements inside every layer are ordered by barycenters of connected
+   elements in the neighbouring layers (a few down and up sweeps),
+   which reduces wire crossings.
+4. Columns are stacked from the top, every element gets vertical space
+   for its pins.
+
+Barycenters and coordinates are computed with NumPy per layer.
+'''
+
+import math
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def element_height(element) -> int:
+    '''Vertical space (in cells) that element needs for its pins'''
+    return max(2, math.ceil(0.6 * max(len(element.ins), len(element.outs))) + 1)
+
+
+def scheme_graph(scheme) -> Tuple[List[Hashable], np.ndarray]:
+    '''
+    Return element ids and array of edges (source index, destination index)
+    for every connection of the scheme
+    '''
+    ids = [element.id for element in scheme]
+    number = {id_: num for num, id_ in enumerate(ids)}
+    edges = [(number[connection.source.id], number[element.id])
+             for element in scheme
+             for connection in element.ins.values() if connection is not None]
+    return ids, np.array(edges, dtype=np.int64).reshape(-1, 2)
+
+
+def _adjacency(num_nodes: int, edges: np.ndarray) -> List[List[int]]:
+    successors = [[] for _ in range(num_nodes)]
+    for source, destination in edges.tolist():
+        successors[source].append(destination)
+    return successors
+
+
+def acyclic_edges(num_nodes: int, edges: np.ndarray) -> np.ndarray:
+    '''Return edges without feedback edges (edges to nodes on the current DFS path)'''
+    successors = _adjacency(num_nodes, edges)
+    state = [0] * num_nodes     # 0 - not visited, 1 - on DFS path, 2 - done
+    feedback = set()
+    for root in range(num_nodes):
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, iter(successors[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if state[child] == 0:
+                    state[child] = 1
+                    stack.append((child, iter(successors[child])))
+                    break
+                if state[child] == 1:
+                    feedback.add((node, child))
+            else:
+                state[node] = 2
+                stack.pop()
+    if not feedback:
+        return edges
+    keep = [(source, destination) not in feedback for source, destination in edges.tolist()]
+    return edges[np.array(keep, dtype=bool)]
+
+
+def assign_layers(num_nodes: int, edges: np.ndarray) -> np.ndarray:
+    '''
+    Return layer of every node: length of the longest path to it from a node
+    without incoming edges. *edges* must be acyclic
+    '''
+    successors = _adjacency(num_nodes, edges)
+    in_degree = np.bincount(edges[:, 1], minlength=num_nodes).tolist()
+    layers = [0] * num_nodes
+    queue = [node for node in range(num_nodes) if in_degree[node] == 0]
+    for node in queue:
+        for child in successors[node]:
+            layers[child] = max(layers[child], layers[node] + 1)
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                queue.append(child)
+    return np.array(layers, dtype=np.int64)
+
+
+def _order_layers(layers: np.ndarray, edges: np.ndarray, heights: np.ndarray,
+                  sweeps: int) -> np.ndarray:
+    '''Return vertical offset (from the top of the column) of every node'''
+    num_layers = int(layers.max()) + 1 if len(layers) else 0
+    members = [np.flatnonzero(layers == layer) for layer in range(num_layers)]
+    offsets = np.zeros(len(layers), dtype=np.float64)
+
+    def stack(nodes):
+        # nodes are in the final order, heights are accumulated from the top
+        offsets[nodes] = np.cumsum(heights[nodes]) - heights[nodes] / 2
+
+    for nodes in members:
+        stack(nodes)
+
+    # edges grouped by layer of destination (down sweep) and of source (up sweep)
+    down = [edges[layers[edges[:, 1]] == layer] for layer in range(num_layers)]
+    up = [edges[layers[edges[:, 0]] == layer] for layer in range(num_layers)]
+    local = np.zeros(len(layers), dtype=np.int64)
+    for nodes in members:
+        local[nodes] = np.arange(len(nodes))
+
+    def reorder(layer, layer_edges, own, other):
+        nodes = members[layer]
+        if len(nodes) < 2 or not len(layer_edges):
+            return
+        weights = np.bincount(local[layer_edges[:, own]], weights=offsets[layer_edges[:, other]],
+                              minlength=len(nodes))
+        counts = np.bincount(local[layer_edges[:, own]], minlength=len(nodes))
+        # nodes without connections to the other layer keep their place
+        barycenters = np.where(counts > 0, weights / np.maximum(counts, 1), offsets[nodes])
+        nodes = nodes[np.argsort(barycenters, kind='stable')]
+        members[layer] = nodes
+        local[nodes] = np.arange(len(nodes))
+        stack(nodes)
+
+    for _ in range(sweeps):
+        for layer in range(1, num_layers):
+            reorder(layer, down[layer], 1, 0)
+        for layer in range(num_layers - 2, -1, -1):
+            reorder(layer, up[layer], 0, 1)
+    return offsets
+
+
+def layered_layout(scheme, layer_spacing: int = 6, row_gap: int = 1,
+                   sweeps: int = 4) -> Dict[Hashable, Tuple[int, int]]:
+    '''
+    Return new positions of all scheme elements: columns of elements
+    *layer_spacing* cells apart, signal goes from left to right
+    '''
+    ids, edges = scheme_graph(scheme)
+    if not ids:
+        return {}
+    edges = acyclic_edges(len(ids), edges)
+    layers = assign_layers(len(ids), edges)
+    heights = np.array([element_height(scheme[id_]) + row_gap for id_ in ids], dtype=np.float64)
+    offsets = _order_layers(layers, edges, heights, sweeps)
+
+    xs = layers * layer_spacing
+    ys = -np.rint(offsets).astype(np.int64)
+    return {id_: (int(x), int(y)) for id_, x, y in zip(ids, xs.tolist(), ys.tolist())}
+
+
+def _is_free(scheme, x: int, y: int, half_width: float, half_height: float) -> bool:
+    return not scheme.elements_in((x - half_width, y - half_height,
+                                   x + half_width, y + half_height))
+
+
+def place_new_elements(scheme, new_ids: Sequence[Hashable], layer_spacing: int = 6,
+                       row_gap: int = 1) -> Dict[Hashable, Tuple[int, int]]:
+    '''
+    Place elements *new_ids* (elements without position) without moving
+    other elements and return their new positions. Element is put into the
+    column of its layer, as close as possible to the average height of
+    already placed connected elements
+    '''
+    ids, edges = scheme_graph(scheme)
+    number = {id_: num for num, id_ in enumerate(ids)}
+    layers = assign_layers(len(ids), acyclic_edges(len(ids), edges))
+    neighbours = [[] for _ in ids]
+    for source, destination in edges.tolist():
+        neighbours[source].append(destination)
+        neighbours[destination].append(source)
+
+    positions = {}
+    new_ids = set(new_ids)
+    for id_ in ids:
+        if id_ not in new_ids:
+            continue
+        node = number[id_]
+        x = int(layers[node]) * layer_spacing
+        placed_ys = [scheme[ids[other]].position[1] for other in neighbours[node]
+                     if ids[other] not in new_ids or ids[other] in positions]
+        target = round(sum(placed_ys) / len(placed_ys)) if placed_ys else 0
+        # positions are centers of elements, so neighbours' halves are accounted roughly
+        half_height = element_height(scheme[id_]) + row_gap
+
+        # look for the nearest free place: target, target - 1, target + 1, ...
+        for shift in range(len(ids) * 4 + 1):
+            y = target - (shift + 1) // 2 if shift % 2 else target + shift // 2
+            if _is_free(scheme, x, y, layer_spacing / 2 - 0.5, half_height):
+                break
+        positions[id_] = (x, y)
+        scheme.move(id_, (x, y))
+    return positions
@@ -0,0 +1,190 @@
+'''
+memory.py
+
+Memory accounting of schemes: bytes used by elements of every type,
+their truth tables (shared and private), connections, output values and
+private copies of modules with state.
+Sizes are computed by traversal of objects with sys.getsizeof, every
+object is counted once.
+'''
+
+import sys
+import types
+from typing import Dict, Optional, Set
+
+from src.elements import BasicElement, Connection
+from src.modules import ModuleInstance
+from src.profiling import _TimedTruthTable
+from src.truth_tables import TruthTable
+
+# objects of these types are shared by the whole program and are not counted
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                  types.MethodType, types.CodeType)
+
+
+def deep_sizeof(obj, seen: Set[int], root: Optional[object] = None) -> int:
+    '''
+    Return size of *obj* and all objects reachable from it that are not in
+    *seen* (ids of counted objects, updated). Traversal stops at elements
+    other than *root*, so connections don't count elements they connect
+    '''
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SKIPPED_TYPES):
+            continue
+        if isinstance(current, BasicElement) and current is not root:
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        if hasattr(current, '__dict__'):
+            stack.append(vars(current))
+        for slot in getattr(type(current), '__slots__', ()):
+            if hasattr(current, slot):
+                stack.append(getattr(current, slot))
+    return size
+
+
+def _truth_table(element) -> Optional[TruthTable]:
+    truth_table = vars(element).get('_truth_table')
+    if isinstance(truth_table, _TimedTruthTable):
+        truth_table = truth_table.wrapped
+    return truth_table
+
+
+def _private_scheme_sizeof(element, seen: Set[int]) -> int:
+    '''
+    Return size of the module scheme copied for a ModuleInstance of a module
+    with state (with modules nested in it), 0 for other elements
+    '''
+    if not isinstance(element, ModuleInstance) or element.private_scheme is None:
+        return 0
+    # the copied Scheme object itself is reachable from the instance, its elements are not
+    size = 0
+    for inner in element.private_scheme:
+        size += deep_sizeof(inner, seen, root=inner) + _private_scheme_sizeof(inner, seen)
+    return size
+
+
+def memory_report(scheme) -> Dict:
+    '''
+    Return bytes used by the scheme: total, by element type (element objects,
+    private truth tables, input connections, output values and private module
+    copies of elements of that type), truth tables (shared by several elements
+    and private), connections, values, module copies and spatial index of the scheme
+    '''
+    elements = list(scheme)
+    # id of truth table -> [truth table, types of elements, number of elements]
+    references = {}
+    for element in elements:
+        truth_table = _truth_table(element)
+        if truth_table is not None:
+            record = references.setdefault(id(truth_table), [truth_table, set(), 0])
+            record[1].add(element.element_type)
+            record[2] += 1
+
+    seen: Set[int] = set()
+    shared = {'count': 0, 'references': 0, 'bytes': 0, 'types': set()}
+    private = {'count': 0, 'bytes': 0}
+    # shared tables are counted first, so they are not attributed to any element type
+    for truth_table, element_types, count in references.values():
+        if count > 1:
+            shared['count'] += 1
+            shared['references'] += count
+            shared['bytes'] += deep_sizeof(truth_table, seen)
+            shared['types'] |= element_types
+    shared['types'] = sorted(shared['types'])
+
+    by_type = {}
+    connections = {'count': 0, 'bytes': 0}
+    values = {'bytes': 0}
+    for element in elements:
+        record = by_type.setdefault(element.element_type, {
+            'count': 0, 'objects': 0, 'truth_tables': 0, 'connections': 0,
+            'values': 0, 'modules': 0, 'total': 0})
+        record['count'] += 1
+
+        truth_table = _truth_table(element)
+        if truth_table is not None and id(truth_table) not in seen:
+            table_bytes = deep_sizeof(truth_table, seen)
+            record['truth_tables'] += table_bytes
+            private['count'] += 1
+            private['bytes'] += table_bytes
+
+        # connection is counted for its destination (it is also in outputs of its source)
+        for connection in element.ins.values():
+            if isinstance(connection, Connection) and id(connection) not in seen:
+                connection_bytes = deep_sizeof(connection, seen)
+                record['connections'] += connection_bytes
+                connections['count'] += 1
+                connections['bytes'] += connection_bytes
+
+        value_bytes = deep_sizeof(element.value, seen)
+        record['values'] += value_bytes
+        values['bytes'] += value_bytes
+
+    # the rest of element objects (attributes, inputs and outputs dictionaries)
+    for element in elements:
+        by_type[element.element_type]['objects'] += deep_sizeof(element, seen, root=element)
+    # schemes copied by instances of modules with state (traversal stops at their elements)
+    modules = {'count': 0, 'bytes': 0}
+    for element in elements:
+        module_bytes = _private_scheme_sizeof(element, seen)
+        if module_bytes:
+            by_type[element.element_type]['modules'] += module_bytes
+            modules['count'] += 1
+            modules['bytes'] += module_bytes
+    for record in by_type.values():
+        record['total'] = (record['objects'] + record['truth_tables'] +
+                           record['connections'] + record['values'] + record['modules'])
+
+    index_bytes = deep_sizeof(scheme.spatial_index, seen)
+    total = sum(record['total'] for record in by_type.values()) + shared['bytes'] + index_bytes
+    return {'total': total,
+            'num_elements': len(elements),
+            'types': by_type,
+            'truth_tables': {'shared': shared, 'private': private},
+            'connections': connections,
+            'values': values,
+            'modules': modules,
+            'index': index_bytes}
+
+
+def _format_bytes(size: float) -> str:
+    if size < 1024:
+        return f'{size:.0f} B'
+    if size < 1024 ** 2:
+        return f'{size / 1024:.1f} KiB'
+    return f'{size / 1024 ** 2:.1f} MiB'
+
+
+def format_memory_report(report: Dict) -> str:
+    '''Return human readable text of memory_report, largest element types first'''
+    lines = [f"Total: {_format_bytes(report['total'])} "
+             f"({report['num_elements']} elements)"]
+    for element_type, record in sorted(report['types'].items(),
+                                       key=lambda item: -item[1]['total']):
+        lines.append(f"  {element_type} x{record['count']}: {_format_bytes(record['total'])} "
+                     f"(objects {_format_bytes(record['objects'])}, "
+                     f"truth tables {_format_bytes(record['truth_tables'])}, "
+                     f"connections {_format_bytes(record['connections'])}, "
+                     f"values {_format_bytes(record['values'])})")
+    shared, private = report['truth_tables']['shared'], report['truth_tables']['private']
+    lines.append(f"Truth tables: {private['count']} private "
+                 f"{_format_bytes(private['bytes'])}, {shared['count']} shared by "
+                 f"{shared['references']} elements {_format_bytes(shared['bytes'])}")
+    lines.append(f"Connections: {report['connections']['count']} "
+                 f"{_format_bytes(report['connections']['bytes'])}, "
+                 f"values: {_format_bytes(report['values']['bytes'])}, "
+                 f"spatial index: {_format_bytes(report['index'])}")
+    if report['modules']['count']:
+        lines.append(f"Private module copies: {report['modules']['count']} "
+                     f"{_format_bytes(report['modules']['bytes'])}")
+    return '\n'.join(lines) + '\n'
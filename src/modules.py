@@ -0,0 +1,181 @@
+'''
+modules.py
+
+Implements hierarchical modules: a scheme with input and output ports
+registered as a new element type (see Scheme.register_module).
+Combinational modules are compiled once and all their instances share the
+compiled form: a TruthTable if the module has few single-bit inputs,
+otherwise an evaluator of inner elements in topological order with a cache
+of results. Modules with state get a private copy for every instance.
+'''
+
+import copy
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+from src import elements
+from src.cycles import strongly_connected_components
+from src.truth_tables import TruthTable
+
+
+class ModuleEvaluator:
+    '''
+    Evaluates inner elements of a module scheme in topological order for
+    values of input ports and returns values of output ports. Loops are
+    evaluated until their values are stable. Results are cached if *cache_size*
+    is given (only for modules without state)
+    '''
+
+    def __init__(self, scheme, inputs: Sequence[Hashable],
+                 outputs: Sequence[Tuple[Hashable, str]], cache_size: Optional[int] = None):
+        self.scheme = scheme
+        self._inputs = [scheme[element_id] for element_id in inputs]
+        self._outputs = [(scheme[element_id], label) for element_id, label in outputs]
+        ports = set(self._inputs)
+        inner = [element for element in scheme if element not in ports]
+        successors = {element: [] for element in inner}
+        for element in inner:
+            for connection in element.ins.values():
+                if connection is not None and connection.source in successors:
+                    successors[connection.source].append(element)
+        self._groups = strongly_connected_components(inner, successors)
+        self._memories = [element for element in inner if isinstance(element, elements.Ram)]
+        self.has_loops = any(len(group) > 1 or group[0] in successors[group[0]]
+                             for group in self._groups)
+        self._cache = {} if cache_size is not None else None
+        self._cache_size = cache_size
+
+    def _evaluate(self, values: tuple) -> tuple:
+        for element, value in zip(self._inputs, values):
+            element.value = {'out': value}
+        for group in self._groups:
+            if len(group) == 1:
+                group[0].calc_value()
+                continue
+            for _ in range(2 * len(group) + 2):
+                changed = False
+                for element in group:
+                    value = element.value
+                    if element.calc_value() != value:
+                        changed = True
+                if not changed:
+                    break
+            else:
+                # the loop oscillates, its outputs are unknown
+                for element in group:
+                    element.value = {label: None for label in element.value}
+        for memory in self._memories:
+            memory.commit()
+        return tuple(element.value[label] for element, label in self._outputs)
+
+    def __call__(self, values: tuple) -> tuple:
+        if self._cache is None:
+            return self._evaluate(values)
+        result = self._cache.get(values)
+        if result is None:
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            result = self._cache[values] = self._evaluate(values)
+        return result
+
+
+class ModuleDefinition:
+    '''
+    Reusable block defined by a scheme. Its Variable and BusVariable elements
+    are input ports named by their ids, *outputs* map names of output ports
+    to (element id, output label) of inner elements. The scheme must not be
+    edited after it is registered.
+
+    Methods
+    -------
+    evaluator()
+        Return evaluator of the module shared by its instances (None for modules with state)
+    truth_table()
+        Return truth table of the module shared by its instances or None if the
+        module is not compiled to a truth table
+    copy_evaluator()
+        Return evaluator of a private copy of the module (for modules with state)
+    '''
+    # modules with more single-bit inputs are compiled to cached evaluators
+    MAX_TABLE_INPUTS = 12
+    CACHE_SIZE = 4096
+
+    def __init__(self, name: str, scheme, outputs: Dict[str, Tuple[Hashable, str]]):
+        self.name = name
+        self.scheme = scheme
+        self.inputs = [element.id for element in scheme
+                       if isinstance(element, (elements.Variable, elements.BusVariable))]
+        for element_id, label in outputs.values():
+            if label not in scheme[element_id].outs:
+                raise KeyError(f'There\'s no <{label}> output of <{element_id}>')
+        self.outputs = dict(outputs)
+        self.widths = {port: scheme[port].pin_width('out') for port in self.inputs}
+        self.widths.update({port: scheme[element_id].pin_width(label)
+                            for port, (element_id, label) in self.outputs.items()})
+        shared = ModuleEvaluator(scheme, self.inputs, list(self.outputs.values()), self.CACHE_SIZE)
+        self.stateful = shared.has_loops or any(
+            isinstance(element, elements.STATEFUL_TYPES) for element in scheme)
+        self._evaluator = None if self.stateful else shared
+        self._truth_table = None
+
+    def evaluator(self) -> Optional[ModuleEvaluator]:
+        return self._evaluator
+
+    def truth_table(self) -> Optional[TruthTable]:
+        if self.stateful or len(self.inputs) > self.MAX_TABLE_INPUTS or \
+                any(self.widths[port] != 1 for port in self.inputs):
+            return None
+        if self._truth_table is None:
+            self._truth_table = TruthTable(self.inputs, list(self.outputs),
+                                           lambda args: list(self._evaluator(tuple(args))))
+        return self._truth_table
+
+    def copy_evaluator(self) -> ModuleEvaluator:
+        scheme = copy.deepcopy(self.scheme)
+        return ModuleEvaluator(scheme, self.inputs, list(self.outputs.values()))
+
+
+class ModuleInstance(elements.BasicElement):
+    """A class for instance of a module (see ModuleDefinition).
+    The interface of the element is the following:
+    - input:
+        input ports of the module
+    - output:
+        output ports of the module
+    """
+
+    def __init__(self, id_, position=None, definition: ModuleDefinition = None):
+        super().__init__(id_, position)
+        self._definition = definition
+        for port in definition.inputs:
+            self._ins[port] = None
+        for port in definition.outputs:
+            self._outs[port] = []
+        widths = {port: width for port, width in definition.widths.items() if width != 1}
+        if widths:
+            self._widths = widths
+        self._element_type = definition.name.upper()
+        if definition.stateful:
+            self._evaluator = definition.copy_evaluator()
+        else:
+            self._evaluator = definition.evaluator()
+        self._truth_table = definition.truth_table()
+        self._init_value()
+
+    @property
+    def definition(self):
+        return self._definition
+
+    @property
+    def private_scheme(self):
+        '''Copy of the module scheme owned by this instance (None if the module has no state)'''
+        return self._evaluator.scheme if self._definition.stateful else None
+
+    def calc_value(self, update=True):
+        if self._truth_table is not None:
+            value = self._truth_table.predict_value(self._get_input_values())
+        else:
+            outputs = self._evaluator(tuple(self._read_input_value(port) for port in self._ins))
+            value = dict(zip(self._outs, outputs))
+        if update:
+            self.value = value
+        return value
@@ -0,0 +1,290 @@
+'''
+optimize.py
+
+Optimization passes that build a reduced simulation plan of a scheme
+(see Scheme.enable_optimization). The plan is used by Scheme.run instead
+of the list of all elements until the scheme is edited.
+
+Constant propagation: constants are folded through elements whose outputs
+don't depend on their other inputs (e.g. AND gate with a constant 0 input),
+values of such elements are computed once, when the plan is built.
+
+Dead-logic elimination: if the observed elements are given, elements with
+no path to any of them (and to any element with state) are not simulated.
+
+k-LUT collapsing: fan-out-free cones of combinational single-bit elements
+(gates, multiplexers, decoders, adders...) with at most k distinct inputs
+are collapsed into LookupTable nodes, so a cone costs one table lookup
+instead of an evaluation of every element. Elements of the cones are kept
+in the scheme: they are evaluated only while the oscillation period is
+looked for, so their values can still be displayed and probed.
+'''
+
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+from src import elements
+from src.cycles import strongly_connected_components
+from src.modules import ModuleInstance
+from src.truth_tables import TruthTable
+
+# elements whose outputs are functions of their single-bit inputs
+_COMBINATIONAL_TYPES = (elements.BasicLogicGate, elements.NotGate, elements.Multiplexer,
+                        elements.Encoder, elements.Decoder, elements.FullAdder,
+                        elements.AdderSubtractor, elements.RightShifter)
+
+
+def _not_function(inputs: Dict[str, Optional[bool]]) -> Dict[str, Optional[bool]]:
+    value = inputs['in']
+    return {'out': None if value is None else not value}
+
+
+def _element_function(element):
+    '''Return function of combinational element: input values -> output values'''
+    if isinstance(element, elements.NotGate):
+        return _not_function
+    return element._truth_table.predict_value
+
+
+class LookupTable:
+    '''
+    Simulation node of a collapsed cone: outputs of the root element of the
+    cone for values of its leaves ((element, output label) outside the cone).
+    Known leaves select a row of the table. If some leaves are unknown, the
+    elements of the cone are evaluated one by one, so unknown values spread
+    exactly as they do through the original elements
+    '''
+
+    def __init__(self, root, members: List, leaves: List[Tuple[object, str]]):
+        self.root = root
+        self.id = root.id
+        self.members = members
+        self.leaves = leaves
+        leaf_numbers = {leaf: number for number, leaf in enumerate(leaves)}
+        # (element, function, [(input label, leaf number or (member, output label))])
+        self._steps = []
+        for member in members:
+            sources = []
+            for label, connection in member.ins.items():
+                leaf = (connection.source, connection.output_label)
+                sources.append((label, leaf_numbers[leaf] if leaf in leaf_numbers else leaf))
+            self._steps.append((member, _element_function(member), sources))
+        self._table = [self._evaluate(values)
+                       for values in itertools.product([False, True], repeat=len(leaves))]
+
+    def _evaluate(self, values) -> dict:
+        outputs = {}
+        for member, function, sources in self._steps:
+            inputs = {label: values[source] if isinstance(source, int)
+                      else outputs[source[0]][source[1]] for label, source in sources}
+            outputs[member] = function(inputs)
+        return outputs[self.root]
+
+    def calc_value(self, update=True):
+        values = [element.value[label] for element, label in self.leaves]
+        if any(value is None for value in values):
+            value = self._evaluate(values)
+        else:
+            index = 0
+            for leaf_value in values:
+                index = 2 * index + bool(leaf_value)
+            value = self._table[index]
+        if update:
+            self.root.value = value
+        return value
+
+
+class SimulationPlan:
+    '''
+    Reduced list of simulation nodes of a scheme: values of *constants* (elements
+    -> values in topological order) are set once per run of Scheme.run, *nodes*
+    are evaluated on every sweep, *probes* (elements replaced by nodes) are
+    evaluated only while the oscillation period is looked for and *dead*
+    elements are not evaluated at all (Scheme.run sets them unknown)
+
+    Methods
+    -------
+    report()
+        Return statistics of the plan
+    '''
+
+    def __init__(self, constants: Dict, nodes: List, probes: List, dead: List, report: Dict):
+        self.constants = constants
+        self.nodes = nodes
+        self.probes = probes
+        self.dead = dead
+        self._report = report
+
+    def report(self) -> Dict:
+        return dict(self._report)
+
+
+def _topological_order(scheme) -> Tuple[List, set]:
+    '''Return elements in topological order and the set of elements in loops'''
+    element_list = list(scheme)
+    successors = {element: [] for element in element_list}
+    for element in element_list:
+        for connection in element.ins.values():
+            if connection is not None:
+                successors[connection.source].append(element)
+    order, in_loops = [], set()
+    for group in strongly_connected_components(element_list, successors):
+        order.extend(group)
+        if len(group) > 1 or group[0] in successors[group[0]]:
+            in_loops.update(group)
+    return order, in_loops
+
+
+def _has_state(element) -> bool:
+    if isinstance(element, ModuleInstance):
+        return element.definition.stateful
+    return isinstance(element, elements.STATEFUL_TYPES)
+
+
+def fold_constants(order: List, in_loops: set) -> Dict:
+    '''
+    Return values of elements (in topological order) whose outputs are constant:
+    Constant elements and elements without state whose connected inputs are
+    constant or whose outputs don't depend on the other inputs. Values of
+    elements are not changed: folded values are set only while they are computed
+    '''
+    folded = {}
+    saved = {}
+    try:
+        for element in order:
+            if isinstance(element, elements.Constant):
+                value = element.calc_value(update=False)
+            elif not element.ins or element in in_loops or _has_state(element):
+                continue
+            else:
+                sources = {label: connection.source for label, connection in element.ins.items()
+                           if connection is not None}
+                if all(source in folded for source in sources.values()):
+                    # unconnected inputs are always unknown
+                    value = element.calc_value(update=False)
+                elif isinstance(element, _COMBINATIONAL_TYPES) and \
+                        any(source in folded for source in sources.values()):
+                    inputs = {label: None for label in element.ins}
+                    for label, source in sources.items():
+                        if source in folded:
+                            inputs[label] = folded[source][element.ins[label].output_label]
+                    value = _element_function(element)(inputs)
+                    if any(output is None for output in value.values()):
+                        continue
+                else:
+                    continue
+            folded[element] = value
+            # elements driven by this one read its folded value
+            saved[element] = element.value
+            element.value = value
+    finally:
+        for element, value in saved.items():
+            element.value = value
+    return folded
+
+
+def live_elements(order: List, in_loops: set, observed) -> set:
+    '''
+    Return elements that have a path to any of *observed* elements or to any
+    element with state (flip-flops, registers, memory, loops)
+    '''
+    live = set()
+    stack = [element for element in order
+             if element.id in observed or element in in_loops or _has_state(element)]
+    while stack:
+        element = stack.pop()
+        if element in live:
+            continue
+        live.add(element)
+        stack.extend(connection.source for connection in element.ins.values()
+                     if connection is not None)
+    return live
+
+
+def build_plan(scheme, k: int = 6, observed=None) -> SimulationPlan:
+    '''
+    Build simulation plan where constants are folded, elements without path to
+    *observed* element ids are dead (if *observed* is given) and fan-out-free
+    cones of combinational elements with at most *k* leaves are collapsed into
+    LookupTable nodes
+    '''
+    if not 2 <= k <= TruthTable.MAX_NUM_ARGS:
+        raise ValueError(f"Number of LUT inputs must be in [2, {TruthTable.MAX_NUM_ARGS}]")
+    order, in_loops = _topological_order(scheme)
+    constants = fold_constants(order, in_loops)
+    live = set(order) if observed is None else live_elements(order, in_loops, set(observed))
+    simulated = live.difference(constants)
+
+    def collapsible(element) -> bool:
+        return (element in simulated and isinstance(element, _COMBINATIONAL_TYPES)
+                and element not in in_loops
+                and all(connection is not None for connection in element.ins.values()))
+
+    def consumers(element) -> List:
+        return [connection.destination for connections in element.outs.values()
+                for connection in connections]
+
+    absorbed = set()
+    cones = {}
+    for root in reversed(order):
+        if root in absorbed or not collapsible(root):
+            continue
+        members = [root]
+        leaves = list(dict.fromkeys((connection.source, connection.output_label)
+                                    for connection in root.ins.values()))
+        grown = True
+        while grown:
+            grown = False
+            for leaf in leaves:
+                source = leaf[0]
+                if source in absorbed or not collapsible(source) or \
+                        len(consumers(source)) != 1 or consumers(source)[0] not in members:
+                    continue
+                new_leaves = list(dict.fromkeys(
+                    [other for other in leaves if other != leaf] +
+                    [(connection.source, connection.output_label)
+                     for connection in source.ins.values()]))
+                if len(new_leaves) <= k:
+                    members.append(source)
+                    absorbed.add(source)
+                    leaves = new_leaves
+                    grown = True
+                    break
+        if len(members) > 1:
+            cones[root] = (members, leaves)
+
+    position = {element: number for number, element in enumerate(order)}
+    nodes, probes = [], []
+    for element in scheme:
+        if element in absorbed or element not in simulated:
+            continue
+        if element in cones:
+            members, leaves = cones[element]
+            members = sorted(members, key=position.get)
+            nodes.append(LookupTable(element, members, leaves))
+            probes.extend(member for member in members if member is not element)
+        else:
+            nodes.append(element)
+    probes.sort(key=position.get)
+
+    dead = [element for element in order if element not in live and element not in constants]
+    num_elements = len(order)
+    report = {'k': k,
+              'elements': num_elements,
+              'constants': len(constants),
+              'dead': len(dead),
+              'nodes': len(nodes),
+              'luts': len(cones),
+              'collapsed': len(absorbed) + len(cones),
+              'largest_lut': max((len(leaves) for _, leaves in cones.values()), default=0),
+              'reduction': 1 - len(nodes) / num_elements if num_elements else 0.0}
+    return SimulationPlan(constants, nodes, probes, dead, report)
+
+
+def format_plan_report(report: Dict) -> str:
+    '''Return human readable text of SimulationPlan.report()'''
+    return (f"Elements: {report['elements']}, simulated nodes: {report['nodes']} "
+            f"({report['reduction']:.0%} fewer)\n"
+            f"Constant elements: {report['constants']}, dead elements: {report['dead']}\n"
+            f"LUTs ({report['k']} inputs at most): {report['luts']} replacing "
+            f"{report['collapsed']} elements, largest: {report['largest_lut']} inputs\n")
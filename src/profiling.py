@@ -0,0 +1,185 @@
+'''
+profiling.py
+
+Implements SchemeProfiler: opt-in instrumentation of scheme simulation
+and rendering
+'''
+
+import threading
+import time
+from typing import Dict, Hashable, Optional
+
+
+class _TimedTruthTable:
+    '''Proxy of element's truth table that measures predict_value calls'''
+
+    def __init__(self, truth_table, profiler: 'SchemeProfiler'):
+        self.wrapped = truth_table
+        self._profiler = profiler
+
+    def predict_value(self, incomplete_args):
+        start = time.perf_counter()
+        value = self.wrapped.predict_value(incomplete_args)
+        self._profiler.truth_table_calls += 1
+        self._profiler.truth_table_time += time.perf_counter() - start
+        return value
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+
+class SchemeProfiler:
+    '''
+    Collects statistics of scheme runs while profiling is enabled
+    (see Scheme.enable_profiling): number of runs and sweeps over all elements,
+    oscillation period of the last run, number and cumulative time of
+    calc_value calls per element and per element type, time spent in
+    TruthTable.predict_value and render timings.
+
+    Render timings are recorded from the render thread (see RenderWorker),
+    so they are guarded by a lock.
+
+    Elements are instrumented by attach: their calc_value and truth table
+    are replaced with measuring wrappers on the instance, detach restores
+    them. Not instrumented elements are evaluated as usual, so disabled
+    profiling costs nothing.
+
+    Methods
+    -------
+    attach(element)
+        Measure evaluations of the element
+    detach(element=None)
+        Restore original methods and truth tables of the element
+        (of all attached elements by default)
+    record_run(sweeps, period, seconds)
+        Record finished Scheme.run
+    record_render(seconds)
+        Record rendered frame
+    reset()
+        Forget collected statistics
+    stats()
+        Return collected statistics as a dictionary
+    '''
+
+    def __init__(self):
+        self._elements = {}
+        # element id -> [element type, evaluations, cumulative time],
+        # records are updated by wrappers of attached elements
+        self._evaluations: Dict[Hashable, list] = {}
+        self._render_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.runs = 0
+        self.sweeps = 0
+        self.last_sweeps = 0
+        self.last_period = None
+        self.run_time = 0.0
+        self.truth_table_calls = 0
+        self.truth_table_time = 0.0
+        with self._render_lock:
+            self.renders = 0
+            self.render_time = 0.0
+            self.last_render_time = 0.0
+        # wrappers keep references to the records, so they are cleared in place
+        self._evaluations = {element_id: record for element_id, record
+                             in self._evaluations.items() if element_id in self._elements}
+        for record in self._evaluations.values():
+            record[1:] = [0, 0.0]
+
+    def attach(self, element):
+        if 'calc_value' in vars(element):
+            return
+        calc_value = element.calc_value
+        record = [element.element_type, 0, 0.0]
+
+        def timed_calc_value(update=True):
+            start = time.perf_counter()
+            value = calc_value(update)
+            record[1] += 1
+            record[2] += time.perf_counter() - start
+            return value
+
+        # instance attributes shadow the methods of element class
+        element.calc_value = timed_calc_value
+        truth_table = getattr(element, '_truth_table', None)
+        if truth_table is not None:
+            element._truth_table = _TimedTruthTable(truth_table, self)
+        self._elements[element.id] = element
+        self._evaluations[element.id] = record
+
+    def detach(self, element=None):
+        elements = list(self._elements.values()) if element is None else [element]
+        for element in elements:
+            vars(element).pop('calc_value', None)
+            truth_table = getattr(element, '_truth_table', None)
+            if isinstance(truth_table, _TimedTruthTable):
+                element._truth_table = truth_table.wrapped
+            self._elements.pop(element.id, None)
+
+    def record_run(self, sweeps: int, period: int, seconds: float):
+        self.runs += 1
+        self.sweeps += sweeps
+        self.last_sweeps = sweeps
+        self.last_period = period
+        self.run_time += seconds
+
+    def record_render(self, seconds: float):
+        with self._render_lock:
+            self.renders += 1
+            self.render_time += seconds
+            self.last_render_time = seconds
+
+    def stats(self) -> dict:
+        by_type = {}
+        for element_type, evaluations, seconds in self._evaluations.values():
+            record = by_type.setdefault(element_type, {'evaluations': 0, 'time': 0.0})
+            record['evaluations'] += evaluations
+            record['time'] += seconds
+        with self._render_lock:
+            render = {'frames': self.renders, 'time': self.render_time,
+                      'last_time': self.last_render_time}
+        return {'runs': self.runs,
+                'sweeps': self.sweeps,
+                'last_sweeps': self.last_sweeps,
+                'last_period': self.last_period,
+                'run_time': self.run_time,
+                'evaluations': sum(record[1] for record in self._evaluations.values()),
+                'elements': {element_id: {'type': element_type, 'evaluations': evaluations,
+                                          'time': seconds}
+                             for element_id, (element_type, evaluations, seconds)
+                             in self._evaluations.items()},
+                'types': by_type,
+                'truth_table': {'calls': self.truth_table_calls, 'time': self.truth_table_time},
+                'render': render}
+
+
+def format_stats(stats: dict, top: Optional[int] = 5) -> str:
+    '''Return human readable text of Scheme.stats() with *top* slowest elements'''
+    lines = [f"Elements: {stats['num_elements']}, connections: {stats['num_connections']}"]
+    if not stats['profiling']:
+        lines.append("Profiling is off (use 'stats on')")
+        return '\n'.join(lines) + '\n'
+
+    lines.append(f"Runs: {stats['runs']}, sweeps: {stats['sweeps']} "
+                 f"(last run: {stats['last_sweeps']}, period: {stats['last_period']}), "
+                 f"time: {stats['run_time'] * 1000:.1f} ms")
+    lines.append(f"Evaluations: {stats['evaluations']}, truth tables: "
+                 f"{stats['truth_table']['calls']} calls, "
+                 f"{stats['truth_table']['time'] * 1000:.1f} ms")
+    render = stats['render']
+    if render['frames']:
+        lines.append(f"Frames: {render['frames']}, "
+                     f"average: {render['time'] / render['frames'] * 1000:.1f} ms, "
+                     f"last: {render['last_time'] * 1000:.1f} ms")
+    for element_type, record in sorted(stats['types'].items(),
+                                       key=lambda item: -item[1]['time']):
+        lines.append(f"  {element_type}: {record['evaluations']} evaluations, "
+                     f"{record['time'] * 1000:.1f} ms")
+    hot = sorted(stats['elements'].items(), key=lambda item: -item[1]['time'])[:top]
+    if hot:
+        lines.append('Slowest elements:')
+        for element_id, record in hot:
+            lines.append(f"  {element_id} ({record['type']}): {record['evaluations']} "
+                         f"evaluations, {record['time'] * 1000:.1f} ms")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,130 @@
+'''
+renderer.py
+
+Implements RenderWorker: background thread that renders scheme snapshots
+with Visualizer, so that slow frames don't block tkinter main loop
+'''
+
+import collections
+import threading
+import time
+from typing import Callable, Optional
+
+from src.scheme import SchemeSnapshot
+
+
+class RenderWorker:
+    '''
+    Renders scheme snapshots in a background thread.
+
+    Only the newest submitted snapshot is rendered: if a new snapshot arrives
+    before the worker got to the previous one, the previous one is dropped.
+    In the same way only the newest finished frame is kept until it is taken
+    with take_frame. Render time of every frame is passed to *on_render*
+    (e.g. SchemeProfiler.record_render), which is called from the render thread.
+
+    Methods
+    -------
+    start()
+        Start the rendering thread
+    stop()
+        Stop the rendering thread and wait for it to finish
+    submit(snapshot)
+        Queue snapshot for rendering, replacing the one that is not rendered yet
+    take_frame()
+        Return the newest finished frame (PIL image) or None
+    busy
+        True while there is a snapshot to render or a frame to take
+    '''
+
+    def __init__(self, visualizer, fps_window: float = 1.0,
+                 on_render: Optional[Callable[[float], None]] = None):
+        self._visualizer = visualizer
+        self._fps_window = fps_window
+        self._on_render = on_render
+
+        self._condition = threading.Condition()
+        self._pending = None
+        self._frame = None
+        self._rendering = False
+        self._running = False
+        self._thread = None
+
+        self._frame_times = collections.deque()
+        self.dropped_snapshots = 0
+        self.dropped_frames = 0
+        self.last_render_time = 0.0
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='render-worker', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, snapshot: SchemeSnapshot):
+        with self._condition:
+            if self._pending is not None:
+                self.dropped_snapshots += 1
+            self._pending = snapshot
+            self._condition.notify()
+
+    def take_frame(self):
+        with self._condition:
+            frame, self._frame = self._frame, None
+        return frame
+
+    @property
+    def busy(self) -> bool:
+        with self._condition:
+            return self._pending is not None or self._rendering or self._frame is not None
+
+    @property
+    def fps(self) -> float:
+        '''Number of frames rendered during the last fps_window seconds (per second)'''
+        with self._condition:
+            self._forget_old_frames(time.perf_counter())
+            return len(self._frame_times) / self._fps_window
+
+    def _forget_old_frames(self, now: float):
+        while self._frame_times and now - self._frame_times[0] > self._fps_window:
+            self._frame_times.popleft()
+
+    def _next_snapshot(self) -> Optional[SchemeSnapshot]:
+        with self._condition:
+            while self._running and self._pending is None:
+                self._condition.wait()
+            snapshot, self._pending = self._pending, None
+            self._rendering = snapshot is not None
+            return snapshot if self._running else None
+
+    def _run(self):
+        while True:
+            snapshot = self._next_snapshot()
+            if snapshot is None:
+                return
+
+            start = time.perf_counter()
+            # visualizer reuses its canvas buffer, so the frame has to be copied
+            frame = self._visualizer.render_snapshot(snapshot).copy()
+            finish = time.perf_counter()
+
+            with self._condition:
+                if self._frame is not None:
+                    self.dropped_frames += 1
+                self._frame = frame
+                self._rendering = False
+                self.last_render_time = finish - start
+                self._frame_times.append(finish)
+                self._forget_old_frames(finish)
+            if self._on_render is not None:
+                self._on_render(finish - start)
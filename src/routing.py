@@ -0,0 +1,246 @@
+'''
+routing.py
+
+Implements WireRouter: orthogonal routing of wires around elements
+'''
+
+import heapq
+import math
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.spatial import BBox, GridIndex
+
+Point = Tuple[float, float]
+Cell = Tuple[int, int]
+
+# unit steps: right, up, left, down
+_DIRECTIONS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+
+class WireRouter:
+    '''
+    Orthogonal wire router (maze routing with A* on a grid).
+
+    The plane is divided into a grid with *step* between nodes. Nodes covered
+    by obstacles (bounding boxes of elements, widened by half a step) are
+    blocked. A wire leaves its pin perpendicular to the side of the element
+    the pin is on, goes to the nearest free node and is routed from there
+    with A*, every bend costs *bend_cost* steps. The search is limited to the
+    box around wire ends widened by *search_margin*; if no route is found
+    there, the wire is drawn as a simple L-shaped line.
+
+    Wires don't block each other, so route of a wire depends only on its ends
+    and on the obstacles near it. Routes are cached by wire key; a route is
+    recomputed only if the ends of the wire were changed or an obstacle was
+    added, removed or moved in the area the route covers.
+
+    Methods
+    -------
+    set_obstacles(obstacles)
+        Replace obstacles (bounding boxes by key), invalidate affected routes
+    route(key, start, start_box, end, end_box)
+        Return points of the route from pin start to pin end
+    retain(keys)
+        Forget routes of wires not in keys
+    '''
+
+    def __init__(self, step: float = 0.5, bend_cost: int = 2,
+                 search_margin: float = 8, max_expansions: int = 20000):
+        if step <= 0:
+            raise ValueError("Step should be positive")
+        self.step = step
+        self.bend_cost = bend_cost
+        self.search_margin = search_margin
+        self.max_expansions = max_expansions
+
+        self._obstacles: Dict[Hashable, BBox] = {}
+        self._blocked: Dict[Cell, int] = {}
+        # key -> (ends of the wire, points)
+        self._routes: Dict[Hashable, Tuple[tuple, List[Point]]] = {}
+        self._route_index = GridIndex()
+        # number of searches made, to see how many wires were rerouted
+        self.searches = 0
+
+    def __len__(self):
+        return len(self._routes)
+
+    def __contains__(self, key):
+        return key in self._routes
+
+    def _cells(self, bbox: BBox) -> Iterable[Cell]:
+        # nodes strictly inside the box widened by half a step
+        margin = self.step / 2
+        x_min = math.floor((bbox[0] - margin) / self.step) + 1
+        y_min = math.floor((bbox[1] - margin) / self.step) + 1
+        x_max = math.ceil((bbox[2] + margin) / self.step) - 1
+        y_max = math.ceil((bbox[3] + margin) / self.step) - 1
+        for cell_x in range(x_min, x_max + 1):
+            for cell_y in range(y_min, y_max + 1):
+                yield cell_x, cell_y
+
+    def _block(self, bbox: BBox, delta: int):
+        for cell in self._cells(bbox):
+            count = self._blocked.get(cell, 0) + delta
+            if count:
+                self._blocked[cell] = count
+            else:
+                del self._blocked[cell]
+
+    def _invalidate(self, bbox: BBox):
+        for key in self._route_index.query_rect(bbox):
+            self._route_index.remove(key)
+            del self._routes[key]
+
+    def set_obstacles(self, obstacles: Dict[Hashable, BBox]):
+        changed = []
+        for key, bbox in list(self._obstacles.items()):
+            new_bbox = obstacles.get(key)
+            if new_bbox is None or tuple(new_bbox) != bbox:
+                changed.append(bbox)
+                self._block(bbox, -1)
+                del self._obstacles[key]
+        for key, bbox in obstacles.items():
+            if key not in self._obstacles:
+                bbox = tuple(bbox)
+                changed.append(bbox)
+                self._block(bbox, 1)
+                self._obstacles[key] = bbox
+        for bbox in changed:
+            self._invalidate(bbox)
+
+    def retain(self, keys: Iterable[Hashable]):
+        keys = set(keys)
+        for key in [key for key in self._routes if key not in keys]:
+            self._route_index.remove(key)
+            del self._routes[key]
+
+    def _exit(self, pin: Point, box: Optional[BBox]) -> Tuple[Cell, List[Point]]:
+        '''
+        Return the first node of the route for *pin* on the side of element
+        *box* and points of the stub from the pin to this node
+        '''
+        step = self.step
+        x, y = pin
+        if box is None:
+            cell = (round(x / step), round(y / step))
+            return cell, [pin, (cell[0] * step, cell[1] * step)]
+
+        margin = step / 2
+        # distances to the left, right, bottom and top sides
+        distances = (x - box[0], box[2] - x, y - box[1], box[3] - y)
+        side = distances.index(min(distances))
+        center_x, center_y = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+        # along the side the pin is snapped away from the center of the element,
+        # so that neighbouring pins get different nodes
+        if side < 2:
+            cell_x = (math.floor((box[0] - margin) / step) if side == 0
+                      else math.ceil((box[2] + margin) / step))
+            cell_y = math.floor(y / step) if y < center_y else math.ceil(y / step)
+            corner = (cell_x * step, y)
+        else:
+            cell_y = (math.floor((box[1] - margin) / step) if side == 2
+                      else math.ceil((box[3] + margin) / step))
+            cell_x = math.floor(x / step) if x < center_x else math.ceil(x / step)
+            corner = (x, cell_y * step)
+        return (cell_x, cell_y), [pin, corner, (cell_x * step, cell_y * step)]
+
+    def _search(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        '''Return nodes of the cheapest route from start to goal (A*) or None'''
+        self.searches += 1
+        margin = math.ceil(self.search_margin / self.step)
+        x_min, x_max = min(start[0], goal[0]) - margin, max(start[0], goal[0]) + margin
+        y_min, y_max = min(start[1], goal[1]) - margin, max(start[1], goal[1]) + margin
+        blocked = self._blocked
+        goal_x, goal_y = goal
+
+        # states are (node, direction of the last step), direction -1 at the start
+        start_state = (start, -1)
+        costs = {start_state: 0}
+        previous = {start_state: None}
+        # among states with equal estimate the one further from the start goes first,
+        # otherwise A* explores all the equally short staircase routes
+        heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, 0, start, -1)]
+        expansions = 0
+        while heap:
+            _, _, cost, cell, direction = heapq.heappop(heap)
+            if cell == goal:
+                path = []
+                state = (cell, direction)
+                while state is not None:
+                    path.append(state[0])
+                    state = previous[state]
+                return path[::-1]
+            if cost > costs[(cell, direction)]:
+                continue
+            expansions += 1
+            if expansions > self.max_expansions:
+                return None
+
+            for new_direction, (delta_x, delta_y) in enumerate(_DIRECTIONS):
+                if direction >= 0 and new_direction == (direction + 2) % 4:
+                    continue
+                new_cell = (cell[0] + delta_x, cell[1] + delta_y)
+                if not (x_min <= new_cell[0] <= x_max and y_min <= new_cell[1] <= y_max):
+                    continue
+                if new_cell in blocked and new_cell != goal:
+                    continue
+                new_cost = cost + 1
+                if direction >= 0 and new_direction != direction:
+                    new_cost += self.bend_cost
+                state = (new_cell, new_direction)
+                if new_cost < costs.get(state, math.inf):
+                    costs[state] = new_cost
+                    previous[state] = (cell, direction)
+                    left_x, left_y = goal_x - new_cell[0], goal_y - new_cell[1]
+                    estimate = abs(left_x) + abs(left_y)
+                    # one more bend is needed if the goal is not straight ahead
+                    if (left_x and left_y) or (left_x and new_direction % 2) or \
+                            (left_y and not new_direction % 2):
+                        estimate += self.bend_cost
+                    heapq.heappush(heap, (new_cost + estimate, -new_cost, new_cost,
+                                          new_cell, new_direction))
+        return None
+
+    @staticmethod
+    def _simplify(points: List[Point]) -> List[Point]:
+        '''Remove repeated points and points in the middle of straight segments'''
+        result = []
+        for point in points:
+            if result and point == result[-1]:
+                continue
+            if len(result) >= 2:
+                (x_1, y_1), (x_2, y_2) = result[-2], result[-1]
+                if (x_1 == x_2 == point[0]) or (y_1 == y_2 == point[1]):
+                    result[-1] = point
+                    continue
+            result.append(point)
+        return result
+
+    def route(self, key: Hashable, start: Point, start_box: Optional[BBox],
+              end: Point, end_box: Optional[BBox]) -> List[Point]:
+        '''
+        Return points of orthogonal route of wire *key* from pin *start*
+        of the element with bounding box *start_box* to pin *end*
+        of the element with bounding box *end_box*
+        '''
+        ends = (tuple(start), start_box and tuple(start_box),
+                tuple(end), end_box and tuple(end_box))
+        cached = self._routes.get(key)
+        if cached is not None and cached[0] == ends:
+            return cached[1]
+
+        start_cell, start_stub = self._exit(tuple(start), start_box)
+        end_cell, end_stub = self._exit(tuple(end), end_box)
+        path = self._search(start_cell, end_cell)
+        if path is None:
+            path = [start_cell, (end_cell[0], start_cell[1]), end_cell]
+        step = self.step
+        points = self._simplify(start_stub + [(x * step, y * step) for x, y in path] +
+                                end_stub[::-1])
+
+        if key in self._routes:
+            self._route_index.remove(key)
+        self._routes[key] = (ends, points)
+        self._route_index.insert(key, (min(x for x, _ in points), min(y for _, y in points),
+                                       max(x for x, _ in points), max(y for _, y in points)))
+        return points
@@ -0,0 +1,74 @@
+'''
+scheduler.py
+
+Implements RefreshScheduler: chooses how often the GUI refreshes the scheme
+image depending on how much a frame costs
+'''
+
+from typing import Optional
+
+from src.scheme import SchemeSnapshot
+
+
+class RefreshScheduler:
+    '''
+    Adaptive refresh interval for the scheme image.
+
+    The interval is chosen so that producing frames (building a snapshot and
+    rendering it) takes about *target_load* of one CPU: a frame that costs
+    20 ms with target_load 0.25 is refreshed every 80 ms. The interval is kept
+    between *min_interval* and *max_interval* milliseconds. Snapshots equal
+    to the last rendered one are skipped, and while nothing changes the
+    interval grows up to max_interval.
+
+    Methods
+    -------
+    should_render(snapshot)
+        Return True if snapshot differs from the last rendered one
+    update(frame_cost, changed)
+        Record cost of the last frame (in seconds) and return the next interval (ms)
+    '''
+
+    def __init__(self, target_load: float = 0.25, min_interval: int = 15,
+                 max_interval: int = 1000, smoothing: float = 0.3):
+        if not 0 < target_load <= 1:
+            raise ValueError("target_load should be in (0, 1]")
+        self.target_load = target_load
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._smoothing = smoothing
+
+        self.interval = min_interval
+        self.frame_cost = 0.0
+        self.skipped_frames = 0
+        self._last_state = None
+
+    @staticmethod
+    def _state(snapshot: SchemeSnapshot):
+        return (snapshot.version, snapshot.outs,
+                [(element.position, element.value) for element in snapshot])
+
+    def should_render(self, snapshot: Optional[SchemeSnapshot]) -> bool:
+        if snapshot is None:
+            return False
+        state = self._state(snapshot)
+        if state == self._last_state:
+            self.skipped_frames += 1
+            return False
+        self._last_state = state
+        return True
+
+    def reset(self):
+        '''Forget the last rendered state, so the next snapshot is rendered'''
+        self._last_state = None
+        self.interval = self.min_interval
+
+    def update(self, frame_cost: float, changed: bool) -> int:
+        if changed:
+            self.frame_cost += self._smoothing * (frame_cost - self.frame_cost)
+            interval = self.frame_cost * 1000 / self.target_load
+        else:
+            # back off while the scheme is idle
+            interval = self.interval * 2
+        self.interval = int(min(max(interval, self.min_interval), self.max_interval))
+        return self.interval
@@ -4,9 +4,18 @@ scheme.py
 Implements Scheme class and related exceptions
 '''
 
-from typing import Tuple
+from typing import Tuple, Dict, Iterable, Optional, Set
 import copy
+import itertools
+import time
 import src.elements as elements
+from src.bus import merge_values
+from src.spatial import BBox, GridIndex
+from src.profiling import SchemeProfiler
+from src.memory import memory_report
+from src.cycles import CycleSimulator
+from src.modules import ModuleDefinition, ModuleInstance
+from src.optimize import SimulationPlan, build_plan
 
 
 class IdIsAlreadyTakenError(Exception):
@@ -61,45 +70,235 @@ class WrongElementTypeError(Exception):
         super().__init__(self.message)
 
 
+class ModuleNameIsTakenError(Exception):
+    '''
+    This exception is raised in Scheme register_module method if the name of the
+    module is already used by another module or element type
+    '''
+    def __init__(self, name):
+        self.message = f'Element type <{name}> already exists'
+        super().__init__(self.message)
+
+
+class BusWidthMismatchError(Exception):
+    '''
+    This exception is raised in Scheme _validate_connection method when output and
+    input of the connection carry different number of bits (see BusElement)
+    '''
+    def __init__(self, output_width, input_width):
+        self.message = f'Output of {output_width} bits can\'t be connected to input of {input_width} bits'
+        super().__init__(self.message)
+
+
+class ElementSnapshot:
+    '''
+    Immutable copy of the state of a scheme element that is needed to draw it:
+    id, type, position, input and output labels, values and parameters
+    (number_bits, number_select_lines etc.)
+    '''
+    PARAMETERS = ('number_select_lines', 'number_output_lines',
+                  'number_input_lines', 'number_bits',
+                  'number_address_bits', 'number_data_bits', 'bus_width',
+                  'number_inputs')
+
+    __slots__ = ('id', 'element_type', 'position', 'value', 'ins', 'outs', 'params')
+
+    def __init__(self, element: elements.BasicElement):
+        self.id = element.id
+        self.element_type = element.element_type
+        self.position = element.position
+        self.value = dict(element.value)
+        self.ins = tuple(element.ins)
+        self.outs = tuple(element.outs)
+        self.params = {name: getattr(element, name) for name in self.PARAMETERS
+                       if hasattr(element, name)}
+
+    def __getattr__(self, name):
+        try:
+            return self.params[name]
+        except KeyError as keyerror:
+            raise AttributeError(name) from keyerror
+
+
+class SchemeSnapshot:
+    '''
+    Immutable copy of the scheme state. It can be passed to another thread
+    (e.g. for rendering) while the scheme itself keeps changing
+
+    Attributes
+    ----------
+    version: int
+        structural version of the scheme the snapshot was taken from
+    connections: tuple
+        (source_id, output_label, destination_id, input_label) tuples
+    outs: dict or None
+        output values computed by Scheme.run, if they were given
+    '''
+    def __init__(self, scheme: 'Scheme', outs: Optional[Dict[str, dict]] = None):
+        self.version = scheme.version
+        self._elements = {element.id: ElementSnapshot(element) for element in scheme}
+        self.connections = tuple((connection.source.id, connection.output_label,
+                                  connection.destination.id, connection.input_label)
+                                 for element in scheme
+                                 for connection in element.ins.values()
+                                 if connection is not None)
+        self.outs = copy.deepcopy(outs)
+
+    def __iter__(self):
+        return iter(self._elements.values())
+
+    def __getitem__(self, key):
+        return self._elements[key]
+
+    def __len__(self):
+        return len(self._elements)
+
+
 class Scheme:
     '''
     ADT Scheme that contains elements
     '''
+    # element classes by element type names of add_element (modules are added by register_module)
+    ELEMENT_CLASSES = {
+        'multiplexer': elements.Multiplexer,
+        'and': elements.AndGate,
+        'or': elements.OrGate,
+        'not': elements.NotGate,
+        'nor': elements.NorGate,
+        'xor': elements.XorGate,
+        'nand': elements.NandGate,
+        'constant': elements.Constant,
+        'variable': elements.Variable,
+        'decoder': elements.Decoder,
+        'encoder': elements.Encoder,
+        'fulladder': elements.FullAdder,
+        'addersubtractor': elements.AdderSubtractor,
+        'shifter': elements.RightShifter,
+        'srflipflop': elements.GatedSRFlipFlop,
+        'dflipflop': elements.GatedDFlipFlop,
+        'ram': elements.Ram,
+        'rom': elements.Rom,
+        'busvariable': elements.BusVariable,
+        'splitter': elements.Splitter,
+        'merger': elements.Merger,
+        'busand': elements.BusAndGate,
+        'busor': elements.BusOrGate,
+        'busxor': elements.BusXorGate,
+        'busnot': elements.BusNotGate,
+        'busaddersubtractor': elements.BusAdderSubtractor,
+        'busmultiplexer': elements.BusMultiplexer,
+        'multiplier': elements.Multiplier,
+        'comparator': elements.Comparator,
+        'equality': elements.EqualityComparator,
+        'incrementer': elements.Incrementer,
+        'counter': elements.Counter,
+        'leftshifter': elements.LeftShifter,
+        'arithmeticshifter': elements.ArithmeticShifter,
+        'clock': elements.Clock,
+        'dff': elements.DFlipFlop,
+        'register': elements.Register
+    }
+
     def __init__(self):
         self._elements = {}
+        self._version = 0
+        # element ids by positions, see elements_at and elements_in
+        self._index = GridIndex()
+        # collects statistics of runs while profiling is enabled, see stats
+        self._profiler: Optional[SchemeProfiler] = None
+        # plan of cycle-based simulation and the version it was built for, see run_cycles
+        self._cycle_simulator: Optional[CycleSimulator] = None
+        self._cycle_simulator_version = None
+        # element types defined by schemes, see register_module
+        self._modules: Dict[str, ModuleDefinition] = {}
+        # max number of LUT inputs (None if optimization is disabled), observed
+        # element ids, reduced simulation plan and the version it was built for,
+        # see simulation_plan
+        self._optimization: Optional[int] = None
+        self._observed: Optional[Set[str]] = None
+        self._plan: Optional[SimulationPlan] = None
+        self._plan_version = None
+
+    @property
+    def version(self) -> int:
+        '''
+        Structural version of the scheme. It is changed by every edit of
+        elements, connections or positions (but not by values of elements),
+        so it can be used as a key for caches built from scheme structure
+        '''
+        return self._version
+
+    def register_module(self, name: str, scheme: 'Scheme',
+                        outputs: Dict[str, Tuple[str, str]]) -> ModuleDefinition:
+        '''
+        Register *scheme* as a new element type *name* (see src/modules.py).
+        Variables of the scheme are input ports of the module, *outputs* map
+        names of output ports to (element id, output label) of the scheme.
+        Combinational modules are compiled once and shared by all instances
+        '''
+        if name.lower() in self.ELEMENT_CLASSES or name.lower() in self._modules:
+            raise ModuleNameIsTakenError(name)
+        module = ModuleDefinition(name, scheme, outputs)
+        self._modules[name.lower()] = module
+        return module
+
+    @property
+    def modules(self) -> Dict[str, ModuleDefinition]:
+        return dict(self._modules)
 
     def add_element(self, element_type: str, element_id: str, position: Tuple[int, int], **kwargs):
         '''
         Validates element_id and element_type, then if they are valid,
         adds new element to the scheme at specified position
         '''
-        elem_type_to_class_dct = {
-            'multiplexer': elements.Multiplexer,
-            'and': elements.AndGate,
-            'or': elements.OrGate,
-            'not': elements.NotGate,
-            'nor': elements.NorGate,
-            'xor': elements.XorGate,
-            'nand': elements.NandGate,
-            'constant': elements.Constant,
-            'variable': elements.Variable,
-            'decoder': elements.Decoder,
-            'encoder': elements.Encoder,
-            'fulladder': elements.FullAdder,
-            'addersubtractor': elements.AdderSubtractor,
-            'shifter': elements.RightShifter,
-            'srflipflop': elements.GatedSRFlipFlop,
-            'dflipflop': elements.GatedDFlipFlop
-        }
         if not self._validate_id(element_id):
             raise IdIsAlreadyTakenError(element_id)
 
-        try:
-            new_element = elem_type_to_class_dct[element_type.lower()](element_id, position, **kwargs)
-        except KeyError as keyerror:
-            raise WrongElementTypeError(element_type) from keyerror
+        module = self._modules.get(element_type.lower())
+        if module is not None:
+            new_element = ModuleInstance(element_id, position, module, **kwargs)
+        else:
+            try:
+                new_element = self.ELEMENT_CLASSES[element_type.lower()](element_id, position, **kwargs)
+            except KeyError as keyerror:
+                raise WrongElementTypeError(element_type) from keyerror
 
         self._elements[element_id] = new_element
+        self._index_element(element_id, position)
+        if self._profiler is not None:
+            self._profiler.attach(new_element)
+        self._version += 1
+
+    def _index_element(self, element_id: str, position: Optional[Tuple[int, int]]):
+        if element_id in self._index:
+            self._index.remove(element_id)
+        try:
+            x, y = position
+        except (TypeError, ValueError):
+            # element has no position on the plane
+            return
+        self._index.insert(element_id, (x, y, x, y))
+
+    @property
+    def spatial_index(self) -> GridIndex:
+        '''
+        Index of bounding boxes of elements by positions (see elements_at),
+        it must not be changed, e.g. for memory accounting
+        '''
+        return self._index
+
+    def elements_at(self, x: float, y: float) -> Set[str]:
+        '''
+        Return ids of elements placed at position (x, y)
+        '''
+        return self._index.query_point(x, y)
+
+    def elements_in(self, bbox: BBox) -> Set[str]:
+        '''
+        Return ids of elements placed inside rectangle *bbox*
+        (x_min, y_min, x_max, y_max), borders included
+        '''
+        return self._index.query_rect(bbox)
 
     def _validate_id(self, id_: str) -> bool:
         '''
@@ -131,7 +330,7 @@ class Scheme:
             raise NoSuchOutputLabelError(output_label) from keyerror
 
         destination.set_input_connection(connection)
-
+        self._version += 1
 
     def _validate_connection(self, connection: elements.Connection):
         try:
@@ -139,6 +338,12 @@ class Scheme:
                 raise InputIsTakenError(connection.input_label)
         except KeyError as keyerror:
             raise NoSuchInputLabelError(connection.input_label) from keyerror
+        if connection.output_label not in connection.source.outs:
+            raise NoSuchOutputLabelError(connection.output_label)
+        output_width = connection.source.pin_width(connection.output_label)
+        input_width = connection.destination.pin_width(connection.input_label)
+        if output_width != input_width:
+            raise BusWidthMismatchError(output_width, input_width)
 
     def __getitem__(self, key):
         try:
@@ -169,6 +374,10 @@ class Scheme:
             in_connection.destination.delete_input_connection(in_connection.input_label)
 
         self._elements.pop(element_id)
+        self._index_element(element_id, None)
+        if self._profiler is not None:
+            self._profiler.detach(element)
+        self._version += 1
 
     def delete_connection(self, source_id: str, output_label: str,
                             destination_id: str, input_label: str):
@@ -180,38 +389,178 @@ class Scheme:
 
         source.delete_output_connection(output_label)
         destination.delete_input_connection(input_label)
+        self._version += 1
 
     def _update_values(self, new_values):
         for id_ in new_values:
             self._elements[id_].value = new_values[id_]
 
+    @property
+    def profiler(self) -> Optional[SchemeProfiler]:
+        '''
+        Profiler of the scheme or None if profiling is disabled
+        '''
+        return self._profiler
+
+    def enable_profiling(self, enabled: bool = True):
+        '''
+        Starts (or stops) collecting statistics of runs, see stats.
+        Statistics are reset when profiling is started
+        '''
+        if enabled and self._profiler is None:
+            self._profiler = SchemeProfiler()
+            for element in self._elements.values():
+                self._profiler.attach(element)
+        elif not enabled and self._profiler is not None:
+            self._profiler.detach()
+            self._profiler = None
+
+    def stats(self) -> dict:
+        '''
+        Returns size of the scheme and, if profiling is enabled, statistics
+        collected by profiler: runs, sweeps, oscillation period, evaluations
+        and time per element and per element type, truth table and render time
+        '''
+        stats = {'num_elements': len(self._elements),
+                 'num_connections': sum(connection is not None for element in self
+                                        for connection in element.ins.values()),
+                 'version': self._version,
+                 'profiling': self._profiler is not None}
+        if self._profiler is not None:
+            stats.update(self._profiler.stats())
+        return stats
+
+    def memory_report(self) -> dict:
+        '''
+        Returns bytes used by the scheme by element type, truth tables
+        (shared and private), connections and values, see src/memory.py
+        '''
+        return memory_report(self)
+
+    def enable_optimization(self, k: Optional[int] = 6, observed: Optional[Iterable[str]] = None):
+        '''
+        Enables (or disables if *k* is None) simulation of run by a reduced plan
+        (see src/optimize.py): constants are folded through elements, fan-out-free
+        combinational cones with at most *k* inputs are collapsed into lookup
+        tables and, if *observed* element ids are given, elements without path
+        to them (or to elements with state) are dead. Output values of all
+        elements but dead ones stay the same, dead elements are unknown
+        '''
+        self._optimization = k
+        self._observed = None if observed is None else set(observed)
+        self._plan = None
+        if k is not None:
+            self.simulation_plan()
+
+    def simulation_plan(self) -> Optional[SimulationPlan]:
+        '''
+        Returns simulation plan used by run or None if optimization is disabled.
+        The plan is rebuilt only after the scheme is edited
+        '''
+        if self._optimization is None:
+            return None
+        if self._plan is None or self._plan_version != self._version:
+            self._plan = build_plan(self, self._optimization, self._observed)
+            self._plan_version = self._version
+        return self._plan
+
     def run(self):
+        start = time.perf_counter()
+        plan = self.simulation_plan()
         values_to_update = {}
-        for _ in range(len(self._elements)):
-            for id_ in self._elements:
-                values_to_update[id_] = self._elements[id_].calc_value(update=False)
+        if plan is None:
+            nodes, probes = list(self._elements.values()), []
+        else:
+            # folded values are set once, elements collapsed into lookup tables
+            # are evaluated only to find the period, dead elements are unknown
+            nodes, probes = plan.nodes, plan.probes
+            for element, value in plan.constants.items():
+                element.value = dict(value)
+                values_to_update[element.id] = dict(value)
+            for element in plan.dead:
+                element.value = {label: None for label in element.value}
+                values_to_update[element.id] = dict(element.value)
+        for _ in range(len(nodes)):
+            for node in nodes:
+                values_to_update[node.id] = node.calc_value(update=False)
             self._update_values(values_to_update)
+        for probe in probes:
+            values_to_update[probe.id] = probe.calc_value()
 
         records_of_out_values = []
         final_out_values = copy.deepcopy(values_to_update)
 
+        sweeps = len(nodes)
         while True:
+            sweeps += 1
             cur_out_values = {}
-            for element_id in self._elements:
-                cur_out_values[element_id] = self._elements[element_id].calc_value()
+            for node in itertools.chain(nodes, probes):
+                element_id = node.id
+                cur_out_values[element_id] = node.calc_value()
                 for out_name in cur_out_values[element_id]:
                     if cur_out_values[element_id][out_name] != final_out_values[element_id][out_name]:
-                        final_out_values[element_id][out_name] = None
+                        # words keep bits that are the same during the whole period
+                        final_out_values[element_id][out_name] = merge_values(
+                            cur_out_values[element_id][out_name],
+                            final_out_values[element_id][out_name])
             if cur_out_values in records_of_out_values:
                 # current values was previously encountered, so we went through the whole period
                 break
             records_of_out_values.append(cur_out_values)
 
+        # memories are written only when the values are settled
+        for element in self._elements.values():
+            if isinstance(element, elements.Ram):
+                element.commit()
+
+        if self._profiler is not None:
+            period = len(records_of_out_values) - records_of_out_values.index(cur_out_values)
+            self._profiler.record_run(sweeps, period, time.perf_counter() - start)
+        if plan is not None:
+            final_out_values = {element_id: final_out_values[element_id]
+                                for element_id in self._elements}
         return final_out_values
 
+    def run_cycles(self, cycles: int = 1) -> Dict[str, dict]:
+        '''
+        Simulate *cycles* clock cycles (see src/cycles.py) and return output values
+        of elements: on every rising edge of clocks all edge-triggered elements latch
+        simultaneously, then combinational logic is evaluated once in topological order.
+        The simulation plan is rebuilt only after the scheme is edited
+        '''
+        if self._cycle_simulator is None or self._cycle_simulator_version != self._version:
+            self._cycle_simulator = CycleSimulator(self)
+            self._cycle_simulator_version = self._version
+        return self._cycle_simulator.run(cycles)
+
     def __iter__(self):
         return iter(self._elements.values())
 
+    def snapshot(self, outs: Optional[Dict[str, dict]] = None) -> SchemeSnapshot:
+        '''
+        Return immutable snapshot of the scheme with optional output values *outs*
+        (as returned by run)
+        '''
+        return SchemeSnapshot(self, outs)
+
+    def auto_layout(self, incremental: bool = False, **kwargs) -> Dict[str, Tuple[int, int]]:
+        '''
+        Place elements automatically, so that signal goes from left to right
+        (see src/layout.py) and return new positions. If *incremental* is True,
+        only elements without position are placed and other elements are not moved
+        '''
+        # layout uses numpy, so it is imported on first use
+        import src.layout as layout
+
+        if incremental:
+            unplaced = [element.id for element in self if element.position is None]
+            return layout.place_new_elements(self, unplaced, **kwargs)
+
+        positions = layout.layered_layout(self, **kwargs)
+        for element_id, position in positions.items():
+            self.move(element_id, position)
+        return positions
+
     def _reset(self):
         for element in self._elements.values():
             element.reset_value()
@@ -221,6 +570,8 @@ class Scheme:
         Moves element with element_id to new_position
         '''
         self._elements[element_id].position = new_position
+        self._index_element(element_id, new_position)
+        self._version += 1
 
     def __str__(self):
         return str(list(self._elements.items()))
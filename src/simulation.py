@@ -0,0 +1,181 @@
+'''
+simulation.py
+
+Implements SimulationWorker: background thread that advances the scheme
+independently of tkinter main loop and publishes scheme snapshots
+'''
+
+import collections
+import threading
+import time
+from typing import Optional
+
+from src.elements import Clock
+from src.scheme import Scheme, SchemeSnapshot
+
+
+class SimulationWorker:
+    '''
+    Advances the scheme in a background thread, continuously or at most
+    *tick_rate* times per second. A tick is Scheme.run, or one clock cycle
+    (Scheme.run_cycles(1)) if the scheme has clocks, so that flip-flops,
+    registers and counters advance.
+
+    When a tick doesn't change the scheme (neither its structure nor output
+    values), the scheme has settled and the worker sleeps until
+    notify_changed is called, so idle schemes don't consume CPU.
+
+    After a tick the worker publishes a snapshot of the scheme. Snapshots are
+    double-buffered: a new snapshot is built outside of the buffer lock and
+    then swapped with the published one, so readers never see a half-built
+    snapshot and are never blocked by a tick. A snapshot is only built if the
+    previous one has been taken, so the cost of snapshots follows the rate
+    of the reader (e.g. display refresh rate), not the tick rate.
+
+    The scheme itself must only be changed while holding *lock*
+    (e.g. when executing user commands), as the worker runs the scheme
+    while holding it.
+
+    Methods
+    -------
+    start()
+        Start the simulation thread
+    stop()
+        Stop the simulation thread and wait for it to finish
+    take_snapshot()
+        Return the newest published snapshot (if it was not taken yet) or None
+    notify_changed()
+        Wake the worker up after the scheme was changed
+    '''
+
+    def __init__(self, scheme: Scheme, tick_rate: Optional[float] = None,
+                 rate_window: float = 1.0):
+        self._scheme = scheme
+        self.tick_rate = tick_rate
+        self._rate_window = rate_window
+
+        self.lock = threading.RLock()
+        self._buffer_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._changed_event = threading.Event()
+        self._thread = None
+
+        self._front = None
+        self._front_taken = True
+        self._tick_times = collections.deque()
+        self._last_state = None
+        self._published_state = None
+        # whether the scheme has clocks and the version it was checked for
+        self._clocked = False
+        self._clocked_version = None
+        self.ticks = 0
+        self.error = None
+        self.last_tick_time = 0.0
+        self.last_snapshot_time = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.error = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='simulation-worker', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._changed_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def notify_changed(self):
+        self._changed_event.set()
+
+    def take_snapshot(self) -> Optional[SchemeSnapshot]:
+        with self._buffer_lock:
+            if self._front_taken:
+                return None
+            self._front_taken = True
+            snapshot = self._front
+        # the newest state may have not been published as the buffer was busy
+        self._changed_event.set()
+        return snapshot
+
+    @property
+    def ticks_per_second(self) -> float:
+        '''Number of ticks during the last rate_window seconds (per second)'''
+        with self._buffer_lock:
+            self._forget_old_ticks(time.perf_counter())
+            return len(self._tick_times) / self._rate_window
+
+    def _forget_old_ticks(self, now: float):
+        while self._tick_times and now - self._tick_times[0] > self._rate_window:
+            self._tick_times.popleft()
+
+    def _advance(self) -> dict:
+        '''Run the scheme or simulate one clock cycle if it has clocks'''
+        version = self._scheme.version
+        if version != self._clocked_version:
+            self._clocked = any(isinstance(element, Clock) for element in self._scheme)
+            self._clocked_version = version
+        return self._scheme.run_cycles(1) if self._clocked else self._scheme.run()
+
+    def _tick(self) -> bool:
+        '''
+        Run the scheme once and publish snapshot if the previous one was taken.
+        Return True if the scheme has changed during the tick
+        '''
+        with self.lock:
+            # changes made before this point are seen by this tick
+            self._changed_event.clear()
+            start = time.perf_counter()
+            outs = self._advance()
+            ran = time.perf_counter()
+            state = (self._scheme.version, outs)
+            changed = state != self._last_state
+            self._last_state = state
+
+            with self._buffer_lock:
+                build_snapshot = self._front_taken and state != self._published_state
+            # back buffer, built without blocking readers
+            back = self._scheme.snapshot(outs) if build_snapshot else None
+        now = time.perf_counter()
+
+        with self._buffer_lock:
+            self.ticks += 1
+            self.last_tick_time = ran - start
+            self._tick_times.append(now)
+            self._forget_old_ticks(now)
+            if back is not None:
+                self.last_snapshot_time = now - ran
+                self._published_state = state
+                self._front, self._front_taken = back, False
+        return changed
+
+    def _run(self):
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set():
+            try:
+                changed = self._tick()
+            except Exception as ex:
+                # scheme can't be simulated anymore (e.g. forbidden flip-flop state),
+                # the error is reported by the owner of the worker
+                self.error = ex
+                return
+
+            if not changed:
+                # stop sets stop event before changed event, so it can't be missed here
+                if not self._stop_event.is_set():
+                    self._changed_event.wait()
+                next_tick = time.perf_counter()
+                continue
+            if self.tick_rate:
+                next_tick = max(next_tick + 1 / self.tick_rate, time.perf_counter())
+                self._stop_event.wait(next_tick - time.perf_counter())
+            else:
+                # let threads waiting for the scheme lock (e.g. GUI commands) take it
+                time.sleep(0)
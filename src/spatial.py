@@ -0,0 +1,122 @@
+'''
+spatial.py
+
+Implements GridIndex: uniform grid spatial index of rectangles
+'''
+
+import math
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+
+BBox = Tuple[float, float, float, float]
+
+
+def intersects(first: BBox, second: BBox) -> bool:
+    '''Check if two (xmin, ymin, xmax, ymax) rectangles intersect'''
+    return (first[0] <= second[2] and second[0] <= first[2] and
+            first[1] <= second[3] and second[1] <= first[3])
+
+
+class GridIndex:
+    '''
+    Spatial index of rectangles (xmin, ymin, xmax, ymax) stored by key.
+
+    The plane is divided into square cells of *cell_size*, every rectangle is
+    registered in all cells it overlaps, so queries only look at the cells
+    that overlap the queried area. Rectangles that overlap more than
+    *max_cells* cells (e.g. very long wires) are kept in a separate list
+    and are checked one by one.
+
+    Methods
+    -------
+    insert(key, bbox)
+        Add rectangle (or replace rectangle with the same key)
+    remove(key)
+        Remove rectangle with the key
+    query_rect(bbox)
+        Return keys of rectangles that intersect bbox
+    query_point(x, y)
+        Return keys of rectangles that contain the point
+    bounds()
+        Return rectangle that contains all rectangles (or None)
+    '''
+
+    def __init__(self, cell_size: float = 4, max_cells: int = 64):
+        if cell_size <= 0:
+            raise ValueError("Cell size should be positive")
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._bboxes: Dict[Hashable, BBox] = {}
+        self._large: Set[Hashable] = set()
+
+    def __len__(self):
+        return len(self._bboxes)
+
+    def __contains__(self, key):
+        return key in self._bboxes
+
+    def __getitem__(self, key) -> BBox:
+        return self._bboxes[key]
+
+    def _cell_range(self, bbox: BBox):
+        size = self.cell_size
+        return (math.floor(bbox[0] / size), math.floor(bbox[1] / size),
+                math.floor(bbox[2] / size), math.floor(bbox[3] / size))
+
+    def _cells_of(self, bbox: BBox) -> Iterable[Tuple[int, int]]:
+        x_min, y_min, x_max, y_max = self._cell_range(bbox)
+        for cell_x in range(x_min, x_max + 1):
+            for cell_y in range(y_min, y_max + 1):
+                yield cell_x, cell_y
+
+    def _is_large(self, bbox: BBox) -> bool:
+        x_min, y_min, x_max, y_max = self._cell_range(bbox)
+        return (x_max - x_min + 1) * (y_max - y_min + 1) > self.max_cells
+
+    def insert(self, key: Hashable, bbox: BBox):
+        if key in self._bboxes:
+            self.remove(key)
+        bbox = tuple(bbox)
+        self._bboxes[key] = bbox
+        if self._is_large(bbox):
+            self._large.add(key)
+            return
+        for cell in self._cells_of(bbox):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: Hashable):
+        bbox = self._bboxes.pop(key)
+        if key in self._large:
+            self._large.discard(key)
+            return
+        for cell in self._cells_of(bbox):
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def query_rect(self, bbox: BBox) -> Set[Hashable]:
+        found = set()
+        x_min, y_min, x_max, y_max = self._cell_range(bbox)
+        if (x_max - x_min + 1) * (y_max - y_min + 1) > len(self._cells):
+            # area is larger than the occupied part of the grid
+            candidates = (key for keys in self._cells.values() for key in keys)
+        else:
+            candidates = (key for cell in self._cells_of(bbox)
+                          for key in self._cells.get(cell, ()))
+        for key in candidates:
+            if key not in found and intersects(self._bboxes[key], bbox):
+                found.add(key)
+        found.update(key for key in self._large if intersects(self._bboxes[key], bbox))
+        return found
+
+    def query_point(self, x: float, y: float) -> Set[Hashable]:
+        return self.query_rect((x, y, x, y))
+
+    def bounds(self) -> Optional[BBox]:
+        if not self._bboxes:
+            return None
+        return (min(bbox[0] for bbox in self._bboxes.values()),
+                min(bbox[1] for bbox in self._bboxes.values()),
+                max(bbox[2] for bbox in self._bboxes.values()),
+                max(bbox[3] for bbox in self._bboxes.values()))
@@ -7,9 +7,6 @@ A module containing the implemetation of truth table and truth tables of the log
 from typing import List, Dict, Callable
 import itertools
 
-import pandas as pd
-import numpy as np
-
 
 class TruthTable:
     """A class for the truth table of logical function.
@@ -21,6 +18,9 @@ class TruthTable:
         Given a dictionary that maps some names of the arguments to their values,
         return the value of the function if possible.
     """
+    # 2**20 rows is the largest table that is still reasonable to keep in memory
+    MAX_NUM_ARGS = 20
+
     def __init__(self, arg_names: list, out_names: list, function: Callable[[List[bool]], List[bool]]):
         """Initialize a truth table with the names of variables and the logical function.
         Parameters
@@ -30,17 +30,28 @@ class TruthTable:
         out_names: list of strings
             names of outputs of the function (the function can have more than one output)
         """
+        if len(arg_names) > self.MAX_NUM_ARGS:
+            raise ValueError(f"Truth table can have at most {self.MAX_NUM_ARGS} arguments")
         self._num_args = len(arg_names)
-
-        data = np.full(shape=(2**self._num_args, len(out_names)), dtype=np.int8, fill_value=False)
-
-        self._data = pd.DataFrame(columns=out_names, dtype=bool) # stores data
+        self._out_names = list(out_names)
 
         self._names_to_nums = {name: num for num, name in enumerate(reversed(arg_names))} # map from names of arguments to numbers
         self._nums_to_names = {num: name for name, num in self._names_to_nums.items()} # reverse map
 
-        for idx, args in enumerate(itertools.product([False, True], repeat=self._num_args)):
-            self._data.loc[idx] = function(list(args))
+        # row with index idx stores outputs for arguments that form binary representation of idx
+        self._data = [self._make_row(function(list(args)))
+                      for args in itertools.product([False, True], repeat=self._num_args)]
+
+    def _make_row(self, outputs) -> tuple:
+        """Convert value returned by the logical function to the row of the table.
+        Single value is used for all the outputs.
+        """
+        if not isinstance(outputs, (list, tuple)):
+            return (outputs,) * len(self._out_names)
+        if len(outputs) != len(self._out_names):
+            raise ValueError(f"Logical function returned {len(outputs)} values "
+                             f"for {len(self._out_names)} outputs")
+        return tuple(outputs)
 
     @staticmethod
     def _int_to_binary(integer: int, num_bits) -> List[bool]:
@@ -60,7 +71,7 @@ class TruthTable:
 
     def get_value(self, args):
         idx = sum(2**(self._num_args-i-1) for i in range(self._num_args) if args[i])
-        return self._data[idx]
+        return dict(zip(self._out_names, self._data[idx]))
 
     def predict_value(self, incomplete_args: Dict[str, bool]):
         """Given a dictionary that maps names of some of the arguments to their values, return:
@@ -75,24 +86,22 @@ class TruthTable:
             if name not in incomplete_args:
                 missed.append(2**self._names_to_nums[name])
 
-        return_if_cant_predict = {name: None for name in self._data.columns}
-
         first_index = sum(2**self._names_to_nums[i] for i in incomplete_args if incomplete_args[i])
         value = None
         for is_included in itertools.product([False, True], repeat=num_missed_args):
             cur_index = first_index + sum(missed[j] for j in range(num_missed_args) if is_included[j])
-            cur_value = self._data.loc[cur_index]
+            cur_value = self._data[cur_index]
             if value is None:
                 value = cur_value
-            elif np.any(value != cur_value):
-                return return_if_cant_predict
-        return dict(value)
+            elif value != cur_value:
+                return {name: None for name in self._out_names}
+        return dict(zip(self._out_names, value))
 
     def __str__(self):
         str_repr = ""
-        for num_row in range(self._data.shape[0]):
+        for num_row, row in enumerate(self._data):
             cur_row = f"{num_row:0{self._num_args}b} "
-            cur_row += str(list(self._data.loc[num_row]))
+            cur_row += str(list(row))
             str_repr += cur_row + "\n"
         return str_repr
 
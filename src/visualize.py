@@ -1,27 +1,141 @@
-from pprint import pprint
-
-from schemdraw import logic
-from schemdraw import elements as sd_elem
-import schemdraw
-from src.custom_elements import Constant, Variable, Not
-from src.scheme import Scheme
-from PIL import Image, ImageTk
-import io
-import matplotlib.pyplot as plt
-from typing import Dict, Union, List
-import src.elements as elements
+import copy
+import time
+from typing import Dict, Union, List, Optional, Tuple
+from src.scheme import Scheme, SchemeSnapshot, ElementSnapshot
+from src.spatial import BBox, GridIndex
+from src.routing import WireRouter
+from src.bus import Word
+
+# rendering dependencies are heavy to import, so they are loaded
+# on first use of Visualizer (see _load_rendering_modules)
+schemdraw = None
+logic = None
+sd_elem = None
+Figure = None
+FigureCanvasAgg = None
+Image = None
+ImageTk = None
+LineCollection = None
+Transform = Point = None
+Constant = Variable = Not = None
+
+
+def _load_rendering_modules():
+    """Import schemdraw, matplotlib and PIL into module namespace"""
+    global schemdraw, logic, sd_elem, Figure, FigureCanvasAgg, Image, ImageTk
+    global LineCollection, Transform, Point, Constant, Variable, Not
+    if schemdraw is not None:
+        return
+
+    from matplotlib.figure import Figure
+    from matplotlib.collections import LineCollection
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from PIL import Image, ImageTk
+    from schemdraw import logic
+    from schemdraw import elements as sd_elem
+    from schemdraw.transform import Transform
+    from schemdraw.util import Point
+    from src.custom_elements import Constant, Variable, Not
+    import schemdraw
+
+
+class Viewport:
+    """Visible part of the scheme: scheme coordinates of the center
+    of the image and scale (scheme units per pixel). Viewports are
+    immutable, panned and zoomed return new viewports"""
+
+    __slots__ = ('center', 'scale')
+
+    def __init__(self, center: Tuple[float, float], scale: float):
+        if scale <= 0:
+            raise ValueError("Scale should be positive")
+        self.center = (float(center[0]), float(center[1]))
+        self.scale = float(scale)
+
+    @classmethod
+    def fit(cls, bbox: BBox, width: float, height: float, margin: float = 0.05) -> 'Viewport':
+        """Return viewport that shows the whole bbox in (width x height) pixels"""
+        center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+        scale = max((bbox[2] - bbox[0]) / width, (bbox[3] - bbox[1]) / height, 1e-3)
+        return cls(center, scale * (1 + 2 * margin))
+
+    def bbox(self, width: float, height: float) -> BBox:
+        """Return visible rectangle for image of (width x height) pixels"""
+        half_width, half_height = width * self.scale / 2, height * self.scale / 2
+        return (self.center[0] - half_width, self.center[1] - half_height,
+                self.center[0] + half_width, self.center[1] + half_height)
+
+    def panned(self, delta_x: float, delta_y: float) -> 'Viewport':
+        """Return viewport moved by (delta_x, delta_y) pixels (y axis of image points down)"""
+        return Viewport((self.center[0] - delta_x * self.scale,
+                         self.center[1] + delta_y * self.scale), self.scale)
+
+    def zoomed(self, factor: float, point: Optional[Tuple[float, float]] = None) -> 'Viewport':
+        """Return viewport zoomed in *factor* times (zoomed out if factor < 1)
+        keeping scheme *point* (center by default) at the same place of the image"""
+        if point is None:
+            point = self.center
+        return Viewport((point[0] + (self.center[0] - point[0]) / factor,
+                         point[1] + (self.center[1] - point[1]) / factor),
+                        self.scale / factor)
+
+    def __eq__(self, other):
+        return (isinstance(other, Viewport) and
+                (self.center, self.scale) == (other.center, other.scale))
+
+    def __hash__(self):
+        return hash((self.center, self.scale))
+
+    def __repr__(self):
+        return f'Viewport(center={self.center}, scale={self.scale})'
 
 
 class Visualizer:
-    """Visualize scheme elements with schemdraw library"""
+    """Visualize scheme elements with schemdraw library
+
+    Only elements and wires inside the viewport are drawn (viewport is
+    fitted to the whole scheme if it is None). When one scheme unit takes less
+    than lod_threshold pixels, elements are drawn as plain boxes without pins
+    and labels (low level of detail)
+    """
 
     def __init__(self, scheme: Scheme, default_label_size: float = 8,
                  max_width: int = 800, max_height: int = 800):
+        _load_rendering_modules()
         self._scheme = scheme
         self._default_label_size = default_label_size
         self._default_out_lbl_sz = self._default_label_size * 2
+        self._drawing_params = {'lw': 1, 'fontsize': self._default_label_size}
         self._max_width = max_width
         self._max_height = max_height
+        self._value_label_offset = 0.1
+        self._dpi = 100
+
+        # figure and axes are created once (without pyplot) and reused for every layout,
+        # canvas has exactly (max_width x max_height) pixels so that frames don't have to be scaled
+        self._figure = Figure(figsize=(self._max_width / self._dpi, self._max_height / self._dpi),
+                              dpi=self._dpi)
+        FigureCanvasAgg(self._figure)
+        self._axes = self._figure.add_subplot()
+        axes_box = self._axes.get_window_extent()
+        self._axes_box = (axes_box.x0, axes_box.y0, axes_box.width, axes_box.height)
+
+        self.viewport: Optional[Viewport] = None
+        self.last_viewport: Optional[Viewport] = None
+        self.lod_threshold = 12
+
+        # visual elements by type and parameters, see _element_template
+        self._templates = {}
+        self._template_bboxes = {}
+        self._index = None
+        self._index_version = None
+        # wires are routed around elements, routes are cached between layouts
+        self._router = WireRouter()
+
+        # cached static layout, see _build_layout
+        self._layout = None
+        self._background = None
+        self._value_labels = {}
         self._elements_match = {'AND': logic.And,
                                 'OR': logic.Or,
                                 'XOR': logic.Xor,
@@ -37,63 +151,163 @@ class Visualizer:
                                 'ADDERSUBTRACTOR': sd_elem.Ic,
                                 'SHIFTER': sd_elem.Ic,
                                 'SR_FLIPFLOP': sd_elem.Ic,
-                                'D_FLIPFLOP': sd_elem.Ic}
-
-    def _add_visual_elements(self, drawing: schemdraw.Drawing,
-                             iterate_circuit: bool = False) -> Dict[
-        str, sd_elem.Element]:
-        """Add visual elements to drawing and return dictionary
-        with added elements
-
-        Arguments
-        ----------
-            iterate_circuit: specifies if to calculate output for image
-            and iterate circuit
-        """
-        visual_elements = {}
-
-        if iterate_circuit:
-            scheme_elements_outs = self._scheme.run()
-
-        for scheme_element in self._scheme:
-            # create visual element
-            start_coordinates = (
-                scheme_element.position[0],
-                scheme_element.position[1])
+                                'D_FLIPFLOP': sd_elem.Ic,
+                                'RAM': sd_elem.Ic,
+                                'ROM': sd_elem.Ic,
+                                'BUS_VARIABLE': sd_elem.Ic,
+                                'SPLITTER': sd_elem.Ic,
+                                'MERGER': sd_elem.Ic,
+                                'BUS_AND': sd_elem.Ic,
+                                'BUS_OR': sd_elem.Ic,
+                                'BUS_XOR': sd_elem.Ic,
+                                'BUS_NOT': sd_elem.Ic,
+                                'BUS_ADDERSUBTRACTOR': sd_elem.Ic,
+                                'BUS_MULTIPLEXER': sd_elem.Ic,
+                                'MULTIPLIER': sd_elem.Ic,
+                                'COMPARATOR': sd_elem.Ic,
+                                'EQUALITY_COMPARATOR': sd_elem.Ic,
+                                'INCREMENTER': sd_elem.Ic,
+                                'COUNTER': sd_elem.Ic,
+                                'LEFT_SHIFTER': sd_elem.Ic,
+                                'ARITHMETIC_SHIFTER': sd_elem.Ic,
+                                'CLOCK': sd_elem.Ic,
+                                'DFF': sd_elem.Ic,
+                                'REGISTER': sd_elem.Ic}
+
+    def _template_key(self, scheme_element: ElementSnapshot) -> tuple:
+        """Return key of everything that defines geometry of the visual element"""
+        value = None
+        if scheme_element.element_type in ('CONSTANT', 'VARIABLE'):
+            value = scheme_element.value['out']
+        return (scheme_element.element_type, tuple(sorted(scheme_element.params.items())),
+                value, self._default_label_size)
+
+    def _element_template(self, scheme_element: ElementSnapshot) -> 'sd_elem.Element':
+        """Return visual element for the type and parameters of the scheme element,
+        placed with its center at (0, 0) and with empty id label. Templates are built
+        and placed once, see _create_visual_element"""
+        key = self._template_key(scheme_element)
+        template = self._templates.get(key)
+        if template is None:
             # create integrated circuit visual element custom attributes
             # depending on element type
             kwargs = self._create_elements_kwargs(scheme_element)
-            visual_element = self._elements_match[
-                scheme_element.element_type](**kwargs)
-            if 'center' not in visual_element.anchors:
-                visual_element.anchors['center'] = (0, 0)
-            visual_element = visual_element.label(
-                str(scheme_element.id), color='blue', loc='center').anchor(
-                'center').at(start_coordinates)
-
-            # configure element outputs
-            # set labels now because after element is added to drawing
-            # you can't change their labels
-            if iterate_circuit:
-                if scheme_element.id in scheme_elements_outs:
-                    for label, value in scheme_elements_outs[scheme_element.id].items():
-                        value = int(value) if value is not None else 'U'
-                        visual_element.label(label=str(value), loc=label,
-                                             color='red', fontsize=self._default_out_lbl_sz)
-
-            # add element to drawing
-            visual_elements[scheme_element.id] = drawing.add(visual_element)
+            template = self._elements_match.get(scheme_element.element_type, sd_elem.Ic)(**kwargs)
+            if 'center' not in template.anchors:
+                template.anchors['center'] = (0, 0)
+            template = template.label('', color='blue', loc='center').anchor(
+                'center').at((0, 0))
+            schemdraw.Drawing(**self._drawing_params).add(template)
+            self._templates[key] = template
+        return template
+
+    def _create_visual_element(self, scheme_element: ElementSnapshot,
+                               position: Optional[Tuple[float, float]] = None) -> 'sd_elem.Element':
+        """Create visual element for scheme element centered at *position*
+        (position of the scheme element by default).
+
+        The element is a translated copy of the placed template: it shares
+        template's segments and parameters, only the transform, absolute anchors
+        and id label are its own. Such element must be added to drawing with
+        drawing.elements.append, as drawing.add would place it once more"""
+        template = self._element_template(scheme_element)
+        x, y = position or scheme_element.position
+
+        # copy.copy can't be used: Element.__getattr__ recurses on a half-built copy
+        visual_element = object.__new__(type(template))
+        visual_element.__dict__.update(template.__dict__)
+        visual_element.transform = Transform(0, (x, y), template.transform.localshift)
+        visual_element.absanchors = {name: Point((anchor_x + x, anchor_y + y))
+                                     for name, (anchor_x, anchor_y) in template.absanchors.items()}
+
+        # id label is the last segment, added when the template was placed
+        label = copy.copy(template.segments[-1])
+        label.text = str(scheme_element.id)
+        visual_element.segments = template.segments[:-1] + [label]
+        return visual_element
+
+    def _add_visual_elements(self, drawing: 'schemdraw.Drawing',
+                             snapshot: SchemeSnapshot,
+                             element_ids) -> Dict[str, 'sd_elem.Element']:
+        """Add visual elements for elements with *element_ids* to drawing
+        and return dictionary with added elements. Output values are not
+        drawn here, see _add_value_labels
+        """
+        visual_elements = {}
+
+        for element_id in element_ids:
+            # add already placed element to drawing
+            visual_element = self._create_visual_element(snapshot[element_id])
+            drawing.elements.append(visual_element)
+            visual_elements[element_id] = visual_element
 
         return visual_elements
 
-    def _create_elements_kwargs(self, scheme_element: elements.BasicElement) -> Dict[
-        str, Union[bool, List[sd_elem.IcPin]]]:
+    def _element_bbox(self, scheme_element: ElementSnapshot) -> BBox:
+        """Return bounding box of the element in scheme coordinates
+        (bounding box of its template moved to the element position)"""
+        key = self._template_key(scheme_element)
+        if key not in self._template_bboxes:
+            self._template_bboxes[key] = tuple(self._element_template(scheme_element).get_bbox(
+                transform=True, includetext=False))
+        x_min, y_min, x_max, y_max = self._template_bboxes[key]
+        x, y = scheme_element.position
+        return x + x_min, y + y_min, x + x_max, y + y_max
+
+    def _spatial_index(self, snapshot: SchemeSnapshot) -> GridIndex:
+        """Return spatial index of elements (keys ('element', id)) and
+        connections (keys ('wire', number in snapshot.connections)).
+        The index is rebuilt only if scheme structure was changed"""
+        if self._index_version == snapshot.version:
+            return self._index
+
+        index = GridIndex()
+        obstacles = {}
+        for scheme_element in snapshot:
+            obstacles[scheme_element.id] = self._element_bbox(scheme_element)
+            index.insert(('element', scheme_element.id), obstacles[scheme_element.id])
+        for number, (source_id, _, destination_id, _) in enumerate(snapshot.connections):
+            source = index[('element', source_id)]
+            destination = index[('element', destination_id)]
+            index.insert(('wire', number), (min(source[0], destination[0]),
+                                            min(source[1], destination[1]),
+                                            max(source[2], destination[2]),
+                                            max(source[3], destination[3])))
+
+        # only routes of changed wires and wires near moved elements are recomputed
+        self._router.set_obstacles(obstacles)
+        self._router.retain(snapshot.connections)
+
+        self._index, self._index_version = index, snapshot.version
+        return index
+
+    def _pin_position(self, scheme_element: ElementSnapshot, label: str) -> Tuple[float, float]:
+        """Return position of the pin *label* of the element in scheme coordinates"""
+        anchor_x, anchor_y = self._element_template(scheme_element).absanchors[label]
+        x, y = scheme_element.position
+        return anchor_x + x, anchor_y + y
+
+    def _wire_routes(self, snapshot: SchemeSnapshot, index: GridIndex, connections):
+        """Return orthogonal routes (lists of points) of connections, see WireRouter"""
+        routes = []
+        for connection in connections:
+            source_id, output_label, destination_id, input_label = connection
+            routes.append(self._router.route(
+                connection,
+                self._pin_position(snapshot[source_id], output_label),
+                index[('element', source_id)],
+                self._pin_position(snapshot[destination_id], input_label),
+                index[('element', destination_id)]))
+        return routes
+
+    def _create_elements_kwargs(self, scheme_element: ElementSnapshot) -> Dict[
+        str, Union[bool, List['sd_elem.IcPin']]]:
         """Create custom attributes for integrated
         circuits elements"""
 
         kwargs = {}
 
-        if self._elements_match[scheme_element.element_type] in (sd_elem.Ic, sd_elem.Multiplexer):
+        if self._elements_match.get(scheme_element.element_type, sd_elem.Ic) in (sd_elem.Ic, sd_elem.Multiplexer):
             kwargs['plblsize'] = self._default_label_size
 
         if scheme_element.element_type == "CONSTANT":
@@ -183,74 +397,260 @@ class Visualizer:
                               sd_elem.IcPin(name='D', side='left'),
                               sd_elem.IcPin(name='Q', side='right')]
 
-        return kwargs
+        elif scheme_element.element_type in ("RAM", "ROM"):
+            kwargs['pins'] = []
+            for i in range(scheme_element.number_address_bits):
+                kwargs['pins'].append(sd_elem.IcPin(name=f'A{i}', side='left'))
+            if scheme_element.element_type == "RAM":
+                for i in range(scheme_element.number_data_bits):
+                    kwargs['pins'].append(sd_elem.IcPin(name=f'D{i}', side='left'))
+                kwargs['pins'].append(sd_elem.IcPin(name='WE', side='left'))
+            for i in range(scheme_element.number_data_bits):
+                kwargs['pins'].append(sd_elem.IcPin(name=f'Q{i}', side='right'))
+
+        elif scheme_element.element_type == "CLOCK":
+            kwargs['pins'] = [sd_elem.IcPin(name='out', side='right')]
+
+        elif scheme_element.element_type == "DFF":
+            kwargs['pins'] = [sd_elem.IcPin(name='D', side='left'),
+                              sd_elem.IcPin(name='clk', side='left'),
+                              sd_elem.IcPin(name='Q', side='right')]
 
-    def _add_input_connections(self,
-                               visual_elements: Dict[str, sd_elem.Element],
-                               drawing: schemdraw.Drawing):
-        """Create visual input connections for elements"""
-        for element in self._scheme:
-            for in_label, in_connection in filter(lambda x: x[1] is not None,
-                                                  element.ins.items()):
-                source = visual_elements[in_connection.source.id]
-                destination = visual_elements[in_connection.destination.id]
+        elif 'bus_width' in scheme_element.params or \
+                scheme_element.element_type not in self._elements_match:
+            # bus elements and modules: inputs on the left, outputs on the right
+            kwargs['pins'] = [sd_elem.IcPin(name=name, side='left') for name in scheme_element.ins]
+            kwargs['pins'].extend(sd_elem.IcPin(name=name, side='right')
+                                  for name in scheme_element.outs)
 
-                line = sd_elem.Line().endpoints(
-                    source.absanchors[in_connection.output_label],
-                    destination.absanchors[in_connection.input_label])
-                drawing.add(line)
+        return kwargs
 
-    def _create_drawing(self, iterate_circuit: bool):
-        drawing = schemdraw.Drawing(lw=1, fontsize=self._default_label_size)
+    def _add_input_connections(self, ax, snapshot: SchemeSnapshot, index: GridIndex,
+                               connections, **line_params):
+        """Draw connections as orthogonal wires routed around elements"""
+        routes = self._wire_routes(snapshot, index, connections)
+        ax.add_collection(LineCollection(routes, **line_params))
+
+    def _add_value_labels(self, visual_elements: Dict[str, 'sd_elem.Element'], ax,
+                          snapshot: SchemeSnapshot):
+        """Create (empty) text artists for output values of drawn elements.
+        They are animated, so they are not part of the cached background
+        and are drawn separately every frame"""
+        self._value_labels = {}
+        for element_id, visual_element in visual_elements.items():
+            for label in snapshot[element_id].outs:
+                if label not in visual_element.absanchors:
+                    continue
+                x, y = visual_element.absanchors[label]
+                self._value_labels[(element_id, label)] = ax.text(
+                    x, y + self._value_label_offset, '', color='red',
+                    fontsize=self._default_out_lbl_sz, ha='center', va='bottom',
+                    animated=True)
+
+    @staticmethod
+    def _layout_key(snapshot: SchemeSnapshot, viewport: Viewport, low_detail: bool) -> tuple:
+        """Return key that changes every time static part of the image changes:
+        scheme structure, viewport or values shown inside constant and variable elements"""
+        sources_values = tuple(element.value['out'] for element in snapshot
+                               if element.element_type in ('CONSTANT', 'VARIABLE'))
+        return snapshot.version, sources_values, viewport, low_detail
+
+    def _fit_viewport(self, index: GridIndex) -> Viewport:
+        bounds = index.bounds() or (-1, -1, 1, 1)
+        return Viewport.fit(bounds, self._axes_box[2], self._axes_box[3])
+
+    def _draw_detailed(self, ax, snapshot: SchemeSnapshot, index: GridIndex,
+                       element_ids, connections):
+        """Draw elements with schemdraw and routed wires"""
+        drawing = schemdraw.Drawing(**self._drawing_params)
+
+        # elements outside of the viewport are drawn only if visible wires end at them
+        to_draw = set(element_ids)
+        for source_id, _, destination_id, _ in connections:
+            to_draw.add(source_id)
+            to_draw.add(destination_id)
 
         # configure and add visual elements
-        visual_elements = self._add_visual_elements(drawing, iterate_circuit)
-
-        self._add_input_connections(visual_elements, drawing)
-
-        # create custom axis
-        fig, ax = plt.subplots()
-        # ax.set_xlim(0, 25)
-        # ax.set_ylim(0, 25)
-        pixels_inch = 96
-        axis_multiplier = 1.15
-        inch_width, inch_height = int(
-            self._max_width / pixels_inch * axis_multiplier), \
-                                  int(self._max_height / pixels_inch * axis_multiplier)
-        fig.set_size_inches((inch_width, inch_height))
-        plt.grid()
+        visual_elements = self._add_visual_elements(drawing, snapshot, sorted(to_draw, key=str))
 
         # to create fig object inside drawing
         # with custom axis and frame
-        drawing.draw(showframe=True, show=False, ax=ax)
-
-        return drawing
-
-    def get_tkinter_image(self, iterate_circuit: bool = False) -> ImageTk.PhotoImage:
-        """Return tkinter image for current scheme state
+        if visual_elements:
+            drawing.draw(showframe=True, show=False, ax=ax)
+            # labels of elements partly outside of the viewport must not cover the frame
+            for text in ax.texts:
+                text.set_clip_on(True)
+        self._add_input_connections(ax, snapshot, index, connections,
+                                    linewidths=self._drawing_params['lw'], colors='black')
+        self._add_value_labels(visual_elements, ax, snapshot)
+
+    def _draw_low_detail(self, ax, snapshot: SchemeSnapshot, index: GridIndex,
+                         element_ids, connections):
+        """Draw elements as boxes and wires as straight lines between them,
+        without pins, labels and values"""
+        boxes = []
+        for element_id in element_ids:
+            x_min, y_min, x_max, y_max = index[('element', element_id)]
+            boxes.append([(x_min, y_min), (x_max, y_min), (x_max, y_max),
+                          (x_min, y_max), (x_min, y_min)])
+        wires = []
+        for source_id, _, destination_id, _ in connections:
+            source = index[('element', source_id)]
+            destination = index[('element', destination_id)]
+            wires.append([(source[2], (source[1] + source[3]) / 2),
+                          (destination[0], (destination[1] + destination[3]) / 2)])
+
+        ax.add_collection(LineCollection(wires, linewidths=0.5, colors='gray'))
+        ax.add_collection(LineCollection(boxes, linewidths=1, colors='black'))
+        self._value_labels = {}
+
+    def _build_layout(self, snapshot: SchemeSnapshot, viewport: Viewport, low_detail: bool):
+        """Draw static part of the image (elements, wires, id labels)
+        inside the viewport and cache the rendered background"""
+        index = self._spatial_index(snapshot)
+        visible_box = viewport.bbox(self._axes_box[2], self._axes_box[3])
+        visible = index.query_rect(visible_box)
+        element_ids = [key[1] for key in visible if key[0] == 'element']
+        connections = [snapshot.connections[key[1]] for key in sorted(
+            (key for key in visible if key[0] == 'wire'), key=lambda key: key[1])]
+
+        # reuse the axis, only its content is cleared
+        ax = self._axes
+        ax.clear()
+        ax.grid()
+
+        if low_detail:
+            self._draw_low_detail(ax, snapshot, index, element_ids, connections)
+        else:
+            self._draw_detailed(ax, snapshot, index, element_ids, connections)
+        ax.set_xlim(visible_box[0], visible_box[2])
+        ax.set_ylim(visible_box[1], visible_box[3])
+
+        canvas = self._figure.canvas
+        canvas.draw()
+        self._background = canvas.copy_from_bbox(self._figure.bbox)
+        self._layout = self._layout_key(snapshot, viewport, low_detail)
+
+    @staticmethod
+    def _format_value(value) -> str:
+        """Text of output value: 0, 1, U or hexadecimal word of a bus"""
+        if value is None:
+            return 'U'
+        if isinstance(value, Word):
+            return str(value)
+        return str(int(value))
+
+    def _draw_values(self, scheme_elements_outs: Optional[Dict[str, dict]]):
+        """Restore cached background and draw output values on top of it (blitting)"""
+        canvas = self._figure.canvas
+        canvas.restore_region(self._background)
+        if scheme_elements_outs is None:
+            return
+
+        for (element_id, label), artist in self._value_labels.items():
+            value = scheme_elements_outs.get(element_id, {}).get(label)
+            artist.set_text(self._format_value(value))
+            self._axes.draw_artist(artist)
+
+    def render_frame(self, iterate_circuit: bool = False) -> 'Image.Image':
+        """Render current scheme state to PIL image (see render_snapshot)
 
         Arguments
         ----------
             iterate_circuit: specifies if to calculate output for image
             and iterate circuit
         """
-        drawing = self._create_drawing(iterate_circuit)
-
-        image_bytes = drawing.get_imagedata('png')
-
-        # test drawing
-        # plt.show()
+        scheme_elements_outs = self._scheme.run() if iterate_circuit else None
+        snapshot = self._scheme.snapshot(scheme_elements_outs)
+        start = time.perf_counter()
+        image = self.render_snapshot(snapshot)
+        profiler = self._scheme.profiler
+        if profiler is not None:
+            profiler.record_render(time.perf_counter() - start)
+        return image
 
-        # fix bug that schemdraw doesn't close matplotlib figures
-        plt.close('all')
+    def render_snapshot(self, snapshot: SchemeSnapshot) -> 'Image.Image':
+        """Render scheme snapshot to PIL image. Output values are drawn
+        only if the snapshot has them. Doesn't access the scheme itself,
+        so it can be called from a thread other than the one that edits the scheme.
 
-        image = Image.open(io.BytesIO(image_bytes))
-        image = self._resize_img(image)
-        image = ImageTk.PhotoImage(image)
+        Static layout is rebuilt only if the scheme structure or the viewport
+        was changed.
+        The image is taken directly from the RGBA buffer of the canvas
+        (without PNG encoding), so it is valid only until the next frame.
+        Render time is recorded by the caller (see render_frame and RenderWorker)
+        """
+        viewport = self.viewport or self._fit_viewport(self._spatial_index(snapshot))
+        self.last_viewport = viewport
+        low_detail = 1 / viewport.scale < self.lod_threshold
+
+        layout_key = self._layout_key(snapshot, viewport, low_detail)
+        if self._layout != layout_key:
+            self._build_layout(snapshot, viewport, low_detail)
+        self._draw_values(snapshot.outs)
+
+        canvas = self._figure.canvas
+        image = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(),
+                                 'raw', 'RGBA', 0, 1)
+        return self._resize_img(image)
+
+    def export_snapshot(self, snapshot: SchemeSnapshot, path: str, image_format: Optional[str] = None):
+        """Render scheme snapshot and save it to file at *path*.
+        Supported formats are 'png' and 'svg', format is taken from
+        the extension of *path* if it is not given"""
+        image_format = (image_format or path.rsplit('.', 1)[-1]).lower()
+        if image_format not in ('png', 'svg'):
+            raise ValueError(f"Image format <{image_format}> is not supported")
+
+        image = self.render_snapshot(snapshot)
+        if image_format == 'png':
+            image.save(path, 'PNG')
+            return
+
+        # vector image is drawn from scratch, so value labels have to be part of the figure
+        for artist in self._value_labels.values():
+            if snapshot.outs is None:
+                artist.set_text('')
+            artist.set_animated(False)
+        try:
+            self._figure.savefig(path, format='svg')
+        finally:
+            for artist in self._value_labels.values():
+                artist.set_animated(True)
+
+    def pixel_to_scheme(self, x: float, y: float) -> Tuple[float, float]:
+        """Convert pixel of the last rendered frame (y axis points down)
+        to scheme coordinates"""
+        viewport = self.last_viewport
+        if viewport is None:
+            return x, y
+        axes_x, axes_y, axes_width, axes_height = self._axes_box
+        return (viewport.center[0] + (x - axes_x - axes_width / 2) * viewport.scale,
+                viewport.center[1] + (self._max_height - y - axes_y - axes_height / 2)
+                * viewport.scale)
+
+    @staticmethod
+    def paste_to_photo(image: 'Image.Image',
+                       photo: Optional['ImageTk.PhotoImage'] = None) -> 'ImageTk.PhotoImage':
+        """Paste image into existing tkinter photo image and return it.
+        New photo image is created only if there is no photo yet or
+        its size differs from the size of the image"""
+        if photo is None or (photo.width(), photo.height()) != image.size:
+            return ImageTk.PhotoImage(image)
+        photo.paste(image)
+        return photo
+
+    def get_tkinter_image(self, iterate_circuit: bool = False) -> 'ImageTk.PhotoImage':
+        """Return new tkinter image for current scheme state
 
-        return image
+        Arguments
+        ----------
+            iterate_circuit: specifies if to calculate output for image
+            and iterate circuit
+        """
+        return ImageTk.PhotoImage(self.render_frame(iterate_circuit))
 
-    def _resize_img(self, image: Image) -> Image:
+    def _resize_img(self, image: 'Image.Image') -> 'Image.Image':
         """Resize image so that it fits in (max_width x max_height)"""
         if image.height <= self._max_height and image.width <= self._max_width:
             return image
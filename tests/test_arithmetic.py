@@ -0,0 +1,118 @@
+'''
+Test module for word-level arithmetic and comparison elements
+'''
+import timeit
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.bus import Word
+from src.scheme import Scheme
+from src.input_module import InputParser
+
+
+class TestArithmetic(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.parser = InputParser(self.scheme)
+
+    def _binary(self, element_type, width, a, b):
+        self.scheme.add_element('busvariable', 'a', (0, 0), width=width, init_value=a)
+        self.scheme.add_element('busvariable', 'b', (0, 4), width=width, init_value=b)
+        self.scheme.add_element(element_type, 'e', (5, 0), width=width)
+        self.scheme.add_connection('a', 'out', 'e', 'A')
+        self.scheme.add_connection('b', 'out', 'e', 'B')
+        return self.scheme['e']
+
+    def test_multiplier(self):
+        multiplier = self._binary('multiplier', 8, 200, 255)
+        self.assertEqual(self.scheme.run()['e']['P'], 51000)
+        self.assertEqual(multiplier.pin_width('P'), 16)
+        self.scheme['b'].switch(0)
+        # one element evaluated in microseconds
+        self.assertLess(min(timeit.repeat(multiplier.calc_value, number=100, repeat=5)), 0.01)
+        self.assertEqual(multiplier.value['P'], 0)
+
+    def test_unknown_product(self):
+        self.scheme.add_element('multiplier', 'e', (5, 0), width=4)
+        self.assertEqual(self.scheme.run()['e']['P'], Word.unknown_word(8))
+
+    def test_comparator(self):
+        self._binary('comparator', 8, 3, 200)
+        self.assertEqual(self.scheme.run()['e'], {'lt': True, 'eq': False, 'gt': False})
+        self.scheme['b'].switch(3)
+        self.assertEqual(self.scheme.run()['e'], {'lt': False, 'eq': True, 'gt': False})
+
+    def test_partially_unknown_comparison(self):
+        self.scheme.add_element('merger', 'a', (0, 0), width=4)
+        self.scheme.add_element('constant', 'one', (-3, 0), constant_value=1)
+        self.scheme.add_element('busvariable', 'b', (0, 4), width=4, init_value=3)
+        self.scheme.add_element('comparator', 'e', (5, 0), width=4)
+        comparator = self.scheme['e']
+        # A is 1UUU: at least 8, B is 3
+        self.scheme.add_connection('one', 'out', 'a', 'in3')
+        self.scheme.add_connection('a', 'out', 'e', 'A')
+        self.scheme.add_connection('b', 'out', 'e', 'B')
+        self.scheme.run()
+        self.assertEqual(comparator.calc_value(), {'lt': False, 'eq': False, 'gt': True})
+        # B is 1001: A can be less, equal or greater
+        self.scheme['b'].switch(9)
+        self.assertEqual(comparator.calc_value(), {'lt': None, 'eq': None, 'gt': None})
+
+    def test_equality(self):
+        self._binary('equality', 16, 1234, 1234)
+        self.assertEqual(self.scheme.run()['e'], {'eq': True})
+        self.scheme['b'].switch(1235)
+        self.assertEqual(self.scheme.run()['e'], {'eq': False})
+
+    def test_incrementer(self):
+        self.scheme.add_element('busvariable', 'a', (0, 0), width=4, init_value=15)
+        self.scheme.add_element('incrementer', 'inc', (5, 0), width=4)
+        self.scheme.add_connection('a', 'out', 'inc', 'in')
+        self.assertEqual(self.scheme.run()['inc'], {'out': 0, 'Cout': True})
+        self.scheme['a'].switch(6)
+        self.assertEqual(self.scheme.run()['inc'], {'out': 7, 'Cout': False})
+
+    def test_counter(self):
+        for command in ['add variable clk 0 0', 'add variable reset 0 2',
+                        'add counter c 4 0 -w 2', 'clk out > c clk', 'reset out > c reset',
+                        'switch reset 0', 'switch clk 0']:
+            self.parser.parse_raw_input(command)
+        self.assertEqual(self.scheme.run()['c']['out'], 0)
+        for count in [1, 2, 3, 0]:
+            self.parser.parse_raw_input('switch clk 1')
+            self.assertEqual(self.scheme.run()['c']['out'], count)
+            self.parser.parse_raw_input('switch clk 0')
+            self.assertEqual(self.scheme.run()['c']['out'], count)
+        self.parser.parse_raw_input('switch clk 1')
+        self.parser.parse_raw_input('switch reset 1')
+        self.assertEqual(self.parser.parse_raw_input('assert c out 0'), 'True\n')
+
+    def test_shifters(self):
+        for command in ['add busvariable x 0 0 -w 8', 'add busvariable n 0 4 -w 3',
+                        'add leftshifter l 5 0 -w 8', 'add arithmeticshifter r 5 4 -w 8',
+                        'x out > l in', 'n out > l amount', 'x out > r in', 'n out > r amount',
+                        f'switch x {0b10010110}',
+                        'switch n 2']:
+            self.parser.parse_raw_input(command)
+        outs = self.scheme.run()
+        self.assertEqual(outs['l']['out'], 0b01011000)
+        self.assertEqual(outs['r']['out'], 0b11100101)
+        self.parser.parse_raw_input('switch x 64')
+        self.assertEqual(self.scheme.run()['r']['out'], 16)
+
+    def test_unknown_amount(self):
+        self.scheme.add_element('busvariable', 'x', (0, 0), width=4, init_value=0b0011)
+        self.scheme.add_element('leftshifter', 'l', (5, 0), width=4)
+        self.scheme.add_connection('x', 'out', 'l', 'in')
+        self.assertEqual(self.scheme['l'].pin_width('amount'), 2)
+        # shifts by 0..3: 0011, 0110, 1100, 1000
+        self.assertEqual(self.scheme.run()['l']['out'], Word.unknown_word(4))
+        # zero shifted by any amount is zero
+        self.scheme['x'].switch(0)
+        self.assertEqual(self.scheme.run()['l']['out'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+'''
+Test module for headless batch runner
+'''
+import json
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.batch import read_commands, run_file, run_files, main
+
+
+SCHEME_COMMANDS = ('add constant c1 1 1 -v 1\n'
+                   'add variable v1 1 3\n'
+                   'add and a1 3 2\n'
+                   'c1 out > a1 in1\n'
+                   'v1 out > a1 in2\n')
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self._tmp_dir.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def test_read_commands(self):
+        path = self._write('cmds.txt', '\ufeffadd and 0 1 1\n\n  del 0  \n')
+        self.assertEqual(read_commands(path), [(1, 'add and 0 1 1'), (3, 'del 0')])
+
+    def test_run_file(self):
+        path = self._write('scheme.txt', SCHEME_COMMANDS +
+                           'assert a1 out 1\n'
+                           'switch v1\n'
+                           'assert a1 out 1\n'
+                           'del unknown\n')
+        report = run_file(path)
+
+        self.assertEqual(report['status'], 'error')
+        self.assertEqual(report['commands'], 9)
+        self.assertEqual(report['passed'], 1)
+        self.assertEqual(report['failed'], 1)
+        self.assertEqual(report['failures'][0]['line'], 8)
+        self.assertEqual(len(report['errors']), 1)
+        self.assertEqual(report['errors'][0]['line'], 9)
+
+    def test_prelude(self):
+        scheme = self._write('scheme.txt', SCHEME_COMMANDS)
+        tests = self._write('tests.txt', 'assert a1 out 1\nswitch v1 0\nassert a1 out 0\n')
+
+        self.assertEqual(run_file(tests)['status'], 'error')
+        report = run_file(tests, prelude=[scheme])
+        self.assertEqual(report['status'], 'passed')
+        self.assertEqual(report['passed'], 2)
+
+    def test_missing_file(self):
+        report = run_file(os.path.join(self._tmp_dir.name, 'missing.txt'))
+        self.assertEqual(report['status'], 'error')
+
+    def test_run_files_parallel(self):
+        passing = self._write('passing.txt', SCHEME_COMMANDS + 'assert a1 out 1\n')
+        failing = self._write('failing.txt', SCHEME_COMMANDS + 'assert a1 out 0\n')
+
+        report = run_files([failing, passing, passing], jobs=2)
+
+        self.assertEqual([r['file'] for r in report['files']], [failing, passing, passing])
+        self.assertEqual([r['status'] for r in report['files']], ['failed', 'passed', 'passed'])
+        self.assertEqual(report['total']['passed'], 2)
+        self.assertEqual(report['total']['failed'], 1)
+
+    def test_main(self):
+        passing = self._write('passing.txt', SCHEME_COMMANDS + 'assert a1 out 1\n')
+        output = os.path.join(self._tmp_dir.name, 'report.json')
+
+        self.assertEqual(main(['run', '-j', '1', '-o', output, passing]), 0)
+        with open(output, encoding='utf-8') as file:
+            self.assertEqual(json.load(file)['total']['passed'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
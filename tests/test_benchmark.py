@@ -0,0 +1,61 @@
+'''
+Test module for circuit generators and benchmarks
+'''
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.benchmark import build_scheme, compare, run_benchmarks
+from src.generators import GENERATORS, decoder_tree, ring_oscillator, ripple_carry_adder
+
+
+class TestGenerators(unittest.TestCase):
+    def test_all_generators(self):
+        for name, generator in GENERATORS.items():
+            with self.subTest(name):
+                scheme = build_scheme(generator(4))
+                self.assertGreater(scheme.stats()['num_elements'], 4)
+                scheme.run()
+
+    def test_adder(self):
+        scheme = build_scheme(ripple_carry_adder(4))
+        for bit, value in enumerate((1, 0, 1, 1)):      # a = 13
+            scheme[f'a{bit}'].switch(value)
+        for bit, value in enumerate((1, 1, 0, 0)):      # b = 3
+            scheme[f'b{bit}'].switch(value)
+        outs = scheme.run()
+        total = sum(outs[f'fa{bit}']['S'] << bit for bit in range(4)) + (outs['fa3']['Cout'] << 4)
+        self.assertEqual(total, 16)
+
+    def test_decoder(self):
+        scheme = build_scheme(decoder_tree(4))
+        outs = scheme.run()
+        active = [id_ for id_, values in outs.items() if id_.startswith('l') and values['out']]
+        self.assertEqual(len(active), 1)
+        self.assertEqual(sum(id_.startswith('l') for id_ in outs), 16)
+
+    def test_ring_oscillates(self):
+        scheme = build_scheme(ring_oscillator(4))
+        self.assertEqual(scheme.stats()['num_elements'], 6)
+        self.assertIsNone(scheme.run()['g0']['out'])
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_and_compare(self):
+        report = run_benchmarks({'adder': [4]}, repeat=1)
+        names = [result['name'] for result in report['results']]
+        self.assertIn('adder-4/run', names)
+        self.assertIn('adder-4/memory', names)
+
+        baseline = [dict(result) for result in report['results']]
+        for result in baseline:
+            if result['name'] == 'adder-4/memory':
+                result['value'] /= 2
+        comparison = compare(report['results'], baseline)
+        regressions = [item['name'] for item in comparison if item['regression']]
+        self.assertEqual(regressions, ['adder-4/memory'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+'''
+Test module for multi-bit buses and bus elements
+'''
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.bus import Word, merge_values
+from src.scheme import Scheme, BusWidthMismatchError
+from src.input_module import InputParser
+
+
+class TestWord(unittest.TestCase):
+    def test_bits(self):
+        word = Word.from_bits([True, None, False, True])
+        self.assertEqual(word, Word(4, 0b1001, 0b0010))
+        self.assertEqual(word.to_bits(), [True, None, False, True])
+        self.assertEqual(Word(8, 0x1FF), 0xFF)
+        self.assertNotEqual(word, 0b1001)
+        self.assertEqual(str(Word(8, 0x2A)), '0x2a')
+        self.assertEqual(str(Word(8, 0x2A, 0x0F)), '0x2U')
+
+    def test_operations(self):
+        known_zero = Word(4, 0b0000)
+        unknown = Word.unknown_word(4)
+        self.assertEqual(known_zero & unknown, 0)
+        self.assertEqual(Word(4, 0b1111) | unknown, 0b1111)
+        self.assertEqual((Word(4, 0b1100) ^ unknown).unknown, 0b1111)
+        self.assertEqual(~Word(4, 0b1100, 0b0001), Word(4, 0b0010, 0b0001))
+        self.assertEqual(Word(4, 0b1100).merge(Word(4, 0b1010)), Word(4, 0b1000, 0b0110))
+        self.assertIsNone(merge_values(True, False))
+
+
+class TestBusElements(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.parser = InputParser(self.scheme)
+
+    def test_alu(self):
+        # 32-bit ALU: sum or difference, AND, OR and XOR selected by a 2-bit opcode
+        for command in ['add busvariable a 0 0 -w 32',
+                        'add busvariable b 0 4 -w 32',
+                        'add busvariable op 0 8 -w 2',
+                        'add variable sub 0 12',
+                        'add busaddersubtractor adder 5 0 -w 32',
+                        'add busand and 5 4 -w 32',
+                        'add busor or 5 8 -w 32',
+                        'add busxor xor 5 12 -w 32',
+                        'add busmultiplexer mux 10 4 -s 2 -w 32',
+                        'a out > adder A', 'b out > adder B', 'sub out > adder sub',
+                        'a out > and in1', 'b out > and in2',
+                        'a out > or in1', 'b out > or in2',
+                        'a out > xor in1', 'b out > xor in2',
+                        'op out > mux sel', 'adder S > mux in0', 'and out > mux in1',
+                        'or out > mux in2', 'xor out > mux in3']:
+            self.parser.parse_raw_input(command)
+        self.parser.parse_raw_input('switch a 3000000000')
+        self.parser.parse_raw_input('switch b 1294967297')
+        self.parser.parse_raw_input('switch sub 0')
+
+        self.parser.parse_raw_input('switch op 0')
+        outs = self.scheme.run()
+        self.assertEqual(outs['mux']['out'], 1)
+        self.assertTrue(outs['adder']['Cout'])
+        self.parser.parse_raw_input('switch sub 1')
+        self.assertEqual(self.parser.parse_raw_input('assert mux out 1705032703'), 'True\n')
+        for opcode, expected in [(1, 3000000000 & 1294967297), (2, 3000000000 | 1294967297),
+                                 (3, 3000000000 ^ 1294967297)]:
+            self.parser.parse_raw_input(f'switch op {opcode}')
+            self.assertEqual(self.scheme.run()['mux']['out'], expected)
+
+    def test_split_merge(self):
+        self.scheme.add_element('busvariable', 'v', (0, 0), width=4, init_value=0b0110)
+        self.scheme.add_element('splitter', 's', (3, 0), width=4)
+        self.scheme.add_element('merger', 'm', (6, 0), width=4)
+        self.scheme.add_element('not', 'n', (4, 0))
+        self.scheme.add_connection('v', 'out', 's', 'in')
+        self.scheme.add_connection('s', 'out0', 'n', 'in')
+        self.scheme.add_connection('n', 'out', 'm', 'in0')
+        for i in range(1, 3):
+            self.scheme.add_connection('s', f'out{i}', 'm', f'in{i}')
+        outs = self.scheme.run()
+        self.assertEqual([outs['s'][f'out{i}'] for i in range(4)], [False, True, True, False])
+        # in3 is not connected
+        self.assertEqual(outs['m']['out'], Word(4, 0b0111, 0b1000))
+
+    def test_unknown_select(self):
+        self.scheme.add_element('busvariable', 'x', (0, 0), width=4, init_value=0b1100)
+        self.scheme.add_element('busvariable', 'y', (0, 2), width=4, init_value=0b1010)
+        self.scheme.add_element('busmultiplexer', 'mux', (3, 0), width=4)
+        self.scheme.add_connection('x', 'out', 'mux', 'in0')
+        self.scheme.add_connection('y', 'out', 'mux', 'in1')
+        self.assertEqual(self.scheme.run()['mux']['out'], Word(4, 0b1000, 0b0110))
+
+    def test_width_mismatch(self):
+        self.scheme.add_element('busvariable', 'x', (0, 0), width=4)
+        self.scheme.add_element('busnot', 'n', (3, 0), width=8)
+        self.scheme.add_element('not', 'g', (3, 3))
+        self.assertRaises(BusWidthMismatchError, self.scheme.add_connection, 'x', 'out', 'n', 'in')
+        self.assertRaises(BusWidthMismatchError, self.scheme.add_connection, 'x', 'out', 'g', 'in')
+        self.assertEqual(self.scheme['n'].pin_width('in'), 8)
+        self.assertEqual(self.scheme['g'].pin_width('in'), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
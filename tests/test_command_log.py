@@ -0,0 +1,52 @@
+'''
+Test module for CommandLog
+'''
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.command_log import CommandLog
+
+
+class TestCommandLog(unittest.TestCase):
+    def test_pending(self):
+        log = CommandLog()
+        log.write('Command: add and 1 0 0\nStatus: Completed\n')
+        log.write('---\n')
+        self.assertEqual(log.take_pending(), '---\nCommand: add and 1 0 0\nStatus: Completed\n')
+        self.assertEqual(log.take_pending(), '')
+        log.write('Command: clear\n')
+        self.assertEqual(log.take_pending(), 'Command: clear\n')
+        self.assertEqual(log.text(), 'Command: clear\n---\nCommand: add and 1 0 0\nStatus: Completed\n')
+        self.assertEqual(len(log), 4)
+
+    def test_bounded(self):
+        log = CommandLog(max_lines=10)
+        for num in range(100000):
+            log.write(f'Command: switch v{num}\nStatus: Completed\n')
+        self.assertLessEqual(len(log), 10)
+        self.assertEqual(log.text().count('\n'), len(log))
+        self.assertTrue(log.text().startswith('Command: switch v99999\n'))
+        # messages dropped before they were shown are not pending anymore
+        self.assertEqual(log.take_pending(), log.text())
+
+        log.write('a very\nlong\nmessage\nthat\ndoes\nnot\nfit\ninto\nthe\nlog\nat all\n')
+        self.assertEqual(len(log), 11)
+
+    def test_history_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'history.log')
+            log = CommandLog(max_lines=2, path=path)
+            for num in range(5):
+                log.write(f'line {num}\n')
+            log.close()
+            with open(path, encoding='utf-8') as history:
+                self.assertEqual(history.read(), ''.join(f'line {num}\n' for num in range(5)))
+            self.assertEqual(log.text(), 'line 4\nline 3\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
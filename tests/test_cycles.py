@@ -0,0 +1,104 @@
+'''
+Test module for clock, edge-triggered elements and cycle-based simulation
+'''
+import time
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.scheme import Scheme
+from src.input_module import InputParser
+from src.cycles import ClockDomainError
+
+
+class TestCycles(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.parser = InputParser(self.scheme)
+
+    def _parse(self, commands):
+        for command in commands:
+            self.parser.parse_raw_input(command)
+
+    def test_counter(self):
+        self._parse(['add clock clk 0 0', 'add counter c 4 0 -w 8', 'clk out > c clk'])
+        self.assertEqual(self.scheme.run_cycles(10)['c']['out'], 10)
+        self.scheme.run_cycles(250)
+        self.assertEqual(self.scheme['c'].value['out'], 4)
+        self.assertFalse(self.scheme['clk'].value['out'])
+
+    def test_shift_register(self):
+        # flip-flops latch simultaneously, so a bit moves one stage per cycle
+        # regardless of the order of elements
+        self._parse(['add clock clk 0 0', 'add variable d 0 4',
+                     'add dff f3 12 0', 'add dff f2 8 0', 'add dff f1 4 0',
+                     'd out > f1 D', 'f1 Q > f2 D', 'f2 Q > f3 D',
+                     'clk out > f1 clk', 'clk out > f2 clk', 'clk out > f3 clk',
+                     'switch d 1'])
+        outs = self.scheme.run_cycles(1)
+        self.assertEqual([outs[f'f{i}']['Q'] for i in (1, 2, 3)], [1, False, False])
+        self.parser.parse_raw_input('switch d 0')
+        outs = self.scheme.run_cycles(2)
+        self.assertEqual([outs[f'f{i}']['Q'] for i in (1, 2, 3)], [0, 0, 1])
+
+    def test_accumulator(self):
+        self._parse(['add clock clk 0 0', 'add busvariable k 0 4 -w 16',
+                     'add constant zero 0 8 -v 0',
+                     'add busaddersubtractor acc 4 4 -w 16', 'add register r 8 4 -w 16',
+                     'add variable en 0 12',
+                     'r Q > acc A', 'k out > acc B', 'zero out > acc sub', 'acc S > r D',
+                     'clk out > r clk', 'en out > r E', 'switch k 3'])
+        self.assertEqual(self.scheme.run_cycles(5)['r']['Q'], 15)
+        self.parser.parse_raw_input('switch en 0')
+        self.assertEqual(self.scheme.run_cycles(5)['r']['Q'], 15)
+        # registers keep state in event-driven runs too
+        self.assertEqual(self.scheme.run()['r']['Q'], 15)
+
+    def test_plan_is_cached(self):
+        self._parse(['add clock clk 0 0', 'add dff f 4 0', 'clk out > f clk'])
+        self.scheme.run_cycles(1)
+        simulator = self.scheme._cycle_simulator
+        self.scheme.run_cycles(1)
+        self.assertIs(self.scheme._cycle_simulator, simulator)
+        self.parser.parse_raw_input('add not n 0 4')
+        self.scheme.run_cycles(1)
+        self.assertIsNot(self.scheme._cycle_simulator, simulator)
+
+    def test_loops(self):
+        # NOR latch is a combinational loop, it is evaluated until stable
+        self._parse(['add variable s 0 0', 'add variable r 0 4',
+                     'add nor n1 4 0', 'add nor n2 4 4',
+                     'r out > n1 in1', 'n2 out > n1 in2', 's out > n2 in1', 'n1 out > n2 in2',
+                     'switch s 1', 'switch r 0'])
+        outs = self.scheme.run_cycles(1)
+        self.assertEqual((outs['n1']['out'], outs['n2']['out']), (True, False))
+        self.parser.parse_raw_input('switch s 0')
+        outs = self.scheme.run_cycles(1)
+        self.assertEqual((outs['n1']['out'], outs['n2']['out']), (True, False))
+
+        self._parse(['add not osc 8 8', 'osc out > osc in'])
+        self.assertIsNone(self.scheme.run_cycles(1)['osc']['out'])
+
+    def test_derived_clock(self):
+        self._parse(['add clock clk 0 0', 'add not n 2 0', 'add dff f 4 0',
+                     'clk out > n in', 'n out > f clk'])
+        self.assertRaises(ClockDomainError, self.scheme.run_cycles, 1)
+
+    def test_command(self):
+        self._parse(['add clock clk 0 0', 'add counter c 4 0 -w 4', 'clk out > c clk',
+                     'cycles 3'])
+        self.assertEqual(self.parser.parse_raw_input('assert c out 3'), 'True\n')
+        self.parser.parse_raw_input('cycles')
+        self.assertEqual(self.parser.parse_raw_input('assert c out 4'), 'True\n')
+
+    def test_throughput(self):
+        self._parse(['add clock clk 0 0', 'add counter c 4 0 -w 32', 'clk out > c clk'])
+        start = time.perf_counter()
+        self.scheme.run_cycles(20000)
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(self.scheme['c'].value['out'], 20000)
+
+
+if __name__ == "__main__":
+    unittest.main()
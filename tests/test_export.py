@@ -0,0 +1,86 @@
+'''
+Test module for headless image export
+'''
+import os
+import tempfile
+import unittest
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from PIL import Image
+
+from src.export import collect_command_files, export_files, export_scheme, main
+from src.scheme import Scheme
+
+SCHEME_COMMANDS = ('add constant c1 1 1 -v 1\n'
+                   'add variable v1 1 3\n'
+                   'add and a1 3 2\n'
+                   'c1 out > a1 in1\n'
+                   'v1 out > a1 in2\n')
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.commands_dir = os.path.join(self._tmp_dir.name, 'commands')
+        self.output_dir = os.path.join(self._tmp_dir.name, 'images')
+        os.mkdir(self.commands_dir)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.commands_dir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def test_export_scheme(self):
+        scheme = Scheme()
+        scheme.add_element('constant', 'c1', (1, 1))
+        scheme.add_element('not', 'n1', (3, 1))
+        scheme.add_connection('c1', 'out', 'n1', 'in')
+
+        png_path = os.path.join(self._tmp_dir.name, 'scheme.png')
+        export_scheme(scheme, png_path, width=300, height=200)
+        with Image.open(png_path) as image:
+            self.assertEqual(image.size, (300, 200))
+
+        svg_path = os.path.join(self._tmp_dir.name, 'scheme.svg')
+        export_scheme(scheme, svg_path)
+        with open(svg_path, encoding='utf-8') as file:
+            self.assertIn('<svg', file.read())
+
+        with self.assertRaises(ValueError):
+            export_scheme(scheme, os.path.join(self._tmp_dir.name, 'scheme.bmp'))
+
+    def test_collect_command_files(self):
+        first = self._write('b.txt', SCHEME_COMMANDS)
+        second = self._write('a.txt', SCHEME_COMMANDS)
+        self._write('notes.md', '')
+        self.assertEqual(collect_command_files([self.commands_dir, first]),
+                         [second, first, first])
+
+    def test_export_files_parallel(self):
+        self._write('first.txt', SCHEME_COMMANDS)
+        self._write('second.txt', SCHEME_COMMANDS + 'del unknown\n')
+
+        report = export_files([self.commands_dir], self.output_dir, 'png',
+                              width=200, height=200, jobs=2)
+
+        self.assertEqual([r['status'] for r in report['files']], ['exported', 'exported'])
+        self.assertEqual(report['total']['errors'], 1)
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['first.png', 'second.png'])
+
+    def test_main(self):
+        path = self._write('scheme.txt', SCHEME_COMMANDS)
+        self.assertEqual(main(['-j', '1', '-f', 'svg', '-o', self.output_dir, path]), 0)
+        self.assertEqual(os.listdir(self.output_dir), ['scheme.svg'])
+
+
+if __name__ == "__main__":
+    unittest.main()
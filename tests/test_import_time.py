@@ -0,0 +1,59 @@
+'''
+Test module for import time of the simulation core.
+Heavy dependencies (pandas, numpy, matplotlib, schemdraw, PIL) must not be
+imported by the core, so headless tools and worker processes start fast
+'''
+import os
+import subprocess
+import sys
+import unittest
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'schemdraw', 'PIL')
+
+# seconds; measured import of the core takes ~20-30 ms
+CORE_IMPORT_BUDGET = 0.1
+
+MEASURE_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(','.join(name for name in {heavy!r} if name in sys.modules))
+'''
+
+
+def measure_import(imports: str):
+    '''
+    Import *imports* in a fresh interpreter and return
+    (import time in seconds, list of heavy modules that were imported)
+    '''
+    script = MEASURE_SCRIPT.format(imports=imports, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT_DIR, check=True,
+                            capture_output=True, text=True).stdout.split('\n')
+    return float(output[0]), [name for name in output[1].split(',') if name]
+
+
+class TestImportTime(unittest.TestCase):
+    def test_core_imports(self):
+        elapsed, heavy = measure_import('import src.scheme, src.elements, '
+                                        'src.truth_tables, src.input_module')
+        self.assertEqual(heavy, [])
+        self.assertLess(elapsed, CORE_IMPORT_BUDGET)
+
+    def test_visualize_import_is_lazy(self):
+        _, heavy = measure_import('import src.visualize')
+        self.assertEqual(heavy, [])
+
+    def test_batch_import(self):
+        elapsed, heavy = measure_import('import src.batch')
+        self.assertEqual(heavy, [])
+        self.assertLess(elapsed, CORE_IMPORT_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+'''
+Test module for automatic placement of elements
+'''
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.scheme import Scheme
+from src.input_module import InputParser
+from src.layout import acyclic_edges, assign_layers, layered_layout, scheme_graph
+
+
+class TestLayout(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.scheme.add_element('variable', 'a', (0, 0))
+        self.scheme.add_element('variable', 'b', (0, 0))
+        self.scheme.add_element('and', 'g1', (0, 0))
+        self.scheme.add_element('not', 'g2', (0, 0))
+        self.scheme.add_connection('a', 'out', 'g1', 'in1')
+        self.scheme.add_connection('b', 'out', 'g1', 'in2')
+        self.scheme.add_connection('g1', 'out', 'g2', 'in')
+
+    def test_layers(self):
+        positions = layered_layout(self.scheme)
+        self.assertEqual(positions['a'][0], positions['b'][0])
+        self.assertLess(positions['a'][0], positions['g1'][0])
+        self.assertLess(positions['g1'][0], positions['g2'][0])
+        self.assertNotEqual(positions['a'], positions['b'])
+
+    def test_feedback(self):
+        # SR latch: two NOR gates driving each other
+        self.scheme.add_element('nor', 'q', (0, 0))
+        self.scheme.add_element('nor', 'nq', (0, 0))
+        self.scheme.add_connection('a', 'out', 'q', 'in1')
+        self.scheme.add_connection('b', 'out', 'nq', 'in2')
+        self.scheme.add_connection('q', 'out', 'nq', 'in1')
+        self.scheme.add_connection('nq', 'out', 'q', 'in2')
+
+        ids, edges = scheme_graph(self.scheme)
+        acyclic = acyclic_edges(len(ids), edges)
+        self.assertEqual(len(acyclic), len(edges) - 1)
+        layers = assign_layers(len(ids), acyclic)
+        self.assertEqual(layers[ids.index('a')], 0)
+
+        positions = self.scheme.auto_layout()
+        self.assertEqual(len(set(positions.values())), len(positions))
+        self.assertEqual(self.scheme['q'].position, positions['q'])
+        self.assertEqual(self.scheme.elements_at(*positions['q']), {'q'})
+
+    def test_incremental(self):
+        self.scheme.auto_layout()
+        old_positions = {element.id: element.position for element in self.scheme}
+
+        self.scheme.add_element('or', 'g3', None)
+        self.scheme.add_connection('g2', 'out', 'g3', 'in1')
+        self.scheme.add_connection('a', 'out', 'g3', 'in2')
+        positions = self.scheme.auto_layout(incremental=True)
+
+        self.assertEqual(list(positions), ['g3'])
+        self.assertGreater(positions['g3'][0], old_positions['g2'][0])
+        self.assertNotIn(positions['g3'], old_positions.values())
+        for id_, position in old_positions.items():
+            self.assertEqual(self.scheme[id_].position, position)
+
+    def test_parser(self):
+        parser = InputParser(self.scheme)
+        parser.parse_raw_input('add decoder dec -i 2')
+        parser.parse_raw_input('add or o1')
+        parser.parse_raw_input('add or o2 -10 4')
+        self.assertEqual(len(self.scheme['dec'].ins), 2)
+        self.assertIsNotNone(self.scheme['o1'].position)
+        self.assertEqual(self.scheme['o2'].position, (-10, 4))
+
+        # elements are placed again on their first connection, after their sources
+        parser.parse_raw_input('add not n')
+        parser.parse_raw_input('add not m')
+        parser.parse_raw_input('g2 out > n in')
+        parser.parse_raw_input('n out > m in')
+        self.assertGreater(self.scheme['n'].position[0], self.scheme['g2'].position[0])
+        self.assertGreater(self.scheme['m'].position[0], self.scheme['n'].position[0])
+        position = self.scheme['n'].position
+        parser.parse_raw_input('a out > o1 in1')
+        self.assertEqual(self.scheme['n'].position, position)
+
+        # element ids may be command words
+        parser.parse_raw_input('add variable layout 0 10')
+        parser.parse_raw_input('add not memory 4 10')
+        parser.parse_raw_input('layout out > memory in')
+        parser.parse_raw_input('memory out > o2 in2')
+        self.assertIs(self.scheme['o2'].ins['in2'].source, self.scheme['memory'])
+        parser.parse_raw_input('memory out !> o2 in2')
+        self.assertIsNone(self.scheme['o2'].ins['in2'])
+
+        parser.parse_raw_input('layout')
+        self.assertEqual(self.scheme['a'].position[0], 0)
+        self.assertNotEqual(self.scheme['o2'].position, (-10, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+'''
+Test module for memory accounting of schemes
+'''
+import sys
+import unittest
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.scheme import Scheme
+from src.input_module import InputParser
+from src.memory import deep_sizeof
+
+
+class TestMemoryReport(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.scheme.add_element('variable', 'v1', (0, 0))
+        self.scheme.add_element('and', 'a1', (2, 0))
+        self.scheme.add_element('and', 'a2', (2, 2))
+        self.scheme.add_connection('v1', 'out', 'a1', 'in1')
+        self.scheme.add_connection('v1', 'out', 'a2', 'in1')
+        self.scheme.add_connection('a1', 'out', 'a2', 'in2')
+
+    def test_report(self):
+        report = self.scheme.memory_report()
+        self.assertEqual(report['num_elements'], 3)
+        self.assertEqual(report['types']['AND']['count'], 2)
+        self.assertEqual(report['types']['VARIABLE']['truth_tables'], 0)
+        self.assertGreater(report['types']['AND']['truth_tables'], 0)
+        self.assertEqual(report['connections']['count'], 3)
+        self.assertEqual(report['truth_tables']['private']['count'], 2)
+        self.assertEqual(report['truth_tables']['shared']['count'], 0)
+        self.assertEqual(report['total'],
+                         sum(record['total'] for record in report['types'].values()) +
+                         report['index'])
+
+    def test_shared_truth_table(self):
+        private = self.scheme.memory_report()
+        self.scheme['a2']._truth_table = self.scheme['a1']._truth_table
+        report = self.scheme.memory_report()
+        shared = report['truth_tables']['shared']
+        self.assertEqual((shared['count'], shared['references'], shared['types']), (1, 2, ['AND']))
+        self.assertEqual(report['types']['AND']['truth_tables'], 0)
+        self.assertLess(report['total'], private['total'])
+
+    def test_profiling_doesnt_change_tables(self):
+        report = self.scheme.memory_report()
+        self.scheme.enable_profiling()
+        self.assertEqual(self.scheme.memory_report()['truth_tables'], report['truth_tables'])
+
+    def test_deep_sizeof(self):
+        seen = set()
+        data = {'a': [1, 2, 3]}
+        size = deep_sizeof(data, seen)
+        self.assertGreater(size, sys.getsizeof(data))
+        # counted objects are not counted again
+        self.assertEqual(deep_sizeof(data, seen), 0)
+
+    def test_private_module_copies(self):
+        module = Scheme()
+        module.add_element('variable', 's', (0, 0))
+        module.add_element('variable', 'r', (0, 4))
+        module.add_element('nor', 'n1', (4, 0))
+        module.add_element('nor', 'n2', (4, 4))
+        module.add_connection('r', 'out', 'n1', 'in1')
+        module.add_connection('n2', 'out', 'n1', 'in2')
+        module.add_connection('s', 'out', 'n2', 'in1')
+        module.add_connection('n1', 'out', 'n2', 'in2')
+        self.scheme.register_module('latch', module, {'Q': ('n1', 'out')})
+        self.scheme.add_element('latch', 'l1', (6, 0))
+        one = self.scheme.memory_report()
+        self.assertEqual(one['modules']['count'], 1)
+        self.assertGreater(one['types']['LATCH']['modules'], 0)
+
+        # every instance has its own copy of the module scheme
+        self.scheme.add_element('latch', 'l2', (6, 4))
+        two = self.scheme.memory_report()
+        self.assertEqual(two['modules']['count'], 2)
+        self.assertGreater(two['types']['LATCH']['total'] - one['types']['LATCH']['total'],
+                           one['modules']['bytes'] // 2)
+        self.assertIn('Private module copies: 2', InputParser(self.scheme).parse_raw_input('memory'))
+
+    def test_command(self):
+        text = InputParser(self.scheme).parse_raw_input('memory')
+        self.assertTrue(text.startswith('Total:'))
+        self.assertIn('AND x2', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
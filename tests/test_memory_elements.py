@@ -0,0 +1,135 @@
+'''
+Test module for RAM and ROM elements
+'''
+import os
+import tempfile
+import time
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+import numpy as np
+
+from src.scheme import Scheme
+from src.input_module import InputParser
+from src.elements import Ram, Rom
+
+
+class TestMemoryElements(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _connect_bits(self, prefix, element_id, base, num_bits):
+        for i in range(num_bits):
+            self.scheme.add_element('variable', f'{prefix}{i}', (0, i))
+            self.scheme.add_connection(f'{prefix}{i}', 'out', element_id, f'{base}{i}')
+
+    def _set_number(self, prefix, number, num_bits):
+        for i in range(num_bits):
+            self.scheme[f'{prefix}{i}'].switch((number >> i) & 1)
+
+    def _read_number(self, outs, element_id, num_bits):
+        return sum(int(outs[element_id][f'Q{i}']) << i for i in range(num_bits))
+
+    def test_ram_write_read(self):
+        self.scheme.add_element('ram', 'mem', (5, 0), num_address_bits=4, num_data_bits=8)
+        self._connect_bits('a', 'mem', 'A', 4)
+        self._connect_bits('d', 'mem', 'D', 8)
+        self.scheme.add_element('variable', 'we', (0, 20))
+        self.scheme.add_connection('we', 'out', 'mem', 'WE')
+
+        self._set_number('a', 5, 4)
+        self._set_number('d', 0xA7, 8)
+        outs = self.scheme.run()
+        self.assertEqual(self._read_number(outs, 'mem', 8), 0xA7)
+
+        self.scheme['we'].switch(0)
+        self._set_number('d', 0x11, 8)
+        self._set_number('a', 6, 4)
+        self.assertEqual(self._read_number(self.scheme.run(), 'mem', 8), 0)
+        self._set_number('a', 5, 4)
+        self.assertEqual(self._read_number(self.scheme.run(), 'mem', 8), 0xA7)
+        self.assertEqual(self.scheme['mem'].read(5), 0xA7)
+
+    def test_ram_write_after_settling(self):
+        # address comes through two gates, so it changes later than data:
+        # the transient (old address, new data) must not be written
+        self.scheme.add_element('ram', 'mem', (8, 0), num_address_bits=1, num_data_bits=1)
+        self.scheme.add_element('variable', 'x', (0, 0), init_value=False)
+        self.scheme.add_element('not', 'n1', (2, 2))
+        self.scheme.add_element('not', 'n2', (4, 2))
+        self.scheme.add_element('constant', 'we', (4, 4), constant_value=True)
+        for source, destination, label in [('x', 'mem', 'D0'), ('x', 'n1', 'in'),
+                                           ('n1', 'n2', 'in'), ('n2', 'mem', 'A0'),
+                                           ('we', 'mem', 'WE')]:
+            self.scheme.add_connection(source, 'out', destination, label)
+        self.scheme.run()
+        self.scheme['x'].switch(1)
+        self.scheme.run()
+        self.assertEqual((self.scheme['mem'].read(0), self.scheme['mem'].read(1)), (0, 1))
+
+    def test_unknown_address(self):
+        ram = Ram('mem', num_address_bits=2, num_data_bits=2)
+        self.assertEqual(ram.calc_value(), {'Q0': None, 'Q1': None})
+
+    def test_rom_binary_file(self):
+        path = os.path.join(self.tmpdir.name, 'table.bin')
+        np.array([0x1234, 0xBEEF, 7], dtype='<u2').tofile(path)
+        rom = Rom('rom', num_address_bits=4, num_data_bits=16, path=path)
+        self.assertIsInstance(rom.contents, np.memmap)
+        self.assertEqual(rom.read(1), 0xBEEF)
+        # words after the end of file are zeros
+        self.assertEqual(rom.read(10), 0)
+
+        self.scheme.add_element('rom', 'rom', (5, 0), num_address_bits=4,
+                                num_data_bits=16, path=path)
+        self._connect_bits('a', 'rom', 'A', 4)
+        self._set_number('a', 0, 4)
+        self.assertEqual(self._read_number(self.scheme.run(), 'rom', 16), 0x1234)
+
+    def test_rom_hex_file(self):
+        path = os.path.join(self.tmpdir.name, 'table.hex')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('0f 10  # comment\nff\n')
+        rom = Rom('rom', num_address_bits=2, num_data_bits=8, path=path)
+        self.assertEqual([rom.read(address) for address in range(4)], [0x0F, 0x10, 0xFF, 0])
+
+        path = os.path.join(self.tmpdir.name, 'big.hex')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('1 ' * 5)
+        self.assertRaises(ValueError, Rom, 'rom', num_address_bits=2, path=path)
+
+    def test_large_memory(self):
+        self.scheme.add_element('ram', 'mem', (5, 0), num_address_bits=16, num_data_bits=8)
+        self.assertEqual(len(self.scheme['mem'].contents), 2 ** 16)
+        self._connect_bits('a', 'mem', 'A', 16)
+        self._set_number('a', 0xFFFF, 16)
+        self.scheme['mem'].write(0xFFFF, 0x1FF)
+        start = time.perf_counter()
+        outs = self.scheme.run()
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(self._read_number(outs, 'mem', 8), 0xFF)
+        self.assertEqual(self.scheme.stats()['num_elements'], 17)
+
+    def test_parser(self):
+        path = os.path.join(self.tmpdir.name, 'table.hex')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('3 2 1 0')
+        parser = InputParser(self.scheme)
+        parser.parse_raw_input('add ram r1 0 0 -a 4 -d 8')
+        parser.parse_raw_input(f'add rom r2 5 0 -a 2 -d 2 -f {path}')
+        self.assertEqual(self.scheme['r1'].number_address_bits, 4)
+        self.assertIn('WE', self.scheme['r1'].ins)
+        self.assertNotIn('WE', self.scheme['r2'].ins)
+        self.assertEqual(self.scheme['r2'].read(0), 3)
+        snapshot = self.scheme.snapshot(self.scheme.run())
+        self.assertEqual(snapshot['r1'].number_data_bits, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
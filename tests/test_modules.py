@@ -0,0 +1,138 @@
+'''
+Test module for hierarchical modules
+'''
+import itertools
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.scheme import Scheme, ModuleNameIsTakenError
+from src.input_module import InputParser
+from src.modules import ModuleInstance
+
+HALF_ADDER = '''add and and1 10 5
+add xor xor1 10 3
+add variable x 8 5
+add variable y 8 3
+x out > and1 in1
+y out > and1 in2
+x out > xor1 in1
+y out > xor1 in2
+'''
+
+# gated D latch of NOR gates (a bit of examples/4bit_register.txt)
+LATCH = '''add nor nor1 1 100
+add nor nor2 0 99
+nor1 out > nor2 in1
+nor2 out > nor1 in2
+add and and1 -2 101
+and1 out > nor1 in1
+add and and2 -2 98
+and2 out > nor2 in2
+add not not1 -4 100
+not1 out > and1 in1
+add variable d -6 99
+d out > not1 in
+d out > and2 in2
+add variable e -6 102
+e out > and1 in2
+e out > and2 in1
+'''
+
+
+def _scheme_from(commands: str) -> Scheme:
+    scheme = Scheme()
+    parser = InputParser(scheme)
+    for command in commands.splitlines():
+        parser.parse_raw_input(command)
+    return scheme
+
+
+class TestModules(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.parser = InputParser(self.scheme)
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        return path
+
+    def test_full_adder_of_half_adders(self):
+        path = self._write('half_adder.txt', HALF_ADDER)
+        for command in [f'module halfadder {path} S=xor1.out,C=and1.out',
+                        'add variable a 0 0', 'add variable b 0 2', 'add variable cin 0 4',
+                        'add halfadder ha1 4 1', 'add halfadder ha2 8 2', 'add or cout 12 2',
+                        'a out > ha1 x', 'b out > ha1 y', 'ha1 S > ha2 x', 'cin out > ha2 y',
+                        'ha1 C > cout in1', 'ha2 C > cout in2']:
+            self.parser.parse_raw_input(command)
+
+        self.assertIsInstance(self.scheme['ha1'], ModuleInstance)
+        self.assertEqual(self.scheme['ha1'].element_type, 'HALFADDER')
+        # instances share one compiled truth table
+        self.assertIsNotNone(self.scheme['ha1']._truth_table)
+        self.assertIs(self.scheme['ha1']._truth_table, self.scheme['ha2']._truth_table)
+
+        for a, b, cin in itertools.product([0, 1], repeat=3):
+            for variable, value in zip(['a', 'b', 'cin'], [a, b, cin]):
+                self.scheme[variable].switch(value)
+            outs = self.scheme.run()
+            self.assertEqual(outs['ha2']['S'], (a + b + cin) % 2)
+            self.assertEqual(outs['cout']['out'], (a + b + cin) >= 2)
+
+    def test_bus_module(self):
+        module = _scheme_from('add busvariable p 0 0 -w 16\n'
+                              'add busvariable q 0 4 -w 16\n'
+                              'add busxor x 4 2 -w 16\n'
+                              'add busnot n 8 2 -w 16\n'
+                              'p out > x in1\nq out > x in2\nx out > n in')
+        definition = self.scheme.register_module('xnor16', module, {'out': ('n', 'out')})
+        self.assertEqual(definition.widths['p'], 16)
+        self.scheme.add_element('busvariable', 'a', (0, 0), width=16, init_value=0xFF00)
+        self.scheme.add_element('busvariable', 'b', (0, 4), width=16, init_value=0x0F0F)
+        self.scheme.add_element('xnor16', 'g', (4, 2))
+        self.scheme.add_connection('a', 'out', 'g', 'p')
+        self.scheme.add_connection('b', 'out', 'g', 'q')
+        self.assertEqual(self.scheme['g'].pin_width('out'), 16)
+        # buses are evaluated by the shared evaluator, not by a truth table
+        self.assertIsNone(self.scheme['g']._truth_table)
+        self.assertEqual(self.scheme.run()['g']['out'], 0x0FF0)
+
+    def test_stateful_module(self):
+        path = self._write('latch.txt', LATCH)
+        self.parser.parse_raw_input(f'module latch {path} Q=nor1.out')
+        self.assertTrue(self.scheme.modules['latch'].stateful)
+        for command in ['add variable d 0 0', 'add variable e1 0 2', 'add variable e2 0 4',
+                        'add latch l1 4 0', 'add latch l2 4 4',
+                        'd out > l1 d', 'd out > l2 d', 'e1 out > l1 e', 'e2 out > l2 e',
+                        'switch d 1', 'switch e1 1', 'switch e2 1']:
+            self.parser.parse_raw_input(command)
+        outs = self.scheme.run()
+        self.assertEqual((outs['l1']['Q'], outs['l2']['Q']), (True, True))
+        # every instance keeps its own state
+        self.parser.parse_raw_input('switch e2 0')
+        self.parser.parse_raw_input('switch d 0')
+        outs = self.scheme.run()
+        self.assertEqual((outs['l1']['Q'], outs['l2']['Q']), (False, True))
+
+    def test_name_is_taken(self):
+        module = _scheme_from(HALF_ADDER)
+        self.scheme.register_module('ha', module, {'S': ('xor1', 'out')})
+        self.assertRaises(ModuleNameIsTakenError, self.scheme.register_module,
+                          'HA', module, {'S': ('xor1', 'out')})
+        self.assertRaises(ModuleNameIsTakenError, self.scheme.register_module,
+                          'and', module, {'S': ('xor1', 'out')})
+        self.assertRaises(KeyError, self.scheme.register_module,
+                          'ha2', module, {'S': ('xor1', 'wrong')})
+
+
+if __name__ == "__main__":
+    unittest.main()
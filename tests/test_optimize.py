@@ -0,0 +1,174 @@
+'''
+Test module for optimization of simulation plan (k-LUT collapsing,
+constant propagation, dead-logic elimination)
+'''
+import itertools
+import random
+import timeit
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.scheme import Scheme
+from src.input_module import InputParser
+from src.generators import random_dag, ripple_carry_adder
+from src.optimize import LookupTable
+
+
+def _scheme_from(commands) -> Scheme:
+    scheme = Scheme()
+    parser = InputParser(scheme)
+    for command in commands:
+        parser.parse_raw_input(command)
+    return scheme
+
+
+def _run(scheme: Scheme, k):
+    scheme.enable_optimization(k)
+    return scheme.run()
+
+
+class TestOptimize(unittest.TestCase):
+    def test_same_outputs(self):
+        rng = random.Random(0)
+        for commands in [random_dag(80), ripple_carry_adder(4)]:
+            scheme = _scheme_from(commands)
+            # inputs of deleted variable are unconnected, so unknown values
+            # come to leaves of lookup tables
+            scheme.delete_element(next(iter(scheme)).id)
+            variables = [element for element in scheme if element.element_type == 'VARIABLE']
+            for _ in range(20):
+                for variable in variables:
+                    variable.switch(rng.choice([0, 1]))
+                self.assertEqual(_run(scheme, None), _run(scheme, 6))
+
+    def test_cone(self):
+        # (a and b) xor (not c) is one LUT of three inputs, its gates can be probed
+        scheme = _scheme_from(['add variable a 0 0', 'add variable b 0 2', 'add variable c 0 4',
+                               'add and g 2 1', 'add not n 2 4', 'add xor x 4 2',
+                               'a out > g in1', 'b out > g in2', 'c out > n in',
+                               'g out > x in1', 'n out > x in2'])
+        scheme.enable_optimization(6)
+        plan = scheme.simulation_plan()
+        luts = [node for node in plan.nodes if isinstance(node, LookupTable)]
+        self.assertEqual(len(luts), 1)
+        self.assertEqual(luts[0].id, 'x')
+        self.assertEqual(len(luts[0].leaves), 3)
+        self.assertEqual(plan.report()['nodes'], 4)
+        self.assertEqual(plan.report()['collapsed'], 3)
+        for a, b, c in itertools.product([0, 1], repeat=3):
+            for variable, value in zip('abc', [a, b, c]):
+                scheme[variable].switch(value)
+            outs = scheme.run()
+            self.assertEqual(outs['x']['out'], (a and b) != (not c))
+            self.assertEqual(outs['g']['out'], a and b)
+            self.assertEqual(scheme['n'].value['out'], not c)
+
+    def test_limits(self):
+        # fan-out and the number of LUT inputs stop collapsing
+        scheme = _scheme_from(['add variable a 0 0', 'add variable b 0 2', 'add variable c 0 4',
+                               'add and g1 2 1', 'add or g2 4 2', 'add or g3 4 4',
+                               'a out > g1 in1', 'b out > g1 in2',
+                               'g1 out > g2 in1', 'c out > g2 in2',
+                               'g1 out > g3 in1', 'c out > g3 in2'])
+        self.assertEqual(scheme.simulation_plan(), None)
+        scheme.enable_optimization(6)
+        self.assertEqual(scheme.simulation_plan().report()['luts'], 0)
+        scheme.add_element('not', 'n', (6, 2))
+        scheme.add_connection('g2', 'out', 'n', 'in')
+        # the plan is rebuilt after the edit
+        self.assertEqual(scheme.simulation_plan().report()['luts'], 1)
+        self.assertEqual(scheme.simulation_plan().report()['collapsed'], 2)
+        scheme.enable_optimization(2)
+        self.assertEqual(scheme.simulation_plan().report()['luts'], 1)
+        scheme.delete_element('n')
+        self.assertEqual(scheme.simulation_plan().report()['luts'], 0)
+        self.assertRaises(ValueError, scheme.enable_optimization, 1)
+
+    def test_loops_are_kept(self):
+        scheme = _scheme_from(['add variable s 0 0', 'add variable r 0 4',
+                               'add nor n1 4 0', 'add nor n2 4 4',
+                               'r out > n1 in1', 'n2 out > n1 in2',
+                               's out > n2 in1', 'n1 out > n2 in2',
+                               'add not osc 8 8', 'osc out > osc in'])
+        scheme.enable_optimization(6)
+        self.assertEqual(scheme.simulation_plan().report()['luts'], 0)
+        outs = scheme.run()
+        self.assertIsNone(outs['osc']['out'])
+
+    def test_constant_folding(self):
+        # configuration constant: en = 0 forces g to 0 whatever x is
+        scheme = _scheme_from(['add variable x 0 0', 'add constant en 0 2 -v 0',
+                               'add constant one 0 4 -v 1', 'add and g 2 1',
+                               'add not n 2 4', 'add or o 4 2',
+                               'x out > g in1', 'en out > g in2', 'one out > n in',
+                               'g out > o in1', 'x out > o in2'])
+        values = {element.id: dict(element.value) for element in scheme}
+        scheme.enable_optimization(6)
+        # building the plan doesn't change values of elements
+        self.assertEqual({element.id: element.value for element in scheme}, values)
+        expected = _run(scheme, None)
+        scheme.enable_optimization(6)
+        plan = scheme.simulation_plan()
+        self.assertEqual(sorted(element.id for element in plan.constants), ['en', 'g', 'n', 'one'])
+        self.assertEqual(plan.constants[scheme['g']], {'out': False})
+        self.assertEqual([node.id for node in plan.nodes], ['x', 'o'])
+        for value in (0, 1):
+            scheme['x'].switch(value)
+            outs = scheme.run()
+            self.assertEqual(outs['g']['out'], False)
+            self.assertEqual(outs['n']['out'], False)
+            self.assertEqual(outs['o']['out'], value)
+        scheme['x'].switch(1)
+        self.assertEqual(scheme.run(), expected)
+
+    def test_dead_logic(self):
+        scheme = _scheme_from(['add variable a 0 0', 'add variable b 0 2',
+                               'add xor out 2 1', 'add and debug1 2 4', 'add not debug2 4 4',
+                               'add clock clk 0 6', 'add dff f 4 6',
+                               'add not fd 2 6',
+                               'a out > out in1', 'b out > out in2',
+                               'a out > debug1 in1', 'b out > debug1 in2',
+                               'debug1 out > debug2 in',
+                               'a out > fd in', 'fd out > f D', 'clk out > f clk'])
+        expected = _run(scheme, None)
+        scheme.enable_optimization(6, observed=['out'])
+        plan = scheme.simulation_plan()
+        # flip-flops keep their inputs alive
+        self.assertEqual(sorted(element.id for element in plan.dead), ['debug1', 'debug2'])
+        self.assertEqual(plan.report()['dead'], 2)
+        outs = scheme.run()
+        self.assertIsNone(outs['debug2']['out'])
+        # values of dead elements agree with the outputs of run
+        self.assertIsNone(scheme['debug2'].value['out'])
+        for element_id in ('out', 'f', 'fd'):
+            self.assertEqual(outs[element_id], expected[element_id])
+
+    def test_command(self):
+        scheme = Scheme()
+        parser = InputParser(scheme)
+        for command in ripple_carry_adder(8):
+            parser.parse_raw_input(command)
+        report = parser.parse_raw_input('optimize 4')
+        self.assertIn('LUTs (4 inputs at most)', report)
+        # variables are 1 by default: 255 + 255
+        self.assertEqual(parser.parse_raw_input('assert fa7 Cout 1'), 'True\n')
+        self.assertEqual(parser.parse_raw_input('assert fa0 S 0'), 'True\n')
+        report = parser.parse_raw_input('optimize 6 fa7')
+        self.assertIn('dead elements: 0', report)
+        self.assertIn('Constant elements: 1', report)
+        parser.parse_raw_input('optimize off')
+        self.assertIsNone(scheme.simulation_plan())
+
+    def test_speedup(self):
+        scheme = _scheme_from(ripple_carry_adder(8))
+        scheme.enable_optimization(None)
+        plain = min(timeit.repeat(scheme.run, number=3, repeat=3))
+        scheme.enable_optimization(6)
+        optimized = min(timeit.repeat(scheme.run, number=3, repeat=3))
+        self.assertLess(optimized, plain)
+
+
+if __name__ == "__main__":
+    unittest.main()
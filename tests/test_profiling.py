@@ -0,0 +1,89 @@
+'''
+Test module for profiling of scheme runs
+'''
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.scheme import Scheme
+from src.input_module import InputParser
+from src.elements import AndGate
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.scheme.add_element('variable', 'v1', (0, 0))
+        self.scheme.add_element('variable', 'v2', (0, 2))
+        self.scheme.add_element('and', 'a1', (2, 1))
+        self.scheme.add_connection('v1', 'out', 'a1', 'in1')
+        self.scheme.add_connection('v2', 'out', 'a1', 'in2')
+
+    def test_disabled(self):
+        self.scheme.run()
+        stats = self.scheme.stats()
+        self.assertFalse(stats['profiling'])
+        self.assertEqual(stats['num_elements'], 3)
+        self.assertEqual(stats['num_connections'], 2)
+        self.assertNotIn('runs', stats)
+        # elements are not instrumented
+        self.assertNotIn('calc_value', vars(self.scheme['a1']))
+
+    def test_counts(self):
+        self.scheme.enable_profiling()
+        self.scheme.run()
+        stats = self.scheme.stats()
+        self.assertEqual(stats['runs'], 1)
+        # 3 settling sweeps, then the same values are seen twice
+        self.assertEqual(stats['last_sweeps'], 5)
+        self.assertEqual(stats['last_period'], 1)
+        self.assertEqual(stats['elements']['a1']['evaluations'], 5)
+        self.assertEqual(stats['types']['VARIABLE']['evaluations'], 10)
+        self.assertEqual(stats['evaluations'], 15)
+        self.assertEqual(stats['truth_table']['calls'], 5)
+
+        self.scheme.add_element('not', 'n1', (4, 1))
+        self.scheme.run()
+        self.assertEqual(self.scheme.stats()['types']['NOT']['evaluations'], 6)
+
+        self.scheme.profiler.reset()
+        self.assertEqual(self.scheme.stats()['evaluations'], 0)
+
+        self.scheme.enable_profiling(False)
+        self.assertNotIn('calc_value', vars(self.scheme['a1']))
+        self.assertIsInstance(self.scheme['a1'], AndGate)
+        self.assertEqual(self.scheme.run()['a1'], {'out': 1})
+
+    def test_oscillation_period(self):
+        # a1 and n1 form a loop that oscillates while v1 is 1
+        self.scheme.add_element('not', 'n1', (4, 1))
+        self.scheme.delete_connection('v2', 'out', 'a1', 'in2')
+        self.scheme.add_connection('n1', 'out', 'a1', 'in2')
+        self.scheme.add_connection('a1', 'out', 'n1', 'in')
+        self.scheme['v1'].switch(0)
+        self.scheme.run()
+
+        self.scheme.enable_profiling()
+        self.scheme['v1'].switch(1)
+        outs = self.scheme.run()
+        self.assertIsNone(outs['a1']['out'])
+        self.assertGreater(self.scheme.stats()['last_period'], 1)
+
+    def test_command(self):
+        parser = InputParser(self.scheme)
+        self.assertIn('Profiling is off', parser.parse_raw_input('stats'))
+        parser.parse_raw_input('stats on')
+        parser.parse_raw_input('assert a1 out 1')
+        report = parser.parse_raw_input('stats')
+        self.assertIn('Runs: 1', report)
+        self.assertIn('AND: 5 evaluations', report)
+        parser.parse_raw_input('stats reset')
+        self.assertIn('Runs: 0', parser.parse_raw_input('stats'))
+        parser.parse_raw_input('stats off')
+        self.assertIsNone(self.scheme.profiler)
+        self.assertRaises(Exception, parser.parse_raw_input, 'stats wrong')
+
+
+if __name__ == "__main__":
+    unittest.main()
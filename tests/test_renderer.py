@@ -0,0 +1,114 @@
+'''
+Test module for RenderWorker
+'''
+import threading
+import time
+import unittest
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.renderer import RenderWorker
+from src.scheme import Scheme
+from src.visualize import Visualizer
+
+
+class _Frame:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def copy(self):
+        return self
+
+
+class _BlockingVisualizer:
+    '''Visualizer stand-in that renders only when allowed to'''
+    def __init__(self):
+        self.allow = threading.Semaphore(0)
+        self.rendered = []
+
+    def render_snapshot(self, snapshot):
+        self.allow.acquire()
+        self.rendered.append(snapshot)
+        return _Frame(snapshot)
+
+
+class TestRenderWorker(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.scheme.add_element('constant', 'c1', (1, 1))
+        self.scheme.add_element('not', 'n1', (3, 1))
+        self.scheme.add_connection('c1', 'out', 'n1', 'in')
+
+    @staticmethod
+    def _wait_frame(worker, timeout=10):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            frame = worker.take_frame()
+            if frame is not None:
+                return frame
+            time.sleep(0.01)
+        return None
+
+    def test_render(self):
+        worker = RenderWorker(Visualizer(self.scheme, max_width=300, max_height=300))
+        worker.start()
+        try:
+            self.assertFalse(worker.busy)
+            worker.submit(self.scheme.snapshot(self.scheme.run()))
+            self.assertTrue(worker.busy)
+            frame = self._wait_frame(worker)
+        finally:
+            worker.stop()
+        self.assertFalse(worker.busy)
+        self.assertEqual(frame.size, (300, 300))
+        self.assertIsNone(worker.take_frame())
+        self.assertGreater(worker.fps, 0)
+
+    def test_render_time_callback(self):
+        # render thread doesn't read the profiler from the scheme, it gets the callback
+        self.scheme.enable_profiling()
+        profiler = self.scheme.profiler
+        visualizer = Visualizer(self.scheme, max_width=200, max_height=200)
+        snapshot = self.scheme.snapshot(self.scheme.run())
+        visualizer.render_snapshot(snapshot)
+        self.assertEqual(profiler.stats()['render']['frames'], 0)
+
+        worker = RenderWorker(visualizer, on_render=profiler.record_render)
+        worker.start()
+        try:
+            worker.submit(snapshot)
+            self.assertIsNotNone(self._wait_frame(worker))
+        finally:
+            worker.stop()
+        self.assertEqual(profiler.stats()['render']['frames'], 1)
+
+    def test_stale_snapshots_dropped(self):
+        visualizer = _BlockingVisualizer()
+        worker = RenderWorker(visualizer)
+        worker.start()
+        try:
+            first = self.scheme.snapshot()
+            worker.submit(first)
+            # wait until the worker takes the first snapshot
+            while worker._pending is not None:
+                time.sleep(0.01)
+            worker.submit(self.scheme.snapshot())
+            newest = self.scheme.snapshot()
+            worker.submit(newest)
+            visualizer.allow.release()
+            self.assertIs(self._wait_frame(worker).snapshot, first)
+            visualizer.allow.release()
+            self.assertIs(self._wait_frame(worker).snapshot, newest)
+        finally:
+            visualizer.allow.release()
+            worker.stop()
+        self.assertEqual(worker.dropped_snapshots, 1)
+        self.assertEqual(visualizer.rendered, [first, newest])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+'''
+Test module for WireRouter
+'''
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.routing import WireRouter
+
+
+def _crosses(points, bbox):
+    '''Check if orthogonal polyline goes through the inside of bbox'''
+    x_min, y_min, x_max, y_max = bbox
+    for (x_1, y_1), (x_2, y_2) in zip(points, points[1:]):
+        if x_1 == x_2 and x_min < x_1 < x_max and \
+                min(y_1, y_2) < y_max and max(y_1, y_2) > y_min:
+            return True
+        if y_1 == y_2 and y_min < y_1 < y_max and \
+                min(x_1, x_2) < x_max and max(x_1, x_2) > x_min:
+            return True
+    return False
+
+
+class TestWireRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = WireRouter()
+        self.boxes = {'a': (0, -0.5, 2, 0.5), 'b': (10, -0.5, 12, 0.5),
+                      'wall': (5, -3, 7, 3), 'far': (30, 30, 32, 32)}
+        self.router.set_obstacles(self.boxes)
+
+    def _route(self, key='w'):
+        return self.router.route(key, (2, 0), self.boxes['a'], (10, 0), self.boxes['b'])
+
+    def test_route_around(self):
+        points = self._route()
+        self.assertEqual(points[0], (2, 0))
+        self.assertEqual(points[-1], (10, 0))
+        for (x_1, y_1), (x_2, y_2) in zip(points, points[1:]):
+            self.assertTrue(x_1 == x_2 or y_1 == y_2)
+        for bbox in self.boxes.values():
+            self.assertFalse(_crosses(points, bbox))
+
+    def test_cache(self):
+        points = self._route()
+        self.assertEqual(self.router.searches, 1)
+        self.assertIs(self._route(), points)
+        self.assertEqual(self.router.searches, 1)
+
+        # obstacle far from the route doesn't invalidate it
+        self.boxes['far'] = (40, 40, 42, 42)
+        self.router.set_obstacles(self.boxes)
+        self._route()
+        self.assertEqual(self.router.searches, 1)
+
+        # route goes straight when the wall is removed
+        del self.boxes['wall']
+        self.router.set_obstacles(self.boxes)
+        self.assertEqual(self._route(), [(2, 0), (10, 0)])
+        self.assertEqual(self.router.searches, 2)
+
+    def test_retain(self):
+        self._route('w1')
+        self._route('w2')
+        self.router.retain(['w2'])
+        self.assertNotIn('w1', self.router)
+        self.assertIn('w2', self.router)
+        self.assertEqual(len(self.router), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
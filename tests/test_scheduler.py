@@ -0,0 +1,55 @@
+'''
+Test module for RefreshScheduler
+'''
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.scheduler import RefreshScheduler
+from src.scheme import Scheme
+
+
+class TestRefreshScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.scheme.add_element('variable', 'v1', (1, 1))
+        self.scheme.add_element('not', 'n1', (3, 1))
+        self.scheme.add_connection('v1', 'out', 'n1', 'in')
+
+    def test_should_render(self):
+        scheduler = RefreshScheduler()
+        self.assertFalse(scheduler.should_render(None))
+        self.assertTrue(scheduler.should_render(self.scheme.snapshot(self.scheme.run())))
+        self.assertFalse(scheduler.should_render(self.scheme.snapshot(self.scheme.run())))
+        self.assertEqual(scheduler.skipped_frames, 1)
+
+        self.scheme['v1'].switch(0)
+        self.assertTrue(scheduler.should_render(self.scheme.snapshot(self.scheme.run())))
+        self.scheme.move('n1', (4, 1))
+        self.assertTrue(scheduler.should_render(self.scheme.snapshot(self.scheme.run())))
+
+        scheduler.reset()
+        self.assertTrue(scheduler.should_render(self.scheme.snapshot(self.scheme.run())))
+
+    def test_interval_follows_frame_cost(self):
+        scheduler = RefreshScheduler(target_load=0.5, min_interval=10,
+                                     max_interval=1000, smoothing=1)
+        self.assertEqual(scheduler.update(0.001, True), 10)
+        self.assertEqual(scheduler.update(0.1, True), 200)
+        self.assertEqual(scheduler.update(2, True), 1000)
+
+    def test_idle_backoff(self):
+        scheduler = RefreshScheduler(min_interval=10, max_interval=100)
+        intervals = [scheduler.update(0, False) for _ in range(5)]
+        self.assertEqual(intervals, [20, 40, 80, 100, 100])
+        scheduler.reset()
+        self.assertEqual(scheduler.interval, 10)
+
+    def test_wrong_target_load(self):
+        with self.assertRaises(ValueError):
+            RefreshScheduler(target_load=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
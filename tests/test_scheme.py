@@ -109,6 +109,67 @@ class TestScheme(unittest.TestCase):
 
         self.assertEqual(self.scheme._elements[1].position, (2, 2))
 
+    def test_version(self):
+        versions = [self.scheme.version]
+        self.scheme.add_element('variable', 1, position=(1, 1))
+        versions.append(self.scheme.version)
+        self.scheme.add_element('not', 2, position=(1, 2))
+        self.scheme.add_connection(1, 'out', 2, 'in')
+        versions.append(self.scheme.version)
+        self.scheme.move(2, (3, 3))
+        versions.append(self.scheme.version)
+        self.scheme.delete_connection(1, 'out', 2, 'in')
+        versions.append(self.scheme.version)
+        self.assertEqual(len(set(versions)), len(versions))
+
+        # values are not part of the structure
+        version = self.scheme.version
+        self.scheme[1].switch()
+        self.scheme.run()
+        self.assertEqual(self.scheme.version, version)
+
+        self.scheme.clear()
+        self.assertNotEqual(self.scheme.version, version)
+
+    def test_snapshot(self):
+        self.scheme.add_element('variable', 1, position=(1, 1))
+        self.scheme.add_element('decoder', 2, position=(3, 1), num_input_lines=1)
+        self.scheme.add_connection(1, 'out', 2, 'in0')
+        snapshot = self.scheme.snapshot(self.scheme.run())
+
+        self.assertEqual(snapshot.version, self.scheme.version)
+        self.assertEqual(snapshot.connections, ((1, 'out', 2, 'in0'),))
+        self.assertEqual(snapshot[2].number_input_lines, 1)
+        self.assertEqual(snapshot[2].outs, ('out0', 'out1'))
+        self.assertEqual(snapshot.outs[2], {'out0': False, 'out1': True})
+
+        # snapshot doesn't change together with the scheme
+        self.scheme[1].switch()
+        self.scheme.move(2, (5, 5))
+        self.scheme.run()
+        self.assertEqual(snapshot[1].value, {'out': True})
+        self.assertEqual(snapshot[2].position, (3, 1))
+        self.assertEqual(snapshot.outs[2], {'out0': False, 'out1': True})
+
+    def test_spatial_queries(self):
+        self.scheme.add_element('and', 1, position=(1, 1))
+        self.scheme.add_element('or', 2, position=(1, 1))
+        self.scheme.add_element('not', 3, position=(10, 4))
+
+        self.assertEqual(self.scheme.elements_at(1, 1), {1, 2})
+        self.assertEqual(self.scheme.elements_at(2, 1), set())
+        self.assertEqual(self.scheme.elements_in((0, 0, 10, 4)), {1, 2, 3})
+        self.assertEqual(self.scheme.elements_in((5, 0, 20, 20)), {3})
+
+        self.scheme.move(2, (30, 30))
+        self.assertEqual(self.scheme.elements_at(1, 1), {1})
+        self.assertEqual(self.scheme.elements_at(30, 30), {2})
+
+        self.scheme.delete_element(3)
+        self.assertEqual(self.scheme.elements_in((5, 0, 20, 20)), set())
+        self.scheme.clear()
+        self.assertEqual(self.scheme.elements_in((-100, -100, 100, 100)), set())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,131 @@
+'''
+Test module for SimulationWorker
+'''
+import time
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.scheme import Scheme
+from src.simulation import SimulationWorker
+
+
+class _FailingScheme(Scheme):
+    def run(self):
+        raise ValueError('cannot run')
+
+
+class TestSimulationWorker(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.scheme.add_element('variable', 'v1', (1, 1))
+        self.scheme.add_element('not', 'n1', (3, 1))
+        self.scheme.add_connection('v1', 'out', 'n1', 'in')
+
+    @staticmethod
+    def _wait(condition, timeout=10):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def _wait_snapshot(self, worker):
+        snapshots = []
+        self._wait(lambda: snapshots.append(worker.take_snapshot()) or snapshots[-1] is not None)
+        return snapshots[-1]
+
+    def test_snapshots(self):
+        worker = SimulationWorker(self.scheme)
+        self.assertIsNone(worker.take_snapshot())
+        worker.start()
+        try:
+            self.assertTrue(self._wait(lambda: worker.ticks > 0))
+            snapshot = self._wait_snapshot(worker)
+            self.assertEqual(snapshot.outs['n1'], {'out': 0})
+
+            with worker.lock:
+                self.scheme['v1'].switch(0)
+            worker.notify_changed()
+            self.assertEqual(self._wait_snapshot(worker).outs['n1'], {'out': 1})
+        finally:
+            worker.stop()
+        self.assertFalse(worker.running)
+        self.assertGreater(worker.ticks_per_second, 0)
+
+    def test_idle_until_changed(self):
+        worker = SimulationWorker(self.scheme)
+        worker.start()
+        try:
+            self._wait_snapshot(worker)
+            time.sleep(0.1)
+            ticks = worker.ticks
+            time.sleep(0.1)
+            # the scheme has settled, so the worker doesn't tick anymore
+            self.assertEqual(worker.ticks, ticks)
+            self.assertIsNone(worker.take_snapshot())
+
+            with worker.lock:
+                self.scheme['v1'].switch(0)
+            worker.notify_changed()
+            self.assertTrue(self._wait(lambda: worker.ticks > ticks))
+        finally:
+            worker.stop()
+
+    def test_lock_pauses_simulation(self):
+        worker = SimulationWorker(self.scheme)
+        worker.start()
+        try:
+            with worker.lock:
+                ticks = worker.ticks
+                worker.notify_changed()
+                time.sleep(0.1)
+                self.assertEqual(worker.ticks, ticks)
+        finally:
+            worker.stop()
+
+    def test_tick_rate(self):
+        # ring oscillator never settles
+        self.scheme.add_element('not', 'n2', (5, 1))
+        self.scheme.add_element('not', 'n3', (7, 1))
+        self.scheme.delete_connection('v1', 'out', 'n1', 'in')
+        self.scheme.add_connection('n1', 'out', 'n2', 'in')
+        self.scheme.add_connection('n2', 'out', 'n3', 'in')
+        self.scheme.add_connection('n3', 'out', 'n1', 'in')
+
+        worker = SimulationWorker(self.scheme, tick_rate=20)
+        worker.start()
+        time.sleep(0.5)
+        worker.stop()
+        self.assertGreater(worker.ticks, 0)
+        self.assertLessEqual(worker.ticks, 12)
+
+    def test_clocked_scheme(self):
+        # with clocks every tick is a clock cycle, so a counter keeps counting
+        self.scheme.add_element('clock', 'clk', (1, 5))
+        self.scheme.add_element('counter', 'c', (4, 5), width=8)
+        self.scheme.add_connection('clk', 'out', 'c', 'clk')
+        worker = SimulationWorker(self.scheme, tick_rate=100)
+        worker.start()
+        try:
+            self.assertTrue(self._wait(lambda: worker.ticks >= 5))
+            with worker.lock:
+                ticks = worker.ticks
+                count = self.scheme['c'].value['out']
+        finally:
+            worker.stop()
+        # the tick counter is updated after the scheme lock is released
+        self.assertIn(count, (ticks % 256, (ticks + 1) % 256))
+
+    def test_error_stops_worker(self):
+        worker = SimulationWorker(_FailingScheme())
+        worker.start()
+        self.assertTrue(self._wait(lambda: not worker.running))
+        self.assertIsInstance(worker.error, ValueError)
+        worker.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+'''
+Test module for GridIndex
+'''
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.spatial import GridIndex, intersects
+
+
+class TestGridIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = GridIndex(cell_size=2, max_cells=16)
+        self.index.insert('a', (0, 0, 1, 1))
+        self.index.insert('b', (5, 5, 7, 6))
+        self.index.insert('long', (-100, 0, 100, 1))
+
+    def test_intersects(self):
+        self.assertTrue(intersects((0, 0, 2, 2), (1, 1, 3, 3)))
+        self.assertTrue(intersects((0, 0, 2, 2), (2, 2, 3, 3)))
+        self.assertFalse(intersects((0, 0, 2, 2), (2.5, 0, 3, 3)))
+
+    def test_query_rect(self):
+        self.assertEqual(self.index.query_rect((-1, -1, 0.5, 0.5)), {'a', 'long'})
+        self.assertEqual(self.index.query_rect((4, 4, 8, 8)), {'b'})
+        self.assertEqual(self.index.query_rect((50, 5, 60, 10)), set())
+        self.assertEqual(self.index.query_rect((-1000, -1000, 1000, 1000)), {'a', 'b', 'long'})
+
+    def test_query_point(self):
+        self.assertEqual(self.index.query_point(6, 5.5), {'b'})
+        self.assertEqual(self.index.query_point(50, 0.5), {'long'})
+        self.assertEqual(self.index.query_point(3, 3), set())
+
+    def test_insert_replaces(self):
+        self.index.insert('a', (10, 10, 11, 11))
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.query_point(0.5, 0.5), {'long'})
+        self.assertEqual(self.index.query_point(10.5, 10.5), {'a'})
+
+    def test_remove(self):
+        self.index.remove('b')
+        self.index.remove('long')
+        self.assertNotIn('b', self.index)
+        self.assertEqual(self.index.query_rect((-1000, -1000, 1000, 1000)), {'a'})
+        with self.assertRaises(KeyError):
+            self.index.remove('b')
+
+    def test_bounds(self):
+        self.assertEqual(self.index.bounds(), (-100, 0, 100, 6))
+        self.assertIsNone(GridIndex().bounds())
+
+    def test_wrong_cell_size(self):
+        with self.assertRaises(ValueError):
+            GridIndex(cell_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+'''
+Test module for TruthTable
+'''
+import unittest
+import sys
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.truth_tables import TruthTable
+
+
+class TestTruthTable(unittest.TestCase):
+    def setUp(self):
+        self.and_or = TruthTable(['a', 'b'], ['and', 'or'],
+                                 lambda args: [args[0] and args[1], args[0] or args[1]])
+
+    def test_get_value(self):
+        self.assertEqual(self.and_or.get_value([False, False]), {'and': False, 'or': False})
+        self.assertEqual(self.and_or.get_value([False, True]), {'and': False, 'or': True})
+        self.assertEqual(self.and_or.get_value([True, True]), {'and': True, 'or': True})
+
+    def test_predict_value(self):
+        self.assertEqual(self.and_or.predict_value({'a': True, 'b': False}),
+                         {'and': False, 'or': True})
+        self.assertEqual(self.and_or.predict_value({'a': False, 'b': None}),
+                         {'and': None, 'or': None})
+        or_table = TruthTable(['a', 'b'], ['out'], lambda args: args[0] or args[1])
+        self.assertEqual(or_table.predict_value({'a': True}), {'out': True})
+
+    def test_single_value_is_broadcast(self):
+        table = TruthTable(['a'], ['out1', 'out2'], lambda args: not args[0])
+        self.assertEqual(table.get_value([False]), {'out1': True, 'out2': True})
+
+    def test_wrong_number_of_outputs(self):
+        self.assertRaises(ValueError, TruthTable, ['a'], ['out1', 'out2'], lambda args: [args[0]])
+
+    def test_too_many_arguments(self):
+        names = [f'in{i}' for i in range(TruthTable.MAX_NUM_ARGS + 1)]
+        self.assertRaises(ValueError, TruthTable, names, ['out'], lambda args: all(args))
+
+
+if __name__ == "__main__":
+    unittest.main()
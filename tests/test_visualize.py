@@ -0,0 +1,141 @@
+'''
+Test module for Visualizer
+'''
+import threading
+import unittest
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+
+sys.path.append("..")     # to run tests from tests directory directly
+
+from src.scheme import Scheme
+from src.visualize import Visualizer, Viewport
+
+
+class TestVisualizer(unittest.TestCase):
+    def setUp(self):
+        self.scheme = Scheme()
+        self.scheme.add_element('variable', 'v1', (1, 1))
+        self.scheme.add_element('constant', 'c1', (1, 3))
+        self.scheme.add_element('and', 'a1', (4, 2))
+        self.scheme.add_connection('v1', 'out', 'a1', 'in1')
+        self.scheme.add_connection('c1', 'out', 'a1', 'in2')
+        self.visualizer = Visualizer(self.scheme, max_width=400, max_height=400)
+
+    def test_render(self):
+        image = self.visualizer.render_frame(iterate_circuit=True)
+        self.assertEqual(image.size, (400, 400))
+        self.assertEqual(set(self.visualizer._value_labels),
+                         {('v1', 'out'), ('c1', 'out'), ('a1', 'out')})
+        self.assertEqual(self.visualizer._value_labels[('a1', 'out')].get_text(), '1')
+
+    def test_layout_is_cached(self):
+        self.visualizer.render_frame(iterate_circuit=True)
+        background = self.visualizer._background
+
+        # only values changed: layout is reused
+        self.visualizer.render_frame(iterate_circuit=True)
+        self.assertIs(self.visualizer._background, background)
+
+        # structure changed: layout is rebuilt
+        self.scheme.move('a1', (5, 2))
+        self.visualizer.render_frame(iterate_circuit=True)
+        self.assertIsNot(self.visualizer._background, background)
+
+    def test_figure_is_reused(self):
+        import matplotlib.pyplot as plt
+
+        figure = self.visualizer._figure
+        self.visualizer.render_frame(iterate_circuit=True)
+        self.scheme.delete_element('c1')
+        self.visualizer.render_frame(iterate_circuit=True)
+        self.assertIs(self.visualizer._figure, figure)
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_render_in_thread(self):
+        frames = []
+        thread = threading.Thread(
+            target=lambda: frames.append(self.visualizer.render_frame(iterate_circuit=True)))
+        thread.start()
+        thread.join()
+        self.assertEqual(frames[0].size, (400, 400))
+
+    def test_values_redrawn(self):
+        self.visualizer.render_frame(iterate_circuit=True)
+        self.scheme.add_element('not', 'n1', (6, 2))
+        self.scheme.add_connection('a1', 'out', 'n1', 'in')
+        self.visualizer.render_frame(iterate_circuit=True)
+        self.assertEqual(self.visualizer._value_labels[('n1', 'out')].get_text(), '0')
+
+    def test_viewport_culling(self):
+        self.scheme.add_element('not', 'n1', (15, 15))
+        self.visualizer.render_frame(iterate_circuit=True)
+        self.assertIn(('n1', 'out'), self.visualizer._value_labels)
+
+        # elements connected to visible a1 are drawn too, n1 is not
+        self.visualizer.viewport = Viewport((4.5, 2), 0.01)
+        self.visualizer.render_frame(iterate_circuit=True)
+        self.assertEqual(set(self.visualizer._value_labels),
+                         {('v1', 'out'), ('c1', 'out'), ('a1', 'out')})
+
+        self.visualizer.viewport = Viewport((15.5, 15), 0.01)
+        self.visualizer.render_frame(iterate_circuit=True)
+        self.assertEqual(set(self.visualizer._value_labels), {('n1', 'out')})
+
+    def test_low_detail(self):
+        self.visualizer.viewport = Viewport((0, 0), 1)
+        image = self.visualizer.render_frame(iterate_circuit=True)
+        self.assertEqual(image.size, (400, 400))
+        self.assertEqual(self.visualizer._value_labels, {})
+        self.assertEqual(len(self.visualizer._axes.collections), 2)
+
+    def test_viewport(self):
+        viewport = Viewport((1, 1), 0.5)
+        self.assertEqual(viewport.bbox(4, 2), (0, 0.5, 2, 1.5))
+        self.assertEqual(viewport.panned(2, 2), Viewport((0, 2), 0.5))
+        self.assertEqual(viewport.zoomed(2), Viewport((1, 1), 0.25))
+        self.assertEqual(viewport.zoomed(2, (3, 1)), Viewport((2, 1), 0.25))
+        self.assertEqual(Viewport.fit((0, 0, 10, 4), 100, 100, margin=0), Viewport((5, 2), 0.1))
+        with self.assertRaises(ValueError):
+            Viewport((0, 0), 0)
+
+    def test_pixel_to_scheme(self):
+        self.visualizer.render_frame()
+        viewport = self.visualizer.last_viewport
+        x, y, width, height = self.visualizer._axes_box
+        center = (x + width / 2, 400 - y - height / 2)
+        self.assertEqual(self.visualizer.pixel_to_scheme(*center), viewport.center)
+        moved = self.visualizer.pixel_to_scheme(center[0] + 10, center[1] + 10)
+        self.assertAlmostEqual(moved[0], viewport.center[0] + 10 * viewport.scale)
+        self.assertAlmostEqual(moved[1], viewport.center[1] - 10 * viewport.scale)
+
+    def test_element_templates(self):
+        import schemdraw
+        from schemdraw import logic
+
+        self.scheme.add_element('decoder', 'd1', (8, 1), num_input_lines=3)
+        self.scheme.add_element('decoder', 'd2', (8, 9), num_input_lines=3)
+        self.visualizer.render_frame(iterate_circuit=True)
+        snapshot = self.scheme.snapshot()
+        # variable, constant, and gate and one template for both decoders
+        self.assertEqual(len(self.visualizer._templates), 4)
+
+        first = self.visualizer._create_visual_element(snapshot['d1'])
+        second = self.visualizer._create_visual_element(snapshot['d2'])
+        self.assertIs(first.segments[0], second.segments[0])
+        self.assertEqual(second.absanchors['out7'] - first.absanchors['out7'], (0, 8))
+
+        # translated element matches element placed by schemdraw
+        visual_element = self.visualizer._create_visual_element(snapshot['a1'])
+        placed = logic.And()
+        placed.anchors['center'] = (0, 0)
+        schemdraw.Drawing().add(placed.anchor('center').at((4, 2)))
+        for anchor in ('in1', 'in2', 'out'):
+            self.assertEqual(visual_element.absanchors[anchor], placed.absanchors[anchor])
+        self.assertEqual(visual_element.segments[-1].text, 'a1')
+
+
+if __name__ == "__main__":
+    unittest.main()